@@ -0,0 +1,39 @@
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from synthetic import make_country_history
+
+
+@pytest.fixture
+def history():
+    return make_country_history("brazil", "2000-01-01", "2019-12-31")
+
+
+def test_write_cold(benchmark, backend, history):
+    def setup():
+        return (history.copy(),), {}
+
+    benchmark.pedantic(backend.write, setup=setup, rounds=1)
+
+
+def test_write_append(benchmark, backend, history):
+    backend.write(history.iloc[:-5].copy())
+    benchmark(lambda: backend.write(history.iloc[-5:].copy()))
+
+
+def test_find_full(benchmark, backend, history):
+    backend.write(history.copy())
+    df = benchmark(backend.find, "brazil_10y")
+    assert len(df) == len(history)
+
+
+def test_find_recent_year(benchmark, backend, history):
+    backend.write(history.copy())
+    benchmark(backend.find, "brazil_10y", "2019-01-01", "2019-12-31")
+
+
+def test_find_many_recent_year(benchmark, backend, history):
+    backend.write(history.copy())
+    tickers = [t.lower().replace(" ", "_") for t in history.columns.unique(0)]
+    benchmark(backend.find_many, tickers, "2019-01-01", "2019-12-31")
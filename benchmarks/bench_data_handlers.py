@@ -0,0 +1,60 @@
+import pandas as pd
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from yieldcurves import data_handlers
+
+
+# Globals
+# ----
+FROM_DATE = "01/01/2010"
+TO_DATE = "31/12/2019"
+CACHED_UNTIL = pd.Timestamp("2018-12-31")
+
+
+def _load(backend):
+    return data_handlers.get_ohlc_yield_history(
+        "brazil", FROM_DATE, TO_DATE, backend=backend
+    )
+
+
+@pytest.mark.parametrize("backend", [None], ids=["none"])
+def test_get_ohlc_yield_history_uncached(benchmark, provider, backend):
+    benchmark(_load, backend)
+
+
+def test_get_ohlc_yield_history_cold(benchmark, provider, parquet_backend):
+    # Each round writes into a fresh cache directory
+    def setup():
+        parquet_backend.root = f"{parquet_backend.root}_"
+        return (parquet_backend,), {}
+
+    benchmark.pedantic(_load, setup=setup, rounds=5)
+
+
+def test_get_ohlc_yield_history_warm(benchmark, provider, parquet_backend):
+    _load(parquet_backend)
+    n_calls = sum(provider.calls.values())
+
+    benchmark(_load, parquet_backend)
+    assert sum(provider.calls.values()) == n_calls
+
+
+def test_get_ohlc_yield_history_partial(benchmark, provider, parquet_backend):
+    # Only the last year is missing from the cache
+    data_handlers.get_ohlc_yield_history(
+        "brazil", FROM_DATE, CACHED_UNTIL.strftime("%d/%m/%Y"), backend=parquet_backend
+    )
+
+    def setup():
+        for ticker in list(provider.calls):
+            db_ticker = data_handlers._to_db_ticker(ticker)
+            record = parquet_backend.find_coverage([db_ticker])[db_ticker]
+            record["intervals"] = [
+                [s, min(e, CACHED_UNTIL)] for s, e in record["intervals"]
+            ]
+            parquet_backend._save_coverage(db_ticker, record)
+        return (parquet_backend,), {}
+
+    benchmark.pedantic(_load, setup=setup, rounds=5)
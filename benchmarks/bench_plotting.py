@@ -0,0 +1,41 @@
+import pandas as pd
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+pytest.importorskip("streamlit")
+
+import streamlit as st
+
+from yieldcurves.app import shared
+from yieldcurves.app.plotting import plot_yield_curve
+from yieldcurves.utils import get_terms, sort_by_term
+
+from synthetic import make_country_history
+
+
+@pytest.fixture
+def state():
+    df = make_country_history("brazil", "2010-01-01", "2019-12-31").xs("Close", 1, 1)
+    df.columns = [c.lower().replace(" ", "_") for c in df.columns]
+
+    state = shared.get_state()
+    state.bonds_df = df
+    state.bonds_tickers = sort_by_term(list(df))
+    state.bonds_terms = get_terms(state.bonds_tickers)
+    state.bonds_active = set(state.bonds_tickers)
+    return state
+
+
+@pytest.mark.parametrize("method", ["cubic", "svensson"])
+def test_plot_yield_curve(benchmark, state, method):
+    state.interpolation_method = method
+    dates = [
+        d.strftime("%Y/%m/%d") for d in pd.bdate_range(end="2019-12-31", periods=5)
+    ]
+    benchmark(
+        lambda: plot_yield_curve(
+            active_bonds=state.bonds_active,
+            active_dates=list(dates),
+            container=st.container(),
+        )
+    )
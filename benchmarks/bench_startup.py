@@ -0,0 +1,63 @@
+"""
+Cold-start time of the CLI, the data API and Streamlit workers, each measured in
+a fresh interpreter with `python -X importtime`. Besides wall time (including
+interpreter startup), the cumulative import time reported by `-X importtime` and
+the slowest imports are saved in each result's `extra_info`.
+"""
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+
+# Globals
+# ----
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TARGETS = {
+    "cli": "import yieldcurves.cli",
+    "data_handlers": "import yieldcurves.data_handlers",
+    # As in `streamlit run yieldcurves/__main__.py`
+    "streamlit_worker": "import sys; sys.path.insert(0, 'yieldcurves'); import app",
+}
+# Only imported on first use, never at startup
+LAZY_MODULES = ("investpy", "plotly.express", "pymongo", "scipy")
+
+
+def import_time(code: str) -> dict:
+    """Run `code` in a fresh interpreter, parsing `-X importtime` output"""
+    check = f"print(*(m for m in {LAZY_MODULES!r} if m in sys.modules))"
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"{code}; import sys; {check}"],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    total = 0
+    slowest = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        head, cumulative_us, name = line.split("|")
+        slowest.append((int(head[len("import time:") :]), name.strip()))
+        if not name.startswith("  "):  # Top-level import
+            total += int(cumulative_us)
+
+    return {
+        "import_seconds": total / 1e6,
+        "slowest": [name for _, name in sorted(slowest, reverse=True)[:5]],
+        "lazy_imported": result.stdout.split(),
+    }
+
+
+@pytest.mark.parametrize("target", TARGETS)
+def test_startup(benchmark, target):
+    info = benchmark.pedantic(import_time, args=(TARGETS[target],), rounds=5)
+    benchmark.extra_info.update(info)
+
+    assert info["lazy_imported"] == []
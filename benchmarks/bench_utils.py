@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from yieldcurves.utils import (
+    get_tickvals,
+    interpolate_curve,
+    interpolate_curves,
+    sort_by_term,
+)
+
+from synthetic import COUNTRIES, TERMS, get_tickers, make_country_history
+
+
+def test_sort_by_term(benchmark):
+    tickers = [t for country in COUNTRIES for t in get_tickers(country)[::-1]]
+    benchmark(sort_by_term, tickers)
+
+
+def test_get_tickvals(benchmark):
+    benchmark(get_tickvals, TERMS)
+
+
+def _make_curves(n_dates: int) -> pd.DataFrame:
+    df = make_country_history("brazil", "2000-01-01", "2020-12-31")
+    df = df.xs("Close", 1, 1).iloc[-n_dates:]
+    df.columns = get_tickvals(TERMS)
+
+    # Sprinkle missing points, as in real data
+    mask = np.random.default_rng(0).random(df.shape) < 0.1
+    return df.mask(mask)
+
+
+def test_interpolate_curve(benchmark):
+    curve = _make_curves(1).iloc[0]
+    benchmark(interpolate_curve, curve, "cubic")
+
+
+def test_interpolate_curves_decade(benchmark):
+    curves = _make_curves(2610)
+    benchmark(interpolate_curves, curves, "cubic")
@@ -0,0 +1,75 @@
+"""
+Benchmark suite, run with `pytest-benchmark`:
+
+    python -m pytest benchmarks/bench_*.py --benchmark-autosave
+    python -m pytest benchmarks/bench_*.py --benchmark-compare
+
+Results are saved under `.benchmarks/`, one file per run (named after the commit),
+so regressions can be compared across commits. MongoDB cases run against
+`YIELDCURVES_BENCH_MONGO_HOST` (localhost by default) and are skipped if it is
+not reachable.
+"""
+
+import os
+
+import pymongo
+import pytest
+
+from yieldcurves import data_handlers, settings
+from yieldcurves.backends import ParquetBackend
+from yieldcurves.dbm import BucketManager, Manager
+from yieldcurves.gateway import Gateway
+
+from synthetic import SyntheticProvider
+
+
+# Globals
+# ----
+MONGO_HOST = os.environ.get("YIELDCURVES_BENCH_MONGO_HOST", "localhost")
+MONGO_DB = "yieldcurvesBench"
+
+
+@pytest.fixture(autouse=True)
+def lock_dir(monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "LOCK_DIR", str(tmp_path / "locks"))
+
+
+@pytest.fixture
+def provider(monkeypatch):
+    provider = SyntheticProvider()
+    monkeypatch.setattr(data_handlers, "DATA_PROVIDER", provider)
+    monkeypatch.setattr(
+        data_handlers, "UPSTREAM_GATEWAY", Gateway(rate=1e6, burst=1000)
+    )
+    return provider
+
+
+@pytest.fixture
+def parquet_backend(tmp_path):
+    return ParquetBackend(str(tmp_path / "cache"))
+
+
+def _make_mongo_backend(cls):
+    try:
+        client = pymongo.MongoClient(MONGO_HOST, serverSelectionTimeoutMS=500)
+        client.admin.command("ping")
+    except pymongo.errors.PyMongoError:
+        pytest.skip(f"mongod not reachable at [{MONGO_HOST}]")
+
+    client.drop_database(MONGO_DB)
+    backend = cls(MONGO_HOST, db=MONGO_DB)
+    backend.setup()
+    return client, backend
+
+
+@pytest.fixture(params=["parquet", "document", "bucket"])
+def backend(request, tmp_path):
+    """Cache backend: local Parquet files or `mongod` (document/bucket layouts)"""
+    if request.param == "parquet":
+        yield ParquetBackend(str(tmp_path / "cache"))
+        return
+
+    cls = {"document": Manager, "bucket": BucketManager}[request.param]
+    client, backend = _make_mongo_backend(cls)
+    yield backend
+    client.drop_database(MONGO_DB)
@@ -0,0 +1,101 @@
+"""
+Synthetic yield histories for benchmarks, with the same layouts as `investpy`'s
+output and `get_ohlc_yield_history`'s, deterministic per (ticker, date).
+"""
+
+import zlib
+from functools import lru_cache
+from typing import Dict, List, Sequence
+
+import numpy as np
+import pandas as pd
+
+from yieldcurves.providers import DataProvider
+from yieldcurves.universe import get_term_months
+
+
+# Globals
+# ----
+COUNTRIES = [
+    "brazil",
+    "united states",
+    "united kingdom",
+    "germany",
+    "japan",
+    "india",
+    "south africa",
+    "australia",
+]
+TERMS = ["1M", "3M", "6M", "1Y", "2Y", "3Y", "5Y", "7Y", "10Y", "15Y", "20Y", "30Y"]
+FIELDS = ["Open", "High", "Low", "Close"]
+START = pd.Timestamp("1990-01-01")
+END = pd.Timestamp("2030-12-31")
+
+
+def get_tickers(country: str, terms: Sequence[str] = TERMS) -> List[str]:
+    """e.g. brazil -> [Brazil 1M, Brazil 3M, ...]"""
+    return [f"{country.title()} {term}" for term in terms]
+
+
+def make_history(ticker: str, start: str, end: str) -> pd.DataFrame:
+    """Random-walk OHLC data for `ticker` on business days within [`start`,
+    `end`], as returned by `investpy.get_bond_historical_data`
+
+    Values only depend on (ticker, date), so overlapping ranges always agree.
+    """
+    close = _make_close(ticker).loc[start:end]
+    return pd.DataFrame(
+        {
+            "Open": close + 0.01,
+            "High": close + 0.05,
+            "Low": close - 0.05,
+            "Close": close,
+        }
+    )
+
+
+@lru_cache(maxsize=None)
+def _make_close(ticker: str) -> pd.Series:
+    index = pd.bdate_range(START, END, name="Date")
+    rng = np.random.default_rng(zlib.crc32(ticker.encode()))
+    months = get_term_months(ticker.rsplit(" ", 1)[-1])
+
+    level = 2 + np.log1p(months) + rng.normal(0, 0.05, len(index)).cumsum()
+    return pd.Series(level, index)
+
+
+def make_country_history(
+    country: str,
+    start: str,
+    end: str,
+    terms: Sequence[str] = TERMS,
+) -> pd.DataFrame:
+    """(ticker, field) MultiIndex frame for all `terms`, as passed to the cache
+    backends' `write`"""
+    frames = {
+        ticker: make_history(ticker, start, end)
+        for ticker in get_tickers(country, terms)
+    }
+    return pd.concat(frames, axis=1)
+
+
+class SyntheticProvider(DataProvider):
+    """Serves synthetic data for any country in `COUNTRIES`, counting calls"""
+
+    def __init__(self, terms: Sequence[str] = TERMS):
+        self.terms = terms
+        self.calls: Dict[str, int] = {}
+
+    def search_country(self, query: str) -> List[str]:
+        return get_tickers(query, self.terms) if query in COUNTRIES else []
+
+    def get_bond_historical_data(
+        self, ticker: str, from_date: str, to_date: str
+    ) -> pd.DataFrame:
+        self.calls[ticker] = self.calls.get(ticker, 0) + 1
+        start = pd.to_datetime(from_date, dayfirst=True)
+        end = pd.to_datetime(to_date, dayfirst=True)
+        df = make_history(ticker, start, end)
+        if df.empty:
+            raise IndexError("ERR#0069: no data found")
+        return df
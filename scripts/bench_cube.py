@@ -0,0 +1,71 @@
+"""
+Compare the memory footprint and curve lookup latency of `YieldCube` against the
+(ticker, field) MultiIndex frames returned by `get_ohlc_yield_history`, using
+synthetic daily data, e.g.
+
+    python scripts/bench_cube.py --years 20 --bonds 15
+"""
+
+import argparse
+from time import perf_counter
+
+import numpy as np
+import pandas as pd
+
+from yieldcurves.cube import FIELDS, YieldCube
+
+
+TERMS = ["1M", "3M", "6M", "1Y", "2Y", "3Y", "4Y", "5Y", "6Y", "7Y", "8Y", "9Y"]
+TERMS += ["10Y", "15Y", "20Y", "25Y", "30Y", "40Y", "50Y"]
+
+
+def make_frame(n_years: int, n_bonds: int) -> pd.DataFrame:
+    """Random OHLC data with the same layout as `get_ohlc_yield_history`'s output"""
+    index = pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=n_years * 261)
+    tickers = [f"foo_{term.lower()}" for term in TERMS[:n_bonds]]
+    columns = pd.MultiIndex.from_product((tickers, FIELDS))
+    return pd.DataFrame(
+        5 + np.random.randn(len(index), len(columns)), index=index, columns=columns
+    )
+
+
+def timeit(func, n: int) -> float:
+    """Median wall time (in us) of `n` calls to `func`"""
+    times = []
+    for _ in range(n):
+        t0 = perf_counter()
+        func()
+        times.append(perf_counter() - t0)
+    return np.median(times) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--years", type=int, default=20)
+    parser.add_argument("--bonds", type=int, default=15)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    df = make_frame(args.years, min(args.bonds, len(TERMS)))
+    dates = df.index[::-250][:5]
+    tickers = list(df.columns.unique(0))
+    close = df.xs("close", 1, 1)
+
+    print(f"{len(df)} dates x {len(tickers)} bonds x {len(FIELDS)} fields")
+    print(f"{'layout':<20}{'MB':>10}{'curves (us)':>14}")
+
+    frame_mb = df.memory_usage(deep=True).sum() / 1e6
+    lookup = timeit(lambda: df.xs("close", 1, 1).loc[dates, tickers], args.repeat)
+    print(f"{'frame':<20}{frame_mb:>10.2f}{lookup:>14.1f}")
+    lookup = timeit(lambda: close.loc[dates, tickers], args.repeat)
+    print(f"{'frame (close only)':<20}{'':>10}{lookup:>14.1f}")
+
+    for dtype in (np.float64, np.float32):
+        cube = YieldCube.from_frame(df, dtype=dtype)
+        lookup = timeit(lambda: cube.curves(dates), args.repeat)
+        name = f"cube ({np.dtype(dtype).name})"
+        print(f"{name:<20}{cube.nbytes / 1e6:>10.2f}{lookup:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
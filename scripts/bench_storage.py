@@ -0,0 +1,88 @@
+"""
+Compare the document (`Manager`) and bucketed (`BucketManager`) storage layouts
+against a running `mongod`, using synthetic daily data, e.g.
+
+    python scripts/bench_storage.py --years 20 --bonds 10
+
+Data is written to a throwaway database, dropped at the end of the run.
+"""
+
+import argparse
+from time import perf_counter
+
+import numpy as np
+import pandas as pd
+
+from yieldcurves.dbm import BucketManager, Manager
+
+
+def make_history(bond: str, start: str, end: str) -> pd.DataFrame:
+    """Random-walk OHLC data with the same layout as `investpy`'s output"""
+    index = pd.bdate_range(start, end, name="Date")
+    close = 5 + np.random.randn(len(index)).cumsum() * 0.05
+    df = pd.DataFrame(
+        {"Open": close, "High": close + 0.1, "Low": close - 0.1, "Close": close},
+        index=index,
+    )
+    df.columns = pd.MultiIndex.from_product(((bond,), df.columns))
+    return df
+
+
+def timeit(func, n: int) -> float:
+    """Median wall time (in ms) of `n` calls to `func`"""
+    times = []
+    for _ in range(n):
+        t0 = perf_counter()
+        func()
+        times.append(perf_counter() - t0)
+    return np.median(times) * 1000
+
+
+if __name__ == "__main__":
+    # Setup
+    # ----
+    parser = argparse.ArgumentParser(description="Benchmark local DB layouts")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", default=27017, type=int)
+    parser.add_argument("--years", default=20, type=int)
+    parser.add_argument("--bonds", default=10, type=int)
+    parser.add_argument("--repeat", default=20, type=int)
+    args = parser.parse_args()
+
+    db = "yieldcurvesBench"
+    end = pd.Timestamp.today().normalize() - pd.offsets.BDay(args.repeat + 1)
+    start = end - pd.DateOffset(years=args.years)
+    bonds = [f"Benchmark {i + 1}Y" for i in range(args.bonds)]
+    managers = {
+        "document": Manager(args.host, args.port, db=db),
+        "bucket": BucketManager(args.host, args.port, db=db),
+    }
+
+    # Run
+    # ----
+    for name, manager in managers.items():
+        manager.setup()
+        manager.collection.delete_many({})
+        for bond in bonds:
+            manager.write(make_history(bond, start, end))
+
+        # Append one new day at a time to a single bond, as in daily updates
+        new_days = iter(pd.bdate_range(end, periods=args.repeat + 1)[1:])
+        append = timeit(
+            lambda: manager.write(make_history(bonds[-1], *[next(new_days)] * 2)),
+            args.repeat,
+        )
+
+        # Read the last year for every bond
+        from_date = (end - pd.DateOffset(years=1)).strftime("%Y-%m-%d")
+        read_one = timeit(lambda: manager.find("benchmark_1y", from_date), args.repeat)
+        tickers = [bond.lower().replace(" ", "_") for bond in bonds]
+        read_many = timeit(lambda: manager.find_many(tickers, from_date), args.repeat)
+
+        print(
+            f"{name:>10}: append {append:8.2f}ms | "
+            f"1y read (1 bond) {read_one:8.2f}ms | "
+            f"1y read ({args.bonds} bonds) {read_many:8.2f}ms"
+        )
+
+    managers["document"].client.drop_database(db)
@@ -0,0 +1,37 @@
+"""
+Convert the one-document-per-bond collection into the bucketed layout, e.g.
+
+    python scripts/migrate_to_buckets.py --host localhost --port 27017
+
+Set `YIELDCURVES_DB_SCHEMA=bucket` afterwards to read from the new collection.
+"""
+
+import argparse
+import logging
+
+from yieldcurves.dbm import BucketManager, Manager, migrate_to_buckets
+
+
+if __name__ == "__main__":
+    # Setup
+    # ----
+    parser = argparse.ArgumentParser(description="Migrate the local DB to buckets")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", default=27017, type=int)
+    parser.add_argument("--db", default="yieldcurvesDB")
+    parser.add_argument("--source", default="bonds")
+    parser.add_argument("--target", default="bond_buckets")
+    parser.add_argument("--freq", default="Y", help="bucket period, e.g. Y, Q, M")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    source = Manager(args.host, args.port, db=args.db, collection=args.source)
+    target = BucketManager(
+        args.host, args.port, db=args.db, collection=args.target, freq=args.freq
+    )
+
+    # Run
+    # ----
+    target.setup()
+    n_bonds = migrate_to_buckets(source, target)
+    logging.info(f"Migrated {n_bonds} bonds to [{args.db}.{args.target}]")
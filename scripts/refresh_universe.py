@@ -0,0 +1,18 @@
+"""
+Rebuild the bond universe index (see `yieldcurves.universe`), e.g.
+
+    python scripts/refresh_universe.py
+"""
+
+import logging
+
+from yieldcurves.universe import refresh_universe
+
+
+if __name__ == "__main__":
+    # Run
+    # ----
+    logging.basicConfig(level=logging.INFO)
+    universe = refresh_universe()
+    n_bonds = sum(map(len, universe["countries"].values()))
+    logging.info(f"Indexed {n_bonds} bonds from {len(universe['countries'])} countries")
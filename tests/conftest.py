@@ -0,0 +1,12 @@
+import pytest
+
+from yieldcurves import data_handlers
+from yieldcurves.gateway import Gateway
+
+
+@pytest.fixture(autouse=True)
+def unthrottled_gateway(monkeypatch):
+    """Fresh upstream gateway per test, without rate limits or retry delays"""
+    gateway = Gateway(rate=1e6, burst=1000, backoff_base=0)
+    monkeypatch.setattr(data_handlers, "UPSTREAM_GATEWAY", gateway)
+    return gateway
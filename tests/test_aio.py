@@ -0,0 +1,138 @@
+import asyncio
+import time
+
+import pandas as pd
+import pytest
+
+from yieldcurves import aio, data_handlers
+from yieldcurves.backends import ParquetBackend
+
+# Globals
+# ----
+tickers = ["Brazil 3M", "Brazil 1Y", "Brazil 5Y", "Brazil 10Y"]
+
+
+def fake_get_bond_historical_data(ticker, from_date, to_date):
+    time.sleep(0.05)
+    start = pd.to_datetime(from_date, format="%d/%m/%Y")
+    end = pd.to_datetime(to_date, format="%d/%m/%Y")
+    index = pd.date_range(start, end, freq="B", name="Date")
+    if index.empty:
+        raise IndexError("ERR#0069: no data found")
+    seed = tickers.index(ticker)
+    values = [seed + i / 10 for i in range(len(index))]
+    return pd.DataFrame(
+        {field: values for field in ("Open", "High", "Low", "Close")}, index=index
+    )
+
+
+@pytest.fixture(autouse=True)
+def provider(monkeypatch, tmp_path):
+    monkeypatch.setattr(data_handlers.settings, "LOCK_DIR", str(tmp_path / "locks"))
+    monkeypatch.setattr(
+        data_handlers.DATA_PROVIDER, "search_country", lambda query: tickers
+    )
+    monkeypatch.setattr(
+        data_handlers.DATA_PROVIDER,
+        "get_bond_historical_data",
+        fake_get_bond_historical_data,
+    )
+
+
+def test_aget_ohlc_yield_history_matches_sync(tmp_path):
+    kwargs = dict(from_date="01/01/2020", to_date="31/01/2020")
+    sync_backend = ParquetBackend(str(tmp_path / "sync"))
+    async_backend = ParquetBackend(str(tmp_path / "async"))
+
+    # Cold then warm cache
+    for _ in range(2):
+        expected = data_handlers.get_ohlc_yield_history(
+            "brazil", backend=sync_backend, **kwargs
+        )
+        df = asyncio.run(
+            aio.aget_ohlc_yield_history("brazil", backend=async_backend, **kwargs)
+        )
+        pd.testing.assert_frame_equal(df, expected)
+
+
+def test_aget_ohlc_yield_history_max_points_matches_sync(tmp_path):
+    kwargs = dict(from_date="01/01/2020", to_date="31/03/2020", max_points=10)
+    sync_backend = ParquetBackend(str(tmp_path / "sync"))
+    async_backend = ParquetBackend(str(tmp_path / "async"))
+
+    for _ in range(2):
+        expected = data_handlers.get_ohlc_yield_history(
+            "brazil", backend=sync_backend, **kwargs
+        )
+        df = asyncio.run(
+            aio.aget_ohlc_yield_history("brazil", backend=async_backend, **kwargs)
+        )
+        pd.testing.assert_frame_equal(df, expected)
+        assert len(df) == 3  # Monthly
+
+
+def test_aget_recent_yield_matches_sync(tmp_path):
+    expected = data_handlers.get_recent_yield("brazil", n_rows=5, backend=None)
+    df = asyncio.run(aio.aget_recent_yield("brazil", n_rows=5, backend=None))
+
+    pd.testing.assert_frame_equal(df, expected)
+    assert df.columns.tolist() == tickers
+
+
+def test_concurrent_requests_share_the_cache(tmp_path):
+    backend = ParquetBackend(str(tmp_path))
+
+    async def main():
+        return await asyncio.gather(
+            *(
+                aio.aget_ohlc_yield_history(
+                    "brazil",
+                    from_date="01/01/2020",
+                    to_date="31/01/2020",
+                    backend=backend,
+                )
+                for _ in range(20)
+            )
+        )
+
+    results = asyncio.run(main())
+
+    assert all(df is not None for df in results)
+    for df in results[1:]:  # Index name/freq differ between upstream and cache
+        pd.testing.assert_frame_equal(
+            df, results[0], check_names=False, check_freq=False
+        )
+
+
+def test_cancelled_lock_acquire_is_released(monkeypatch):
+    events = []
+
+    class SlowLock:
+        def __enter__(self):
+            time.sleep(0.2)
+            events.append("acquired")
+
+        def __exit__(self, *exc_info):
+            events.append("released")
+
+    monkeypatch.setattr(aio, "country_lock", lambda country_name: SlowLock())
+
+    async def main():
+        task = asyncio.ensure_future(aio._alock_country("brazil", True).__aenter__())
+        await asyncio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        await asyncio.sleep(0.3)
+
+    asyncio.run(main())
+    assert events == ["acquired", "released"]
+
+
+def test_country_locks_are_dropped_once_released():
+    async def main():
+        async with aio._alock_country("brazil", True):
+            pass
+
+    asyncio.run(main())
+    assert aio._country_locks == {}
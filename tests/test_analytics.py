@@ -0,0 +1,108 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from yieldcurves import analytics
+
+
+# Globals
+# ----
+tenors = {
+    "brazil": ["12M", "1Y", "2Y", "5Y", "10Y"],
+    "japan": ["2Y", "10Y"],
+    "united states": ["2Y", "5Y", "10Y", "30Y"],
+}
+
+
+@pytest.fixture
+def panel():
+    index = pd.bdate_range("2020-01-01", periods=120, name="Date")
+    rng = np.random.default_rng(0)
+    data = {
+        (country, tenor, "close"): 2 + rng.random(len(index)).cumsum() / 10
+        for country, terms in tenors.items()
+        for tenor in terms
+    }
+    return pd.DataFrame(data, index=index)
+
+
+def test_get_curves_matches_terms_in_months(panel):
+    curves = analytics.get_curves(panel)
+
+    assert curves["brazil"].columns.tolist() == [12, 24, 60, 120]
+    assert curves["united states"].columns.tolist() == [24, 60, 120, 360]
+    expected = panel["brazil"][["12M", "1Y"]].xs("close", axis=1, level=1).mean(1)
+    np.testing.assert_allclose(curves[("brazil", 12)], expected)
+
+
+def test_compute_metrics(panel):
+    curves = analytics.get_curves(panel)
+    metrics = analytics.compute_metrics(curves, benchmark="united states")
+
+    np.testing.assert_allclose(
+        metrics[("2s10s", "japan")], (curves["japan"][120] - curves["japan"][24]) * 100
+    )
+    brazil = curves["brazil"]
+    np.testing.assert_allclose(
+        metrics[("2s5s10s", "brazil")],
+        (2 * brazil[60] - brazil[24] - brazil[120]) * 100,
+    )
+    np.testing.assert_allclose(
+        metrics[("10y_spread", "brazil")],
+        (brazil[120] - curves["united states"][120]) * 100,
+    )
+
+    # Missing terms (and the benchmark's own spreads) are left out
+    assert ("2s5s10s", "japan") not in metrics
+    assert ("5s30s", "brazil") not in metrics
+    assert ("10y_spread", "united states") not in metrics
+
+
+def test_rolling_stats(panel):
+    metrics = analytics.compute_metrics(analytics.get_curves(panel), "united states")
+    stats = analytics.rolling_stats(metrics, window=20)
+
+    assert set(stats.columns.get_level_values(2)) == set(analytics.STATS)
+    zscores = stats.xs("zscore", axis=1, level=2)
+    assert zscores.iloc[:9].isna().all().all()
+    percentiles = stats.xs("percentile", axis=1, level=2).stack([0, 1])
+    assert percentiles.between(0, 1).all()
+
+
+def test_get_analytics_only_computes_new_dates(panel, monkeypatch, tmp_path):
+    monkeypatch.setattr(analytics.settings, "ANALYTICS_CACHE_DIR", str(tmp_path))
+    curves = analytics.get_curves(panel)
+    window = 20
+
+    analytics.get_analytics(curves.iloc[:100], "united states", window)
+
+    computed = []
+    compute_metrics = analytics.compute_metrics
+
+    def spy(curves, benchmark=None):
+        computed.append(len(curves))
+        return compute_metrics(curves, benchmark)
+
+    monkeypatch.setattr(analytics, "compute_metrics", spy)
+    stats = analytics.get_analytics(curves, "united states", window)
+    # The last cached date, the new dates and their lookback
+    assert computed == [1 + 20 + window - 1]
+
+    expected = analytics.get_analytics(curves, "united states", window, full=True)
+    assert stats.index.equals(curves.index)
+    pd.testing.assert_frame_equal(stats, expected, check_freq=False)
+
+
+def test_update_analytics_defaults_to_current_date(monkeypatch):
+    class FakeDatetime(analytics.datetime):
+        @classmethod
+        def today(cls):
+            return cls(2030, 1, 2)
+
+    calls = []
+    monkeypatch.setattr(analytics, "datetime", FakeDatetime)
+    monkeypatch.setattr(
+        analytics, "get_ohlc_yield_panel", lambda *a, **kw: calls.append(kw)
+    )
+    assert analytics.update_analytics(["brazil"], backend=None) is None
+    assert calls[0]["to_date"] == "02/01/2030"
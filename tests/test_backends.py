@@ -0,0 +1,105 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from yieldcurves import backends
+from yieldcurves.backends import LazyCacheBackend, ParquetBackend
+
+
+def make_history(ticker: str, start: str, end: str) -> pd.DataFrame:
+    index = pd.bdate_range(start, end, name="Date")
+    df = pd.DataFrame(
+        np.random.rand(len(index), 4),
+        index=index,
+        columns=["Open", "High", "Low", "Close"],
+    )
+    df.columns = pd.MultiIndex.from_product(((ticker,), df.columns))
+    return df
+
+
+@pytest.fixture
+def backend(tmp_path):
+    return ParquetBackend(str(tmp_path))
+
+
+def test_parquet_backend_roundtrip(backend):
+    data = make_history("Brazil 10Y", "2020-01-01", "2020-12-31")
+    expected = data["Brazil 10Y"].rename(str.lower, axis=1)
+
+    frame = data.copy()
+    assert backend.write(frame) == {"brazil_10y": len(expected)}
+    pd.testing.assert_frame_equal(frame, data)  # Caller's frame left as is
+    assert backend.find("missing_1y") is None
+
+    df = backend.find("brazil_10y")
+    pd.testing.assert_frame_equal(
+        df[expected.columns], expected, check_names=False, check_freq=False
+    )
+
+    df = backend.find("brazil_10y", "2020-03-01", "2020-03-31")
+    assert df.index[0] == pd.Timestamp("2020-03-02")
+    assert df.index[-1] == pd.Timestamp("2020-03-31")
+
+
+def test_parquet_backend_write_is_idempotent(backend):
+    data = make_history("Brazil 10Y", "2020-01-01", "2020-06-30")
+    backend.write(data.loc[:"2020-03-31"].copy())
+
+    assert backend.write(data.copy()) == {"brazil_10y": 65}
+    assert backend.write(data.copy()) == {"brazil_10y": 0}
+    assert len(backend.find("brazil_10y")) == len(data)
+    assert backend.find_many(["brazil_10y", "brazil_1y"]).keys() == {"brazil_10y"}
+
+
+def test_parquet_backend_find_tail(backend):
+    data = make_history("Brazil 10Y", "2018-01-01", "2020-12-31")
+    expected = data["Brazil 10Y"].rename(str.lower, axis=1).tail(300)
+    backend.write(data.copy())
+    backend.write_coverage("brazil_10y", "2018-01-01", "2020-12-31")
+
+    tails, coverage = backend.find_tail(["brazil_10y", "missing_1y"], 300)
+    assert list(tails) == list(coverage) == ["brazil_10y"]
+    pd.testing.assert_frame_equal(
+        tails["brazil_10y"][expected.columns],
+        expected,
+        check_names=False,
+        check_freq=False,
+    )
+
+
+def test_lazy_cache_backend_is_created_on_first_use(monkeypatch, tmp_path):
+    created = []
+
+    def get_cache_backend(name):
+        created.append(name)
+        return ParquetBackend(str(tmp_path)) if name == "parquet" else None
+
+    monkeypatch.setattr(backends, "get_cache_backend", get_cache_backend)
+
+    lazy = LazyCacheBackend("parquet")
+    assert created == []
+    assert lazy and lazy.find_coverage(["brazil_5y"]) == {}
+    assert lazy.get_path("brazil_5y").startswith(str(tmp_path))
+    assert created == ["parquet"]
+
+    assert not LazyCacheBackend("none")
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="requires `os.fork`")
+def test_lazy_cache_backend_is_recreated_after_fork(tmp_path):
+    lazy = LazyCacheBackend("parquet")
+    lazy._backend = parent = ParquetBackend(str(tmp_path))
+
+    read, write = os.pipe()
+    pid = os.fork()
+    if pid == 0:  # Child
+        os.write(write, b"1" if lazy._backend is parent else b"0")
+        os._exit(0)
+
+    os.waitpid(pid, 0)
+    assert os.read(read, 1) == b"0"
+    assert lazy.resolve() is parent
@@ -0,0 +1,76 @@
+from datetime import datetime
+
+import pandas as pd
+
+from yieldcurves.coverage import *
+
+
+# Globals
+# ----
+ts = pd.Timestamp
+
+
+def test_merge_intervals():
+    intervals = [("2020-01-10", "2020-01-20"), ("2020-01-01", "2020-01-05")]
+    intervals += [("2020-01-06", "2020-01-07"), ("2020-01-15", "2020-01-25")]
+    assert merge_intervals(intervals) == [
+        (ts("2020-01-01"), ts("2020-01-07")),
+        (ts("2020-01-10"), ts("2020-01-25")),
+    ]
+
+
+def test_subtract_intervals():
+    covered = [
+        (ts("2020-01-05"), ts("2020-01-10")),
+        (ts("2020-01-20"), ts("2020-01-25")),
+    ]
+    assert subtract_intervals(ts("2020-01-01"), ts("2020-01-31"), covered) == [
+        (ts("2020-01-01"), ts("2020-01-04")),
+        (ts("2020-01-11"), ts("2020-01-19")),
+        (ts("2020-01-26"), ts("2020-01-31")),
+    ]
+    assert subtract_intervals(ts("2020-01-06"), ts("2020-01-09"), covered) == []
+    assert subtract_intervals(ts("2020-01-06"), ts("2020-01-22"), covered) == [
+        (ts("2020-01-11"), ts("2020-01-19")),
+    ]
+
+
+def test_add_interval_ignores_future_dates():
+    now = datetime(2020, 1, 15, 12)
+    record = add_interval(None, ts("2020-01-01"), ts("2020-01-31"), now=now)
+    assert record["intervals"] == [[datetime(2020, 1, 1), datetime(2020, 1, 15)]]
+    assert record["checked_at"] == now
+
+
+def test_get_covered_intervals_expires_recent_dates():
+    now = datetime(2020, 1, 15, 12)
+    record = add_interval(None, ts("2020-01-01"), ts("2020-01-15"), now=now)
+
+    fresh = get_covered_intervals(record, now=datetime(2020, 1, 15, 12, 30), ttl=3600)
+    assert fresh == [(ts("2020-01-01"), ts("2020-01-15"))]
+
+    stale = get_covered_intervals(record, now=datetime(2020, 1, 16, 9), ttl=3600)
+    assert stale == [(ts("2020-01-01"), ts("2020-01-14"))]
+
+
+def test_get_last_modified():
+    first = add_interval(
+        None, ts("2020-01-01"), ts("2020-01-15"), now=datetime(2020, 2, 1)
+    )
+    second = add_interval(
+        None, ts("2020-01-01"), ts("2020-01-10"), now=datetime(2020, 2, 3)
+    )
+    second = add_interval(
+        second, ts("2019-12-20"), ts("2019-12-31"), now=datetime(2020, 2, 5)
+    )
+
+    assert second["checked_at"] == datetime(2020, 2, 3)
+    assert get_last_modified([first, second]) == datetime(2020, 2, 5)
+
+    # Re-checks finding no new data
+    second = add_interval(
+        second, ts("2020-01-01"), ts("2020-01-10"), datetime(2020, 2, 7), False
+    )
+    assert second["checked_at"] == datetime(2020, 2, 7)
+    assert get_last_modified([first, second]) == datetime(2020, 2, 5)
+    assert get_last_modified([]) is None
@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from yieldcurves.cube import YieldCube
+
+
+# Globals
+# ----
+tickers = ["brazil_10y", "brazil_3m", "brazil_1y"]
+fields = ["open", "high", "low", "close"]
+
+
+@pytest.fixture
+def frame():
+    index = pd.bdate_range("2020-01-01", periods=50, name="dates")
+    columns = pd.MultiIndex.from_product((tickers, fields))
+    return pd.DataFrame(
+        np.random.rand(len(index), len(columns)), index=index, columns=columns
+    )
+
+
+def test_yield_cube_roundtrip(frame):
+    cube = YieldCube.from_frame(frame)
+
+    assert cube.values.shape == (50, 3, 4)
+    assert cube.tickers == ["brazil_3m", "brazil_1y", "brazil_10y"]
+    assert cube.tenors.tolist() == [3, 12, 120]
+
+    df = cube.to_frame()
+    pd.testing.assert_frame_equal(
+        df, frame[df.columns], check_names=False, check_freq=False
+    )
+
+
+def test_yield_cube_slices_are_views(frame):
+    cube = YieldCube.from_frame(frame, dtype=np.float32)
+
+    sub = cube.between("2020-01-10", "2020-01-20")
+    assert sub.index[0] == pd.Timestamp("2020-01-10")
+    assert sub.index[-1] == pd.Timestamp("2020-01-20")
+    assert np.shares_memory(sub.values, cube.values)
+
+    close = cube.field("close")
+    assert np.shares_memory(close, cube.values)
+    np.testing.assert_allclose(close[:, 2], frame["brazil_10y", "close"], rtol=1e-6)
+
+    assert np.shares_memory(cube.tenor("1Y"), cube.values)
+    assert cube.tenor_pos(12) == cube.tenor_pos("1y") == 1
+    np.testing.assert_allclose(
+        cube.at("2020-01-02")[0], frame.loc["2020-01-02", "brazil_3m"], rtol=1e-6
+    )
+
+    with pytest.raises(KeyError):
+        cube.at("2020-01-04")  # Weekend
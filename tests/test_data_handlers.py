@@ -0,0 +1,242 @@
+import time
+
+import pandas as pd
+import pytest
+
+from yieldcurves import data_handlers
+from yieldcurves.backends import CacheBackend
+
+# Globals
+# ----
+tickers = ["Brazil 3M", "Brazil 1Y", "Brazil 5Y", "Brazil 10Y"]
+delays = {"Brazil 3M": 0.3, "Brazil 1Y": 0.1, "Brazil 5Y": 0.2, "Brazil 10Y": 0.05}
+
+
+def fake_get_bond_historical_data(ticker, from_date, to_date):
+    """Slow stand-in for `investpy.get_bond_historical_data`"""
+    time.sleep(delays[ticker])
+    index = pd.date_range("2020-01-01", periods=5, freq="B", name="Date")
+    return pd.DataFrame(
+        {field: range(5) for field in ("Open", "High", "Low", "Close")},
+        index=index,
+        dtype=float,
+    )
+
+
+@pytest.fixture(autouse=True)
+def lock_dir(monkeypatch, tmp_path):
+    monkeypatch.setattr(data_handlers.settings, "LOCK_DIR", str(tmp_path))
+
+
+@pytest.fixture
+def slow_provider(monkeypatch):
+    monkeypatch.setattr(
+        data_handlers.DATA_PROVIDER, "search_country", lambda query: tickers
+    )
+    monkeypatch.setattr(
+        data_handlers.DATA_PROVIDER,
+        "get_bond_historical_data",
+        fake_get_bond_historical_data,
+    )
+
+
+def test_get_ohlc_yield_history_fetches_concurrently(slow_provider):
+    t0 = time.perf_counter()
+    df = data_handlers.get_ohlc_yield_history(
+        "brazil",
+        from_date="01/01/2020",
+        to_date="08/01/2020",
+        backend=None,
+        max_workers=len(tickers),
+    )
+    elapsed = time.perf_counter() - t0
+
+    assert elapsed < max(delays.values()) + 0.1 < sum(delays.values())
+    assert df.shape == (5, 4 * len(tickers))
+
+
+def test_get_ohlc_yield_history_keeps_ticker_order(slow_provider):
+    df = data_handlers.get_ohlc_yield_history(
+        "brazil",
+        from_date="01/01/2020",
+        to_date="08/01/2020",
+        backend=None,
+    )
+    expected = ["brazil_3m", "brazil_1y", "brazil_5y", "brazil_10y"]
+    assert df.columns.get_level_values(0).unique().tolist() == expected
+
+
+def test_get_ohlc_yield_history_max_points(slow_provider):
+    df = data_handlers.get_ohlc_yield_history(
+        "brazil",
+        from_date="01/01/2020",
+        to_date="08/01/2020",
+        backend=None,
+        max_points=1,
+    )
+    assert df.index.tolist() == [pd.Timestamp("2020-01-31")]
+    assert df["brazil_5y"].iloc[0].tolist() == [0.0, 4.0, 0.0, 4.0]
+
+
+class FakeBackend(CacheBackend):
+    """In-memory `CacheBackend`"""
+
+    def __init__(self, data=None, coverage=None):
+        self.data = data or {}
+        self.coverage = coverage or {}
+        self.calls = []
+
+    def find_many(self, tickers, from_date=None, to_date=None):
+        self.calls.append(("find_many", tuple(tickers)))
+        return {
+            k: v.loc[from_date:to_date] for k, v in self.data.items() if k in tickers
+        }
+
+    def write(self, data):
+        bonds = data.columns.get_level_values(0)
+        self.calls.append(("write", tuple(bonds)))
+        return {data_handlers._to_db_ticker(b): len(data) for b in bonds.unique()}
+
+    def find_coverage(self, tickers):
+        return {k: v for k, v in self.coverage.items() if k in tickers}
+
+    def _save_coverage(self, ticker, record):
+        self.coverage[ticker] = record
+
+
+def test_get_ohlc_yield_history_reads_cache_in_one_call(slow_provider, monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError("Upstream should not be hit on a warm cache")
+
+    monkeypatch.setattr(data_handlers.DATA_PROVIDER, "get_bond_historical_data", fail)
+
+    index = pd.date_range("2019-12-01", "2020-01-31", name="dates")
+    cached = pd.DataFrame({"open": 1.0, "high": 2.0, "low": 0.5, "close": 1.5}, index)
+    backend = FakeBackend({data_handlers._to_db_ticker(t): cached for t in tickers})
+
+    df = data_handlers.get_ohlc_yield_history(
+        "brazil",
+        from_date="01/01/2020",
+        to_date="08/01/2020",
+        backend=backend,
+    )
+
+    assert backend.calls == [
+        ("find_many", ("brazil_3m", "brazil_1y", "brazil_5y", "brazil_10y"))
+    ]
+    assert df.index[0] == pd.Timestamp("2020-01-01")
+    assert df.index[-1] == pd.Timestamp("2020-01-08")
+
+
+def test_get_ohlc_yield_history_remembers_empty_ranges(monkeypatch):
+    requests = []
+
+    def no_data(ticker, from_date, to_date):
+        requests.append((ticker, from_date, to_date))
+        raise IndexError("ERR#0069: no data found")
+
+    monkeypatch.setattr(
+        data_handlers.DATA_PROVIDER, "search_country", lambda query: tickers[:1]
+    )
+    monkeypatch.setattr(
+        data_handlers.DATA_PROVIDER, "get_bond_historical_data", no_data
+    )
+
+    backend = FakeBackend()
+    for _ in range(2):
+        df = data_handlers.get_ohlc_yield_history(
+            "brazil", from_date="01/01/2020", to_date="08/01/2020", backend=backend
+        )
+        assert df is None
+
+    assert requests == [("Brazil 3M", "01/01/2020", "08/01/2020")]
+
+
+def test_get_ohlc_yield_history_fills_interior_gaps_only(slow_provider, monkeypatch):
+    requests = []
+
+    def record(ticker, from_date, to_date):
+        requests.append((from_date, to_date))
+        return fake_get_bond_historical_data(ticker, from_date, to_date)
+
+    monkeypatch.setattr(
+        data_handlers.DATA_PROVIDER, "search_country", lambda query: tickers[:1]
+    )
+    monkeypatch.setattr(data_handlers.DATA_PROVIDER, "get_bond_historical_data", record)
+
+    backend = FakeBackend()
+    for from_date, to_date in [
+        ("2020-01-01", "2020-01-10"),
+        ("2020-01-21", "2020-01-31"),
+    ]:
+        backend.write_coverage("brazil_3m", from_date, to_date)
+
+    data_handlers.get_ohlc_yield_history(
+        "brazil", from_date="01/01/2020", to_date="31/01/2020", backend=backend
+    )
+    assert requests == [("11/01/2020", "20/01/2020")]
+
+
+def test_get_recent_yield_only_fetches_after_cached_tail(monkeypatch):
+    requests = []
+
+    def record(ticker, from_date, to_date):
+        requests.append((ticker, from_date, to_date))
+        index = pd.date_range(end=pd.Timestamp.today().normalize(), periods=2)
+        return pd.DataFrame({"Close": 3.0}, index.rename("Date"))
+
+    monkeypatch.setattr(
+        data_handlers.DATA_PROVIDER, "search_country", lambda query: tickers[:2]
+    )
+    monkeypatch.setattr(data_handlers.DATA_PROVIDER, "get_bond_historical_data", record)
+
+    last_cached = pd.Timestamp.today().normalize() - pd.Timedelta("3D")
+    index = pd.date_range(end=last_cached, periods=100, name="dates")
+    cached = pd.DataFrame({"open": 1.0, "high": 2.0, "low": 0.5, "close": 1.5}, index)
+    backend = FakeBackend({"brazil_3m": cached, "brazil_1y": cached})
+    for ticker in backend.data:
+        backend.write_coverage(ticker, index[0], last_cached)
+
+    df = data_handlers.get_recent_yield("brazil", n_rows=10, backend=backend)
+
+    gap_start = (last_cached + pd.Timedelta("1D")).strftime("%d/%m/%Y")
+    assert sorted(requests) == [
+        ("Brazil 1Y", gap_start, pd.Timestamp.today().strftime("%d/%m/%Y")),
+        ("Brazil 3M", gap_start, pd.Timestamp.today().strftime("%d/%m/%Y")),
+    ]
+    assert df.columns.tolist() == tickers[:2]
+    assert len(df) == 10
+    assert (df.iloc[-2:] == 3.0).all().all()
+
+
+def test_get_ohlc_yield_panel_aligns_countries(monkeypatch):
+    countries = {"brazil": ["Brazil 1Y", "Brazil 5Y"], "japan": ["Japan 10Y"]}
+
+    def get_history(ticker, from_date, to_date):
+        start = "2020-01-01" if ticker.startswith("Brazil") else "2020-01-03"
+        index = pd.date_range(start, periods=3, name="Date")
+        return pd.DataFrame({"Open": 1.0, "Close": 2.0}, index)
+
+    monkeypatch.setattr(
+        data_handlers.DATA_PROVIDER, "search_country", lambda q: countries[q]
+    )
+    monkeypatch.setattr(
+        data_handlers.DATA_PROVIDER, "get_bond_historical_data", get_history
+    )
+
+    df = data_handlers.get_ohlc_yield_panel(
+        ["brazil", "missing", "japan"],
+        from_date="01/01/2020",
+        to_date="08/01/2020",
+        fields="Close",
+        backend=None,
+    )
+
+    assert df.columns.names == ["country", "tenor", "field"]
+    assert df.columns.tolist() == [
+        ("brazil", "1Y", "close"),
+        ("brazil", "5Y", "close"),
+        ("japan", "10Y", "close"),
+    ]
+    assert df.index.tolist() == list(pd.date_range("2020-01-01", "2020-01-05"))
+    assert df["japan"].isna().sum().sum() == 2
@@ -0,0 +1,421 @@
+import os
+from functools import partialmethod
+from typing import Callable, List, Optional
+
+import numpy as np
+import pandas as pd
+import pymongo
+import pytest
+
+from yieldcurves import data_handlers, dbm, rollups
+from yieldcurves.dbm import BucketManager, Manager
+
+
+# Globals
+# ----
+MONGO_HOST = os.environ.get("YIELDCURVES_TEST_MONGO_HOST", "localhost")
+MONGO_DB = "yieldcurvesTest"
+
+
+def _bulk_write(self, requests, ordered=True, **kwargs):
+    """Plain loop over `requests`, as `mongomock`'s own bulk write doesn't support
+    current `pymongo` operations"""
+    for request in requests:
+        if isinstance(request, pymongo.ReplaceOne):
+            self.replace_one(request._filter, request._doc, upsert=request._upsert)
+        else:
+            self.update_one(request._filter, request._doc, upsert=request._upsert)
+
+
+def _evaluate(expr, doc: dict, variables: Optional[dict] = None):
+    """Evaluate the aggregation operators used by `Manager._find_arrays`"""
+    variables = variables or {}
+    if isinstance(expr, str) and expr.startswith("$$"):
+        return variables[expr[2:]]
+    if isinstance(expr, str) and expr.startswith("$"):
+        return doc.get(expr[1:])
+    if isinstance(expr, list):
+        return [_evaluate(e, doc, variables) for e in expr]
+    if not isinstance(expr, dict):
+        return expr
+
+    (op, args), = expr.items()
+    if op == "$filter":
+        rows = _evaluate(args["input"], doc, variables)
+        return [
+            row
+            for row in rows
+            if _evaluate(args["cond"], doc, {**variables, args["as"]: row})
+        ]
+    if op == "$zip":
+        inputs = _evaluate(args["inputs"], doc, variables)
+        if any(array is None for array in inputs):
+            return None
+        lengths = [len(array) for array in inputs]
+        n = max(lengths) if args.get("useLongestLength") else min(lengths)
+        return [[a[i] if i < len(a) else None for a in inputs] for i in range(n)]
+
+    args = _evaluate(args, doc, variables)
+    if op == "$ifNull":
+        return args[1] if args[0] is None else args[0]
+    if op == "$arrayElemAt":
+        return args[0][args[1]]
+    if op == "$and":
+        return all(args)
+    if op == "$ne":
+        return args[0] != args[1]
+    if op in ("$gte", "$lte"):
+        if args[0] is None:  # Null sorts before dates
+            return op == "$lte"
+        return args[0] >= args[1] if op == "$gte" else args[0] <= args[1]
+    raise NotImplementedError(op)
+
+
+def _aggregate(self, aggregate: Callable, pipeline: List[dict], *args, **kwargs):
+    """`mongomock` aggregation, evaluating `$project` stages with `$zip` (which it
+    doesn't implement) client-side"""
+    if len(pipeline) == 2 and "$zip" in str(pipeline[1]):
+        projection = pipeline[1]["$project"]
+        return [
+            {
+                field: obj.get(field) if value == 1 else _evaluate(value, obj)
+                for field, value in projection.items()
+                if value != 0
+            }
+            for obj in self.find(pipeline[0]["$match"])
+        ]
+    return aggregate(self, pipeline, *args, **kwargs)
+
+
+@pytest.fixture(scope="session")
+def mongod():
+    try:
+        client = pymongo.MongoClient(MONGO_HOST, serverSelectionTimeoutMS=300)
+        client.admin.command("ping")
+        return MONGO_HOST
+    except pymongo.errors.PyMongoError:
+        return None
+
+
+@pytest.fixture
+def make_manager(mongod, monkeypatch):
+    """Managers against a local `mongod` if reachable, else `mongomock`"""
+    if mongod is None:
+        mongomock = pytest.importorskip("mongomock")
+        monkeypatch.setattr(dbm.pymongo, "MongoClient", mongomock.MongoClient)
+        monkeypatch.setattr(mongomock.Collection, "bulk_write", _bulk_write)
+        monkeypatch.setattr(
+            mongomock.Collection,
+            "aggregate",
+            partialmethod(_aggregate, mongomock.Collection.aggregate),
+        )
+
+    managers = []
+
+    def make(cls=Manager):
+        manager = cls(mongod or "localhost", db=MONGO_DB, collection=cls.__name__)
+        if not managers:
+            manager.client.drop_database(MONGO_DB)
+        manager.setup()
+        managers.append(manager)
+        return manager
+
+    yield make
+    for manager in managers:
+        manager.client.drop_database(MONGO_DB)
+
+
+def make_history(ticker: str, index: pd.DatetimeIndex) -> pd.DataFrame:
+    values = np.arange(len(index), dtype=float)
+    df = pd.DataFrame(
+        {"Open": values, "High": values + 1, "Low": values - 1, "Close": values},
+        index=index,
+    )
+    df.columns = pd.MultiIndex.from_product(((ticker,), df.columns))
+    return df
+
+
+def test_manager_write_fills_gaps(make_manager):
+    manager = make_manager()
+    data = make_history("Brazil 10Y", pd.bdate_range("2020-01-01", periods=10))
+
+    # Stored with a 4-day hole, then filled
+    assert manager.write(data.iloc[[0, 1, 2, 7, 8, 9]].copy()) == {"brazil_10y": 6}
+    assert manager.write(data.iloc[3:7].copy()) == {"brazil_10y": 4}
+
+    # Last value revised
+    revised = data.iloc[[-1]].copy()
+    revised.iloc[0, -1] = 99.0
+    assert manager.write(revised.copy()) == {"brazil_10y": 1}
+
+    df = manager.find("brazil_10y")
+    expected = data["Brazil 10Y"].rename(str.lower, axis=1)
+    expected.iloc[-1, -1] = 99.0
+    assert df.index.equals(expected.index)
+    np.testing.assert_array_equal(df[expected.columns], expected)
+
+
+def test_manager_write_is_idempotent(make_manager, monkeypatch):
+    manager = make_manager()
+    index = pd.bdate_range("2020-01-01", periods=20)
+    data = pd.concat(
+        [make_history("Brazil 10Y", index), make_history("Brazil 2Y", index[5:])],
+        axis=1,
+    )
+
+    # All tickers in a single bulk write
+    calls = []
+    bulk_write = manager.collection.bulk_write
+
+    def spy(requests, **kwargs):
+        calls.append(len(requests))
+        return bulk_write(requests, **kwargs)
+
+    monkeypatch.setattr(manager.collection, "bulk_write", spy)
+    counts = manager.write(data.iloc[5:15].copy())
+    assert counts == {"brazil_10y": 10, "brazil_2y": 10}
+    assert calls == [2]
+
+    # Rewrites only count new rows, and skip unchanged tickers
+    assert manager.write(data.iloc[15:].copy()) == {"brazil_10y": 5, "brazil_2y": 5}
+    assert manager.write(data.copy()) == {"brazil_10y": 5, "brazil_2y": 0}
+    assert manager.write(data.copy()) == {"brazil_10y": 0, "brazil_2y": 0}
+    assert calls == [2, 2, 1]
+
+    for ticker, df in data.groupby(level=0, axis=1):
+        expected = df[ticker].dropna().rename(str.lower, axis=1)
+        found = manager.find(ticker.replace(" ", "_").lower())
+        assert found.index.equals(expected.index)
+        np.testing.assert_array_equal(found[expected.columns], expected)
+
+
+@pytest.mark.parametrize("cls", [Manager, BucketManager])
+def test_write_updates_rollup_buckets(make_manager, monkeypatch, cls):
+    manager = make_manager(cls)
+    data = make_history("Brazil 10Y", pd.bdate_range("2019-06-01", "2021-03-31"))
+    daily = data["Brazil 10Y"].rename(str.lower, axis=1)
+
+    # Appended in chunks, then a past value revised
+    for chunk in np.array_split(data, 3):
+        manager.write(chunk.copy())
+    revised = data.loc[["2020-03-18"]].copy()
+    revised.iloc[0, 1] = 999.0
+    daily.loc["2020-03-18", "high"] = 999.0
+
+    written = []
+    bulk_write = manager.rollups.bulk_write
+
+    def spy(requests, **kwargs):
+        written.extend(r._filter["start"].year for r in requests)
+        return bulk_write(requests, **kwargs)
+
+    monkeypatch.setattr(manager.rollups, "bulk_write", spy)
+    manager.write(revised.copy())
+    assert written == [2020, 2020]  # Weekly and monthly, only that year's bucket
+
+    for resolution in dbm.ROLLUPS:
+        found = manager.find_rollups(["brazil_10y"], resolution, "2019-12-15")
+        expected = rollups.resample_ohlc(daily, resolution).loc["2019-12-15":]
+        pd.testing.assert_frame_equal(
+            found["brazil_10y"], expected, check_freq=False, check_names=False
+        )
+
+
+def test_bucket_manager_splits_and_rewrites_buckets(make_manager):
+    manager = make_manager(BucketManager)
+    data = make_history("Brazil 10Y", pd.bdate_range("2019-12-25", "2020-01-08"))
+
+    # Split at the year boundary, leaving the caller's frame as is
+    frame = data.copy()
+    assert manager.write(frame) == {"brazil_10y": len(data)}
+    pd.testing.assert_frame_equal(frame, data)
+    buckets = {obj["start"]: len(obj["dates"]) for obj in manager.collection.find({})}
+    assert buckets == {pd.Timestamp("2019-01-01"): 5, pd.Timestamp("2020-01-01"): 6}
+
+    # Interior rewrite, only counting changed rows
+    revised = data.copy()
+    revised.iloc[[2, 7], 3] = -1.0
+    assert manager.write(revised.copy()) == {"brazil_10y": 2}
+    assert manager.write(revised.copy()) == {"brazil_10y": 0}
+
+    df = manager.find("brazil_10y", "2019-12-27", "2020-01-02")
+    assert df.index.equals(data.index[2:7])
+    assert df.loc["2019-12-27", "close"] == -1.0
+    assert manager.collection.count_documents({}) == 2
+
+
+def test_migrate_to_buckets(make_manager):
+    source = make_manager(Manager)
+    target = make_manager(BucketManager)
+    index = pd.bdate_range("2018-06-01", "2020-06-30")
+    data = pd.concat(
+        [make_history("Brazil 10Y", index), make_history("Brazil 2Y", index[100:])],
+        axis=1,
+    )
+    source.write(data.copy())
+    source.write_coverage("brazil_10y", index[0], index[-1])
+    source.write_coverage("brazil_2y", index[100], index[-1])
+
+    assert dbm.migrate_to_buckets(source, target) == 2
+    assert target.collection.count_documents({"bond": "brazil_10y"}) == 3
+    tickers = ["brazil_10y", "brazil_2y"]
+    assert target.find_coverage(tickers) == source.find_coverage(tickers)
+    for ticker in ("brazil_10y", "brazil_2y"):
+        expected = source.find(ticker)
+        found = target.find(ticker)
+        assert len(found) == len(expected)
+        np.testing.assert_array_equal(found[expected.columns], expected)
+
+
+@pytest.mark.parametrize("cls", [Manager, BucketManager])
+def test_find_many_matches_find(make_manager, cls):
+    manager = make_manager(cls)
+    index = pd.bdate_range("2019-06-01", "2020-06-30")
+    data = pd.concat(
+        [make_history("Brazil 10Y", index), make_history("Brazil 2Y", index[100:])],
+        axis=1,
+    )
+    manager.write(data.copy())
+
+    window = ("2019-12-01", "2020-01-31")
+    found = manager.find_many(["brazil_10y", "brazil_2y", "missing_1y"], *window)
+
+    assert sorted(found) == ["brazil_10y", "brazil_2y"]
+    for ticker, df in found.items():
+        expected = manager.find(ticker).loc[window[0] : window[1]]
+        pd.testing.assert_frame_equal(df, expected[df.columns], check_names=False)
+
+
+@pytest.mark.parametrize("cls", [Manager, BucketManager])
+def test_find_tail(make_manager, cls):
+    manager = make_manager(cls)
+    index = pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=30)
+    data = pd.concat(
+        [make_history("Brazil 10Y", index), make_history("Brazil 2Y", index[-5:])],
+        axis=1,
+    )
+    manager.write(data.copy())
+    manager.write_coverage("brazil_10y", index[0], index[-1])
+
+    try:
+        tails, coverage = manager.find_tail(["brazil_10y", "brazil_2y", "x_1y"], 10)
+    except NotImplementedError as e:  # Unsupported by the test double
+        pytest.skip(str(e))
+
+    assert sorted(tails) == ["brazil_10y", "brazil_2y"]
+    assert tails["brazil_10y"].index.equals(index[-10:])
+    assert tails["brazil_2y"].index.equals(index[-5:])  # Fewer rows than requested
+    np.testing.assert_array_equal(tails["brazil_2y"]["close"], np.arange(5.0))
+
+    # Tickers without a coverage record are left out
+    assert list(coverage) == ["brazil_10y"]
+    assert coverage["brazil_10y"]["intervals"][0][0] == index[0]
+
+
+def test_setup_sorts_legacy_arrays_for_find_tail(make_manager):
+    manager = make_manager()
+    index = pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=30)
+    df = make_history("Brazil 10Y", index)["Brazil 10Y"].rename(str.lower, axis=1)
+
+    # Older rows pushed at the end of the arrays, as by the original `write`
+    legacy = pd.concat([df.iloc[10:], df.iloc[:10]])
+    manager.collection.insert_one(
+        {
+            "country": "brazil",
+            "bond": "brazil_10y",
+            "dates": legacy.index.tolist(),
+            **{field: legacy[field].tolist() for field in legacy},
+        }
+    )
+
+    manager.setup()
+    assert manager.sort_arrays() == 0  # Already sorted by `setup`
+
+    tails, _ = manager.find_tail(["brazil_10y"], 5)
+    assert tails["brazil_10y"].index.equals(index[-5:])
+    np.testing.assert_array_equal(tails["brazil_10y"]["close"], df["close"][-5:])
+
+
+def test_find_many_pads_missing_and_short_arrays(make_manager):
+    manager = make_manager()
+    index = pd.bdate_range("2020-01-01", periods=10)
+    df = make_history("Brazil 10Y", index)["Brazil 10Y"].rename(str.lower, axis=1)
+
+    # No `open` array, and a `close` array shorter than `dates`
+    manager.collection.insert_one(
+        {
+            "country": "brazil",
+            "bond": "brazil_10y",
+            "dates": index.tolist(),
+            "high": df["high"].tolist(),
+            "low": df["low"].tolist(),
+            "close": df["close"].tolist()[:7],
+        }
+    )
+
+    for window in ((None, None), ("2020-01-06", "2020-01-14")):
+        found = manager.find_many(["brazil_10y"], *window)["brazil_10y"]
+        expected = df.loc[window[0] : window[1]]
+        assert found.index.equals(expected.index)
+        assert found["open"].isna().all()
+        np.testing.assert_array_equal(found["high"], expected["high"])
+        assert found["close"].isna().sum() == (expected.index > index[6]).sum()
+
+
+@pytest.mark.parametrize("cls", [Manager, BucketManager])
+def test_get_recent_yield_skips_tickers_covered_without_data(
+    make_manager, monkeypatch, tmp_path, cls
+):
+    manager = make_manager(cls)
+    today = pd.Timestamp.today().normalize()
+    index = pd.bdate_range(end=today, periods=30)
+    manager.write(make_history("Brazil 10Y", index))
+    manager.write_coverage("brazil_10y", index[0], today)
+    # Empty range upstream, i.e. a coverage record without any bond document
+    manager.write_coverage("brazil_1y", today - pd.Timedelta(days=60), today, False)
+
+    calls = []
+
+    def get_history(ticker, from_date, to_date):
+        calls.append(ticker)
+        raise IndexError("ERR#0069: no data found")
+
+    provider = data_handlers.DATA_PROVIDER
+    monkeypatch.setattr(
+        provider, "search_country", lambda q: ["Brazil 10Y", "Brazil 1Y"]
+    )
+    monkeypatch.setattr(provider, "get_bond_historical_data", get_history)
+    monkeypatch.setattr(data_handlers.settings, "LOCK_DIR", str(tmp_path))
+
+    df = data_handlers.get_recent_yield("brazil", n_rows=10, backend=manager)
+    assert calls == []
+    assert df.columns.tolist() == ["Brazil 10Y"]
+
+
+def test_sort_arrays_drops_duplicate_dates(make_manager):
+    manager = make_manager()
+    index = pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=10)
+    df = make_history("Brazil 10Y", index)["Brazil 10Y"].rename(str.lower, axis=1)
+
+    # Last date appended twice (sorted), revised the second time
+    legacy = pd.concat([df, df.iloc[[-1]] + 1])
+    manager.collection.insert_one(
+        {
+            "country": "brazil",
+            "bond": "brazil_10y",
+            "dates": legacy.index.tolist(),
+            **{field: legacy[field].tolist() for field in legacy},
+        }
+    )
+
+    assert manager.sort_arrays() == 1
+    assert manager.sort_arrays() == 0
+
+    tails, _ = manager.find_tail(["brazil_10y"], 2)
+    assert tails["brazil_10y"].index.equals(index[-2:])
+    assert tails["brazil_10y"]["close"].tolist() == [8.0, 10.0]
+
+    # Callers' queries are left as is
+    query = {"bond": "brazil_10y"}
+    Manager._find_arrays(manager.collection, query, "2020-01-06")
+    assert query == {"bond": "brazil_10y"}
@@ -0,0 +1,91 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from yieldcurves import export
+from yieldcurves.backends import ParquetBackend
+from yieldcurves.export import export_cache, load_export
+
+# Globals
+# ----
+bonds = ["brazil_1y", "brazil_10y", "united_states_5y"]
+n_rows = len(pd.bdate_range("2019-06-01", "2020-06-30"))
+
+
+def write(backend, bond, start, end):
+    index = pd.bdate_range(start, end, name="Date")
+    df = pd.DataFrame(
+        np.random.rand(len(index), 4),
+        index=index,
+        columns=["Open", "High", "Low", "Close"],
+    )
+    backend.write(pd.concat({bond.replace("_", " "): df}, axis=1))
+    backend.write_coverage(bond, start, end)
+
+
+@pytest.fixture
+def backend(tmp_path):
+    backend = ParquetBackend(str(tmp_path / "cache"))
+    for bond in bonds:
+        write(backend, bond, "2019-06-01", "2020-06-30")
+    return backend
+
+
+def test_export_roundtrip(backend, tmp_path):
+    root = str(tmp_path / "export")
+    counts = export_cache(root, backend)
+
+    assert sorted(counts) == sorted(bonds)
+    assert os.path.exists(os.path.join(root, "country=brazil", "year=2019"))
+
+    df = load_export(root, countries=["brazil"], from_date="2020-01-01")
+    assert set(df["bond"]) == {"brazil_1y", "brazil_10y"}
+    assert df["dates"].min() == pd.Timestamp("2020-01-01")
+
+    close = df.pivot(index="dates", columns="bond", values="close")
+    expected = backend.find("brazil_10y", "2020-01-01")["close"]
+    np.testing.assert_array_equal(close["brazil_10y"], expected)
+
+
+def test_export_is_incremental(backend, tmp_path):
+    root = str(tmp_path / "export")
+    export_cache(root, backend)
+    assert export_cache(root, backend) == {}
+
+    # Re-checks finding no new data don't count as writes
+    backend.write_coverage("brazil_10y", "2020-06-01", "2020-07-31", modified=False)
+    assert export_cache(root, backend) == {}
+
+    old_partition = os.path.join(root, "country=brazil", "year=2019", "part-0.parquet")
+    mtime = os.stat(old_partition).st_mtime_ns
+
+    write(backend, "brazil_1y", "2020-07-01", "2020-07-31")
+    n_new = len(pd.bdate_range("2020-07-01", "2020-07-31"))
+    assert export_cache(root, backend) == {"brazil_1y": n_rows + n_new}
+    assert os.stat(old_partition).st_mtime_ns == mtime  # Unchanged year
+
+    df = load_export(root, countries=["brazil"])
+    assert df["dates"].max() == pd.Timestamp("2020-07-31")
+    assert len(df) == 2 * n_rows + n_new
+
+
+def test_export_resumes_after_interruption(backend, tmp_path, monkeypatch):
+    root = str(tmp_path / "export")
+    write_partitions = export._write_partitions
+
+    def interrupt(root, country, batch, data):
+        if country == "united_states":
+            raise KeyboardInterrupt
+        write_partitions(root, country, batch, data)
+
+    monkeypatch.setattr(export, "_write_partitions", interrupt)
+    with pytest.raises(KeyboardInterrupt):
+        export_cache(root, backend, batch_size=1)
+
+    monkeypatch.setattr(export, "_write_partitions", write_partitions)
+    assert export_cache(root, backend, batch_size=1) == {"united_states_5y": n_rows}
+    assert len(load_export(root)) == 3 * n_rows
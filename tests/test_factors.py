@@ -0,0 +1,92 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from yieldcurves import factors
+
+
+# Globals
+# ----
+terms = list(factors.GRID)
+window = 40
+
+
+@pytest.fixture
+def data():
+    """Random walks driven mostly by level, then slope shocks"""
+    index = pd.bdate_range("2020-01-01", periods=150)
+    rng = np.random.default_rng(0)
+    x = np.linspace(-1, 1, len(terms))
+    shocks = (
+        rng.normal(0, 0.10, (len(index), 1)) * np.ones(len(terms))
+        + rng.normal(0, 0.04, (len(index), 1)) * x
+        + rng.normal(0, 0.01, (len(index), len(terms)))
+    )
+    return pd.DataFrame(
+        3 + shocks.cumsum(axis=0),
+        index=index,
+        columns=[f"brazil_{m}m" for m in terms],
+    )
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(monkeypatch, tmp_path):
+    monkeypatch.setattr(factors.settings, "FACTORS_CACHE_DIR", str(tmp_path))
+
+
+@pytest.mark.parametrize("mode", factors.MODES)
+def test_decompose_country_matches_dense_pca(data, mode):
+    result = factors.decompose_country("brazil", data, mode, window, method="linear")
+
+    changes = data.diff().iloc[1:].to_numpy() * 100
+    if mode == "rolling":
+        changes = changes[-window:]
+    eigvals, eigvecs = np.linalg.eigh(np.cov(changes, rowvar=False))
+
+    loadings = result["loadings"]
+    assert loadings.index.tolist() == terms
+    np.testing.assert_allclose(
+        np.abs(loadings.to_numpy()), np.abs(eigvecs[:, ::-1][:, :3]), atol=1e-8
+    )
+    np.testing.assert_allclose(
+        result["explained"].iloc[-1], eigvals[::-1][:3] / eigvals.sum()
+    )
+
+    # Level loadings all up, slope loadings steepening
+    assert (loadings["level"] > 0).all()
+    assert loadings["slope"].iloc[-1] > loadings["slope"].iloc[0]
+    assert result["explained"].iloc[-1]["level"] > 0.5
+
+    # Scores of the first dates are left out, until there are enough changes
+    scores = result["scores"]
+    assert scores.index.equals(data.index[1:])
+    assert scores.iloc[: len(terms)].isna().all().all()
+    assert scores.iloc[len(terms) :].notna().all().all()
+
+
+@pytest.mark.parametrize("mode", factors.MODES)
+def test_decompose_country_only_processes_new_dates(data, mode, monkeypatch):
+    # The last date is incomplete at first
+    partial = data.iloc[:100].copy()
+    partial.iloc[-1] += 0.5
+    factors.decompose_country("brazil", partial, mode, window)
+
+    processed = []
+    update = factors._update
+
+    def record(state, changes, *args):
+        processed.append(changes.index)
+        return update(state, changes, *args)
+
+    monkeypatch.setattr(factors, "_update", record)
+    result = factors.decompose_country("brazil", data, mode, window)
+    assert processed[0].equals(data.index[99:])
+
+    expected = factors.decompose_country("brazil", data, mode, window, full=True)
+    for key in ("scores", "explained", "loadings"):
+        pd.testing.assert_frame_equal(result[key], expected[key], check_freq=False)
+
+
+def test_decompose_country_rejects_unknown_mode(data):
+    with pytest.raises(ValueError):
+        factors.decompose_country("brazil", data, mode="ewm")
@@ -0,0 +1,100 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from yieldcurves import fitting
+
+
+# Globals
+# ----
+terms = [3, 6, 12, 24, 36, 60, 84, 120, 240, 360]
+
+
+@pytest.fixture
+def params():
+    index = pd.bdate_range("2020-01-01", periods=40)
+    t = np.linspace(0, 1, len(index))
+    return pd.DataFrame(
+        {
+            "beta0": 5 + t,
+            "beta1": -2 + 0.5 * t,
+            "beta2": 1.0,
+            "beta3": -1.0,
+            "lambda1": 1.5 + t,
+            "lambda2": 9.0,
+        },
+        index=index,
+    )
+
+
+def test_fit_curves_recovers_svensson_curves(params):
+    data = fitting.evaluate_curves(params, terms)
+    fitted = fitting.fit_curves(data, "svensson", max_workers=2, chunk_size=15)
+
+    assert fitted.shape == params.shape
+    curves = fitting.evaluate_curves(fitted, terms)
+    np.testing.assert_allclose(curves, data, atol=1e-4)
+
+
+def test_fit_curves_skips_sparse_dates(params):
+    data = fitting.evaluate_curves(params, terms)
+    data.iloc[0, 3:] = np.nan
+
+    fitted = fitting.fit_curves(data, "nelson-siegel", max_workers=1)
+    assert fitted.columns.tolist() == list(fitting.MODELS["nelson-siegel"])
+    assert fitted.iloc[0].isna().all()
+    assert fitted.iloc[1:].notna().all().all()
+
+
+def test_fit_country_only_fits_new_dates(params, monkeypatch, tmp_path):
+    monkeypatch.setattr(fitting.settings, "FIT_CACHE_DIR", str(tmp_path))
+    data = fitting.evaluate_curves(params, terms)
+    data.columns = [f"brazil_{m}m" for m in terms]
+
+    fitted_dates = []
+    fit_curves = fitting.fit_curves
+
+    def record(data, *args, **kwargs):
+        fitted_dates.append(data.index)
+        return fit_curves(data, *args, **kwargs)
+
+    monkeypatch.setattr(fitting, "fit_curves", record)
+
+    first = fitting.fit_country("brazil", data.iloc[:30], max_workers=1)
+    second = fitting.fit_country("brazil", data, max_workers=1)
+
+    assert len(fitted_dates[0]) == 30
+    assert fitted_dates[1].tolist() == data.index[29:].tolist()
+    assert second.index.tolist() == data.index.tolist()
+    pd.testing.assert_frame_equal(second.iloc[:29], first.iloc[:29], check_freq=False)
+
+
+def test_fit_curves_ignores_non_finite_init(params):
+    data = fitting.evaluate_curves(params, terms)
+    init = np.full(len(fitting.MODELS["svensson"]), np.nan)
+
+    fitted = fitting.fit_curves(data.iloc[:5], "svensson", init=init, max_workers=1)
+    assert fitted.notna().all().all()
+
+
+def test_fit_country_warm_starts_from_last_fitted_date(params, monkeypatch, tmp_path):
+    monkeypatch.setattr(fitting.settings, "FIT_CACHE_DIR", str(tmp_path))
+    data = fitting.evaluate_curves(params, terms)
+    data.columns = [f"brazil_{m}m" for m in terms]
+    data.iloc[29, 3:] = np.nan  # Incomplete last date
+
+    inits = []
+    fit_curves = fitting.fit_curves
+
+    def record(data, *args, **kwargs):
+        inits.append(kwargs.get("init"))
+        return fit_curves(data, *args, **kwargs)
+
+    monkeypatch.setattr(fitting, "fit_curves", record)
+
+    first = fitting.fit_country("brazil", data.iloc[:30], max_workers=1)
+    assert first.iloc[-1].isna().all()
+
+    second = fitting.fit_country("brazil", data.iloc[:35], max_workers=1)
+    np.testing.assert_allclose(inits[1], first.iloc[-2].to_numpy())
+    assert second.iloc[30:].notna().all().all()
@@ -0,0 +1,94 @@
+import threading
+import time
+
+import pytest
+
+from yieldcurves.gateway import CircuitOpenError, Gateway, TokenBucket
+
+
+def test_token_bucket_limits_rate():
+    bucket = TokenBucket(rate=50, burst=5)
+
+    t0 = time.perf_counter()
+    for _ in range(15):
+        bucket.acquire()
+    elapsed = time.perf_counter() - t0
+
+    assert 0.15 < elapsed < 0.5  # 10 calls past the burst, at 50 per second
+
+
+def test_gateway_retries_connection_errors():
+    calls = []
+
+    def flaky(x):
+        calls.append(x)
+        if len(calls) < 3:
+            raise ConnectionError("down")
+        return x * 2
+
+    gateway = Gateway(rate=1e6, burst=100, max_retries=3, backoff_base=0.001)
+    assert gateway.call("key", flaky, 21) == 42
+    assert len(calls) == 3
+
+    with pytest.raises(IndexError):
+        gateway.call("key", lambda: [][0])
+
+    # At least one attempt per call
+    with pytest.raises(ValueError):
+        Gateway(max_retries=0)
+
+
+def test_gateway_circuit_fails_fast():
+    calls = []
+
+    def down():
+        calls.append(1)
+        raise ConnectionError("down")
+
+    gateway = Gateway(
+        rate=1e6,
+        burst=100,
+        max_retries=2,
+        backoff_base=0,
+        failure_threshold=3,
+        reset_timeout=0.1,
+    )
+    for _ in range(2):
+        with pytest.raises(ConnectionError):
+            gateway.call("key", down)
+    assert len(calls) == 3  # Opened on the 3rd failure
+
+    with pytest.raises(CircuitOpenError):
+        gateway.call("key", down)
+    assert len(calls) == 3
+
+    # Trial call after `reset_timeout`
+    time.sleep(0.1)
+    assert gateway.call("key", lambda: "ok") == "ok"
+    assert not gateway.breaker.is_open
+
+
+def test_gateway_coalesces_identical_calls():
+    calls = []
+    release = threading.Event()
+
+    def slow(x):
+        calls.append(x)
+        release.wait(1)
+        return object()
+
+    gateway = Gateway(rate=1e6, burst=100)
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(gateway.call("a", slow, 1)))
+        for _ in range(5)
+    ]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.05)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert len(results) == 5 and all(r is results[0] for r in results)
@@ -0,0 +1,93 @@
+import urllib.request
+
+import pandas as pd
+import pytest
+
+from yieldcurves import data_handlers, metrics
+from yieldcurves.backends import ParquetBackend
+
+
+@pytest.fixture
+def enabled():
+    metrics.reset()
+    metrics.enable()
+    yield
+    metrics.enable(False)
+    metrics.reset()
+
+
+def test_metrics_are_noop_when_disabled():
+    metrics.reset()
+    assert metrics.span("foo") is metrics.NOOP
+
+    with metrics.span("foo"):
+        metrics.inc("foo")
+    assert metrics.render() == "\n"
+
+
+def test_metrics_render_and_serve(enabled):
+    with metrics.collect() as timings:
+        with metrics.span("upstream"):
+            metrics.inc("cache_requests", result="hit")
+            metrics.inc("cache_requests", result="hit")
+
+    assert [stage for stage, _ in timings] == ["upstream"]
+
+    server = metrics.start_http_server(port=0)
+    try:
+        url = f"http://127.0.0.1:{server.server_port}/metrics"
+        body = urllib.request.urlopen(url).read().decode()
+    finally:
+        server.shutdown()
+
+    assert 'yieldcurves_cache_requests_total{result="hit"} 2' in body
+    assert 'yieldcurves_stage_seconds_count{stage="upstream"} 1' in body
+
+
+def test_get_ohlc_yield_history_counts_cache_hits(enabled, monkeypatch, tmp_path):
+    def get_history(ticker, from_date, to_date):
+        index = pd.date_range("2020-01-01", "2020-01-31", name="Date")
+        start, end = pd.to_datetime([from_date, to_date], dayfirst=True)
+        return pd.DataFrame({"Close": 1.0}, index).loc[start:end]
+
+    provider = data_handlers.DATA_PROVIDER
+    monkeypatch.setattr(provider, "search_country", lambda q: ["Brazil 5Y"])
+    monkeypatch.setattr(provider, "get_bond_historical_data", get_history)
+    monkeypatch.setattr(data_handlers.settings, "LOCK_DIR", str(tmp_path))
+
+    backend = ParquetBackend(str(tmp_path))
+    for to_date in ("10/01/2020", "10/01/2020", "20/01/2020"):
+        data_handlers.get_ohlc_yield_history(
+            "brazil", from_date="01/01/2020", to_date=to_date, backend=backend
+        )
+
+    body = metrics.render()
+    for result in ("miss", "hit", "partial"):
+        assert f'yieldcurves_cache_requests_total{{result="{result}"}} 1' in body
+
+
+def test_collect_includes_spans_in_pool_workers(enabled, monkeypatch, tmp_path):
+    def get_history(ticker, from_date, to_date):
+        index = pd.date_range("2020-01-01", "2020-01-31", name="Date")
+        return pd.DataFrame({"Close": 1.0}, index)
+
+    provider = data_handlers.DATA_PROVIDER
+    monkeypatch.setattr(
+        provider, "search_country", lambda q: ["Brazil 5Y", "Brazil 10Y"]
+    )
+    monkeypatch.setattr(provider, "get_bond_historical_data", get_history)
+    monkeypatch.setattr(data_handlers.settings, "LOCK_DIR", str(tmp_path))
+
+    with metrics.collect() as timings:
+        data_handlers.get_ohlc_yield_history(
+            "brazil",
+            from_date="01/01/2020",
+            to_date="31/01/2020",
+            backend=ParquetBackend(str(tmp_path)),
+            max_workers=2,
+        )
+
+    stages = [stage for stage, _ in timings]
+    assert stages.count("upstream") == 2
+    assert "cache_write" in stages
+    assert "search" in stages and "assemble" in stages
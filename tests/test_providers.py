@@ -0,0 +1,96 @@
+import pandas as pd
+import pytest
+
+from yieldcurves import data_handlers, settings
+from yieldcurves.providers import (
+    DataProvider,
+    RecordingProvider,
+    ReplayProvider,
+    get_provider,
+)
+
+
+class FakeProvider(DataProvider):
+    def search_country(self, query):
+        return ["Brazil 1Y", "Brazil 5Y"]
+
+    def get_bond_historical_data(self, ticker, from_date, to_date):
+        index = pd.date_range(
+            pd.to_datetime(from_date, format=settings.INVESTPY_DATE_FORMAT),
+            pd.to_datetime(to_date, format=settings.INVESTPY_DATE_FORMAT),
+            name="Date",
+        )
+        return pd.DataFrame({"Open": 1.0, "Close": 2.0}, index)
+
+
+@pytest.fixture
+def recordings(tmp_path):
+    provider = RecordingProvider(FakeProvider(), root=str(tmp_path))
+    provider.search_country("brazil")
+    for ticker in ("Brazil 1Y", "Brazil 5Y"):
+        provider.get_bond_historical_data(ticker, "01/01/2020", "10/01/2020")
+        provider.get_bond_historical_data(ticker, "21/01/2020", "31/01/2020")
+    return str(tmp_path)
+
+
+def test_replay_provider_serves_recorded_ranges(recordings):
+    provider = ReplayProvider(recordings)
+
+    assert provider.search_country("Brazil") == ["Brazil 1Y", "Brazil 5Y"]
+    df = provider.get_bond_historical_data("Brazil 5Y", "05/01/2020", "25/01/2020")
+    assert df.index[0] == pd.Timestamp("2020-01-05")
+    assert df.index[-1] == pd.Timestamp("2020-01-25")
+    assert len(df) == 6 + 5
+
+    with pytest.raises(IndexError):
+        provider.get_bond_historical_data("Brazil 5Y", "11/01/2020", "20/01/2020")
+    with pytest.raises(IndexError):
+        provider.get_bond_historical_data("Brazil 2Y", "01/01/2020", "10/01/2020")
+
+
+def test_replay_provider_injects_errors(recordings):
+    provider = ReplayProvider(recordings, connection_error_rate=1.0)
+    with pytest.raises(ConnectionError):
+        provider.get_bond_historical_data("Brazil 1Y", "01/01/2020", "10/01/2020")
+
+    provider = ReplayProvider(recordings, index_error_rate=1.0)
+    with pytest.raises(IndexError):
+        provider.get_bond_historical_data("Brazil 1Y", "01/01/2020", "10/01/2020")
+
+
+def test_get_provider_configures_replay_from_settings(recordings, monkeypatch):
+    monkeypatch.setattr(settings, "RECORDINGS_DIR", recordings)
+    monkeypatch.setattr(settings, "REPLAY_LATENCY", 0.01)
+    monkeypatch.setattr(settings, "REPLAY_CONNECTION_ERROR_RATE", 1.0)
+    provider = get_provider("replay")
+
+    assert provider.latency == 0.01
+    with pytest.raises(ConnectionError):
+        provider.get_bond_historical_data("Brazil 1Y", "01/01/2020", "10/01/2020")
+
+
+def test_get_ohlc_yield_history_with_replay_provider(recordings, monkeypatch):
+    monkeypatch.setattr(data_handlers, "DATA_PROVIDER", ReplayProvider(recordings))
+
+    df = data_handlers.get_ohlc_yield_history(
+        "brazil", from_date="01/01/2020", to_date="31/01/2020", backend=None
+    )
+    assert df.columns.get_level_values(0).unique().tolist() == [
+        "brazil_1y",
+        "brazil_5y",
+    ]
+    assert len(df) == 10 + 11
+
+
+def test_get_ohlc_yield_history_with_replay_faults(recordings, monkeypatch):
+    provider = ReplayProvider(recordings, connection_error_rate=0.3, seed=26)
+    monkeypatch.setattr(data_handlers, "DATA_PROVIDER", provider)
+
+    # Connection errors are retried, and never raised by searches
+    df = data_handlers.get_ohlc_yield_history(
+        "brazil", from_date="01/01/2020", to_date="31/01/2020", backend=None
+    )
+    assert df.columns.get_level_values(0).unique().tolist() == [
+        "brazil_1y",
+        "brazil_5y",
+    ]
@@ -0,0 +1,58 @@
+import pandas as pd
+import pytest
+
+from yieldcurves import data_handlers, refresh, settings
+from yieldcurves.backends import ParquetBackend
+from yieldcurves.locks import country_lock
+
+
+# Globals
+# ----
+tickers = ["Brazil 1Y", "Brazil 5Y"]
+
+
+@pytest.fixture
+def provider(monkeypatch, tmp_path):
+    calls = []
+
+    def fake_get_bond_historical_data(ticker, from_date, to_date):
+        calls.append(ticker)
+        index = pd.date_range(
+            pd.to_datetime(from_date, dayfirst=True), periods=3, freq="D", name="Date"
+        )
+        return pd.DataFrame(
+            {field: range(3) for field in ("Open", "High", "Low", "Close")},
+            index=index,
+            dtype=float,
+        )
+
+    monkeypatch.setattr(settings, "LOCK_DIR", str(tmp_path / "locks"))
+    monkeypatch.setattr(
+        data_handlers.DATA_PROVIDER, "search_country", lambda query: tickers
+    )
+    monkeypatch.setattr(
+        data_handlers.DATA_PROVIDER,
+        "get_bond_historical_data",
+        fake_get_bond_historical_data,
+    )
+    return calls
+
+
+def test_refresh_country_warms_cache(provider, tmp_path):
+    backend = ParquetBackend(str(tmp_path))
+
+    assert refresh.refresh_country("brazil", lookback_days=2, backend=backend)
+    assert sorted(provider) == sorted(tickers)
+    assert backend.find("brazil_5y") is not None
+
+    # Already covered, nothing is requested again
+    refresh.refresh_country("brazil", lookback_days=2, backend=backend)
+    assert len(provider) == len(tickers)
+
+
+def test_refresh_country_skips_locked(provider, tmp_path):
+    backend = ParquetBackend(str(tmp_path))
+
+    with country_lock("brazil"):
+        assert refresh.refresh_country("brazil", backend=backend) is None
+    assert not provider
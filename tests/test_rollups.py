@@ -0,0 +1,85 @@
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from yieldcurves import rollups
+from yieldcurves.backends import ParquetBackend
+
+
+# Globals
+# ----
+index = pd.bdate_range("2020-01-01", "2020-06-30", name="dates")
+
+
+@pytest.fixture
+def daily():
+    rng = np.random.default_rng(0)
+    return pd.DataFrame(
+        rng.random((len(index), 4)),
+        index=index,
+        columns=["open", "high", "low", "close"],
+    )
+
+
+def test_resample_ohlc(daily):
+    daily.iloc[0, 0] = np.nan  # Missing open on the first day
+    weekly = rollups.resample_ohlc(daily, "weekly")
+
+    first = daily.loc["2020-01-01":"2020-01-03"]
+    assert weekly.index[0] == pd.Timestamp("2020-01-03")  # Friday
+    assert weekly.iloc[0].tolist() == [
+        first["open"].iloc[1],
+        first["high"].max(),
+        first["low"].min(),
+        first["close"].iloc[-1],
+    ]
+    assert rollups.resample_ohlc(daily, "monthly").index[-1] == index[-1]
+
+
+def test_update_rollup_matches_full_rollup(daily):
+    for resolution in ("weekly", "monthly"):
+        rollup = rollups.resample_ohlc(daily.loc[:"2020-03-18"], resolution)
+
+        start, end = rollups.get_window("2020-03-18", index[-1], resolution)
+        updated = rollups.update_rollup(rollup, daily.loc[start:end], resolution)
+        expected = rollups.resample_ohlc(daily, resolution)
+        pd.testing.assert_frame_equal(updated, expected, check_freq=False)
+
+
+@pytest.mark.parametrize(
+    "from_date, max_points, expected",
+    [
+        ("2020-01-01", 1000, "daily"),
+        ("2010-01-01", 1000, "weekly"),
+        ("2010-01-01", 200, "monthly"),
+        ("2000-01-01", 10, "monthly"),
+    ],
+)
+def test_pick_resolution(from_date, max_points, expected):
+    assert rollups.pick_resolution(from_date, "2020-12-31", max_points) == expected
+
+
+def test_parquet_backend_updates_rollups(daily, tmp_path):
+    pytest.importorskip("pyarrow")
+    backend = ParquetBackend(str(tmp_path))
+
+    # Appended in chunks, then a past value revised
+    for chunk in np.array_split(daily, 4):
+        backend.write(pd.concat({"brazil 5y": chunk}, axis=1))
+    daily.iloc[10, 1] = 9.0
+    backend.write(pd.concat({"brazil 5y": daily.iloc[[10]]}, axis=1))
+
+    for resolution in ("weekly", "monthly"):
+        found = backend.find_rollups(["brazil_5y"], resolution, "2020-01-15")
+        expected = rollups.resample_ohlc(daily, resolution).loc["2020-01-15":]
+        pd.testing.assert_frame_equal(found["brazil_5y"], expected, check_freq=False)
+    assert backend.list_tickers() == ["brazil_5y"]
+
+    # Rolled up on the fly if not stored (e.g. cached before rollups)
+    shutil.rmtree(os.path.dirname(backend.get_rollup_path("brazil_5y", "weekly")))
+    found = backend.find_rollups(["brazil_5y"], "weekly", "2020-01-15", "2020-02-15")
+    expected = rollups.resample_ohlc(daily, "weekly").loc["2020-01-15":"2020-02-21"]
+    pd.testing.assert_frame_equal(found["brazil_5y"], expected, check_freq=False)
@@ -0,0 +1,160 @@
+import gzip
+import io
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+import pandas as pd
+import pyarrow as pa
+import pytest
+
+from yieldcurves import data_handlers
+from yieldcurves.backends import ParquetBackend
+from yieldcurves.server import ARROW_TYPE, CurveService, make_server
+
+# Globals
+# ----
+tickers = ["Brazil 3M", "Brazil 1Y", "Brazil 5Y", "Brazil 10Y"]
+
+
+@pytest.fixture
+def calls(monkeypatch, tmp_path):
+    calls = []
+
+    def fake_get_bond_historical_data(ticker, from_date, to_date):
+        calls.append(ticker)
+        time.sleep(0.05)
+        index = pd.date_range("2020-01-01", "2020-01-31", freq="B", name="Date")
+        seed = tickers.index(ticker)
+        return pd.DataFrame(
+            {field: seed + 1.0 for field in ("Open", "High", "Low", "Close")}, index
+        )
+
+    monkeypatch.setattr(data_handlers.settings, "LOCK_DIR", str(tmp_path / "locks"))
+    monkeypatch.setattr(
+        data_handlers.DATA_PROVIDER,
+        "search_country",
+        lambda query: tickers if query == "brazil" else [],
+    )
+    monkeypatch.setattr(
+        data_handlers.DATA_PROVIDER,
+        "get_bond_historical_data",
+        fake_get_bond_historical_data,
+    )
+    return calls
+
+
+@pytest.fixture
+def url(calls, tmp_path):
+    service = CurveService(ParquetBackend(str(tmp_path / "cache")), ttl=60)
+    server = make_server("127.0.0.1", 0, service)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+
+def get(url, **headers):
+    try:
+        with urlopen(Request(url, headers=headers)) as response:
+            return response.status, response.headers, response.read()
+    except HTTPError as e:
+        return e.code, e.headers, e.read()
+
+
+HISTORY = "/brazil/history?from=01/01/2020&to=31/01/2020"
+
+
+def test_history_is_served_once_then_revalidated(url, calls):
+    status, headers, body = get(url + HISTORY, **{"Accept-Encoding": "gzip"})
+    assert status == 200
+    assert headers["Content-Encoding"] == "gzip"
+    data = json.loads(gzip.decompress(body))
+    assert data["columns"] == ["brazil_3m", "brazil_1y", "brazil_5y", "brazil_10y"]
+    assert len(data["index"]) == 23
+
+    # Conditional polls from many clients don't hit the backend nor upstream
+    n_calls = len(calls)
+    etag = headers["ETag"]
+    for _ in range(5):
+        status, headers, body = get(
+            url + HISTORY, **{"Accept-Encoding": "gzip", "If-None-Match": etag}
+        )
+        assert (status, body) == (304, b"")
+    assert len(calls) == n_calls
+
+    # Weak comparison, e.g. for tags weakened by proxies
+    status, _, _ = get(
+        url + HISTORY, **{"Accept-Encoding": "gzip", "If-None-Match": f'"x", W/{etag}'}
+    )
+    assert status == 304
+
+    status, _, _ = get(url + HISTORY, **{"If-Modified-Since": headers["Last-Modified"]})
+    assert status == 304
+
+
+def test_arrow_responses(url):
+    status, headers, body = get(url + HISTORY, Accept=ARROW_TYPE)
+    assert status == 200
+    assert headers["Content-Type"] == ARROW_TYPE
+
+    df = pa.ipc.open_stream(io.BytesIO(body)).read_pandas()
+    assert df.shape == (23, 4)
+    assert (df["brazil_10y"] == 4.0).all()
+
+
+def test_history_max_points(url):
+    status, _, body = get(url + HISTORY + "&max_points=5")
+    assert status == 200
+    data = json.loads(body)
+    # Weekly bars, labeled by Fridays
+    assert pd.to_datetime(data["index"]).day.tolist() == [3, 10, 17, 24, 31]
+
+
+def test_curve_is_interpolated_up_to_longest_term(url):
+    status, _, body = get(url + "/brazil/curve?date=2020-01-15&method=linear")
+    assert status == 200
+
+    data = json.loads(body)
+    assert data["index"] == ["2020-01-15T00:00:00.000"]
+    assert data["columns"] == list(range(1, 121))
+    assert data["data"][0][2] == pytest.approx(1.0)  # 3M
+    assert data["data"][0][-1] == pytest.approx(4.0)  # 10Y
+
+
+def test_concurrent_requests_share_one_build(url, calls):
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(get, [url + HISTORY] * 16))
+
+    assert {status for status, _, _ in results} == {200}
+    assert len({body for _, _, body in results}) == 1
+    assert sorted(calls) == sorted(tickers)
+
+
+@pytest.mark.parametrize(
+    "path, status",
+    [
+        ("/japan/history", 404),
+        ("/brazil/unknown", 404),
+        ("/brazil/history?field=volume", 400),
+        ("/brazil/history?max_points=0", 400),
+        ("/brazil/curve?method=spline", 400),
+        ("/brazil/latest?foo=bar", 400),
+    ],
+)
+def test_errors(url, path, status):
+    assert get(url + path)[0] == status
+
+
+def test_unexpected_errors_get_a_response(url, monkeypatch):
+    def fail(self, country):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(CurveService, "get_last_modified", fail)
+    status, _, body = get(url + HISTORY)
+    assert status == 500
+    assert json.loads(body) == {"error": "Internal server error"}
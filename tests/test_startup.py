@@ -0,0 +1,15 @@
+import subprocess
+import sys
+
+
+def test_importing_data_handlers_is_lazy():
+    """Heavy dependencies and the cache backend are only loaded on first use"""
+    code = (
+        "import sys; from yieldcurves import data_handlers; "
+        "print(data_handlers.LOCAL_CACHE_BACKEND, "
+        "*(m for m in ('investpy', 'pymongo', 'scipy') if m in sys.modules))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    assert result.stdout.split() == ["LazyCacheBackend(unresolved)"]
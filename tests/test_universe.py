@@ -0,0 +1,43 @@
+import json
+
+import pytest
+
+pytest.importorskip("investpy")
+
+from yieldcurves import settings, universe
+
+
+@pytest.fixture
+def empty_universe(monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "UNIVERSE_PATH", str(tmp_path / "universe.json"))
+    monkeypatch.setattr(universe, "_universe", None)
+    monkeypatch.setattr(universe, "_bond_info", {})
+
+
+def test_load_universe_builds_and_saves_index(empty_universe):
+    countries = universe.load_universe()["countries"]
+    brazil = countries["brazil"]
+    assert {k: v for k, v in brazil[0].items() if k != "rank"} == {
+        "ticker": "Brazil 3M",
+        "db_ticker": "brazil_3m",
+        "term": "3M",
+        "months": 3,
+        "full_name": "Brazil 3-Month",
+    }
+
+    # Ranks are shared by all countries
+    ranks = {e["ticker"]: e["rank"] for e in brazil + countries["united states"]}
+    assert ranks["Brazil 3M"] < ranks["Brazil 1Y"] < ranks["Brazil 10Y"]
+    assert ranks["Brazil 10Y"] == ranks["U.S. 10Y"]
+
+    with open(settings.UNIVERSE_PATH) as f:
+        assert json.load(f)["countries"]["brazil"] == brazil
+
+
+def test_search_universe(empty_universe):
+    assert universe.search_universe("Brazil")[:2] == ["Brazil 3M", "Brazil 6M"]
+    assert universe.search_universe("brazil 10") == ["Brazil 10Y"]
+    hong_kong = universe.search_universe("hong kong")
+    assert hong_kong and not any(ticker.endswith("W") for ticker in hong_kong)
+    assert universe.search_universe("united") == []  # Ambiguous
+    assert universe.search_universe("atlantis") == []
@@ -1,6 +1,7 @@
 import pandas as pd
 import pytest
 
+from yieldcurves import universe, utils
 from yieldcurves.utils import *
 
 
@@ -18,7 +19,37 @@ def test_sort_by_term_with_different_types():
     assert sort_by_term(pd.DataFrame(columns=tickers)) == sorted_tickers
 
 
+def test_sort_by_term_uses_universe_ranks(monkeypatch):
+    infos = {
+        ticker: {"ticker": ticker, "term": ticker.split()[-1], "rank": rank}
+        for rank, ticker in enumerate(["Japan 1Y", "Brazil 2Y", "Brazil 10Y"])
+    }
+    monkeypatch.setattr(universe, "_bond_info", infos)
+    monkeypatch.setattr(utils, "get_term_key", None)  # Terms are not parsed
+
+    assert sort_by_term(["Brazil 10Y", "Japan 1Y", "Brazil 2Y"]) == list(infos)
+
+
 def test_get_tickvals():
     with pytest.raises(ValueError):
         get_tickvals(["11M", *sorted_terms])
     assert get_tickvals(sorted_terms) == tickvals
+
+
+def test_interpolate_curves_matches_pandas():
+    data = pd.DataFrame(
+        [
+            [1.0, None, 2.5, 3.0, 3.2],  # 4 points, cubic
+            [None, 2.0, 2.5, 3.0, None],  # 3 points, quadratic
+            [None, None, 2.5, 3.0, None],  # 2 points, linear
+        ],
+        columns=tickvals,
+    )
+    grid = range(1, tickvals[-1] + 1)
+    curves = interpolate_curves(data, method="cubic", grid=grid)
+
+    for (_, row), method in zip(data.iterrows(), ["cubic", "quadratic", "linear"]):
+        expected = row.reindex(grid).interpolate(method=method, limit_area="inside")
+        pd.testing.assert_series_equal(
+            curves.loc[row.name], expected, check_index_type=False, check_names=False
+        )
@@ -1,5 +1,10 @@
-import app
+if __package__:  # python -m yieldcurves ...
+    from .cli import main
 
+    if __name__ == "__main__":
+        main()
+else:  # streamlit run yieldcurves/__main__.py
+    import app
 
-if __name__ == "__main__":
-    app.run()
+    if __name__ == "__main__":
+        app.run()
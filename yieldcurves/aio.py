@@ -0,0 +1,320 @@
+"""
+yieldcurves.aio
+~~~~~~~~~~~~~~~
+
+`asyncio` counterparts of `data_handlers`, for services embedding yieldcurves
+(e.g. aiohttp/FastAPI) without blocking their event loop. Upstream requests and
+cache I/O run in a shared thread pool, while tenors are gathered concurrently
+under a semaphore. Results are the same as with the sync API.
+"""
+
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from functools import partial
+from typing import (
+    AsyncIterator,
+    Callable,
+    ContextManager,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+)
+
+import pandas as pd
+
+from . import data_handlers, metrics, settings
+from .backends import CacheBackend
+from .data_handlers import (
+    LOCAL_CACHE_BACKEND,
+    TODAY_STR,
+    _assemble_history,
+    _assemble_recent,
+    _get_rollups,
+    _get_ticker_history,
+    _get_ticker_tail,
+    _to_db_ticker,
+)
+from .locks import country_lock
+from .rollups import pick_resolution
+from .utils import flip_date_format
+
+
+__all__ = (
+    "AsyncCacheBackend",
+    "aget_ohlc_yield_history",
+    "aget_recent_yield",
+    "asearch_country",
+)
+
+
+# Globals
+# ----
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+_country_locks: Dict[Tuple[asyncio.AbstractEventLoop, str], list] = {}  # [lock, users]
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.ASYNC_MAX_WORKERS,
+                    thread_name_prefix="yieldcurves-aio",
+                )
+    return _executor
+
+
+async def _run(func: Callable, *args, **kwargs):
+    """Run a blocking call in the shared thread pool"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _get_executor(), metrics.propagate(partial(func, *args, **kwargs))
+    )
+
+
+class AsyncCacheBackend:
+    """Executor-backed async wrapper around a (blocking) `CacheBackend`"""
+
+    def __init__(self, backend: CacheBackend):
+        self.backend = backend
+
+    async def find_many(
+        self,
+        tickers: List[str],
+        from_date: Optional[str] = None,
+        to_date: Optional[str] = None,
+    ) -> Dict[str, pd.DataFrame]:
+        return await _run(self.backend.find_many, tickers, from_date, to_date)
+
+    async def find_rollups(
+        self,
+        tickers: List[str],
+        resolution: str,
+        from_date: Optional[str] = None,
+        to_date: Optional[str] = None,
+    ) -> Dict[str, pd.DataFrame]:
+        return await _run(
+            self.backend.find_rollups, tickers, resolution, from_date, to_date
+        )
+
+    async def find_tail(
+        self, tickers: List[str], n_rows: int
+    ) -> Tuple[Dict[str, pd.DataFrame], Dict[str, dict]]:
+        return await _run(self.backend.find_tail, tickers, n_rows)
+
+    async def find_coverage(self, tickers: List[str]) -> Dict[str, dict]:
+        return await _run(self.backend.find_coverage, tickers)
+
+    async def write(self, data: pd.DataFrame) -> Dict[str, int]:
+        return await _run(self.backend.write, data)
+
+    async def write_coverage(
+        self, ticker: str, from_date: str, to_date: str, modified: bool = True
+    ):
+        return await _run(
+            self.backend.write_coverage, ticker, from_date, to_date, modified
+        )
+
+
+@asynccontextmanager
+async def _alock_country(country_name: str, enabled: bool) -> AsyncIterator[None]:
+    """Async `country_lock`, waiting on an `asyncio.Lock` first so at most one
+    pool thread per country blocks on the inter-process lock"""
+    if not enabled:
+        yield
+        return
+
+    # Entries are dropped once unused, so closed loops aren't kept alive
+    key = (asyncio.get_running_loop(), country_name.lower().strip())
+    entry = _country_locks.setdefault(key, [asyncio.Lock(), 0])
+    entry[1] += 1
+    try:
+        async with entry[0]:
+            lock = country_lock(country_name)
+            acquire = asyncio.ensure_future(_run(lock.__enter__))
+            try:
+                await asyncio.shield(acquire)
+            except asyncio.CancelledError:
+                # The pool thread may still acquire the lock, so release it once
+                # it does
+                acquire.add_done_callback(partial(_release_acquired, lock))
+                raise
+            try:
+                yield
+            finally:
+                lock.__exit__(None, None, None)  # Releasing never blocks
+    finally:
+        entry[1] -= 1
+        if not entry[1]:
+            del _country_locks[key]
+
+
+def _release_acquired(lock: ContextManager, acquire: asyncio.Future):
+    if not acquire.cancelled() and acquire.exception() is None:
+        lock.__exit__(None, None, None)
+
+
+async def asearch_country(query: str) -> List[str]:
+    """Search available bonds for a given country
+
+    ...
+
+    Parameters
+    ----------
+    query : str
+        full name of target country (e.g. "united kingdom", *NOT* "uk")
+    """
+    with metrics.span("search"):
+        return await _run(data_handlers.DATA_PROVIDER.search_country, query)
+
+
+async def _gather_tickers(
+    tickers: List[str], func: Callable, max_concurrency: Optional[int]
+) -> List[Optional[pd.DataFrame]]:
+    semaphore = asyncio.Semaphore(max_concurrency or settings.MAX_FETCH_WORKERS)
+
+    async def _fetch(ticker: str) -> Optional[pd.DataFrame]:
+        async with semaphore:
+            return await _run(func, ticker)
+
+    return await asyncio.gather(*(_fetch(ticker) for ticker in tickers))
+
+
+async def aget_ohlc_yield_history(
+    country_name: str,
+    from_date: str = "01/01/2020",
+    to_date: str = TODAY_STR,
+    backend: Optional[CacheBackend] = LOCAL_CACHE_BACKEND,
+    max_concurrency: Optional[int] = None,
+    lock: bool = True,
+    max_points: Optional[int] = None,
+) -> Optional[pd.DataFrame]:
+    """Async `data_handlers.get_ohlc_yield_history`
+
+    ...
+
+    Parameters
+    ----------
+    country_name : str
+    from_date : str
+        start date in "DD/MM/YYYY" format
+    to_date : str
+        end date in "DD/MM/YYYY" format
+    backend : CacheBackend, optional
+        cache backend, e.g. `dbm.Manager` (skipped if `None`)
+    max_concurrency : int, optional
+        tickers fetched at once, defaults to `settings.MAX_FETCH_WORKERS`
+    lock : bool
+        whether to hold `locks.country_lock` while loading (if `backend` is set)
+    max_points : int, optional
+        maximum # of rows returned, defaults to daily bars
+    """
+    resolution = "daily"
+    if max_points:
+        resolution = pick_resolution(
+            flip_date_format(from_date), flip_date_format(to_date), max_points
+        )
+
+    tickers = await asearch_country(country_name)
+    if not tickers:
+        return
+
+    async with _alock_country(country_name, bool(backend and lock)):
+        cached = coverage = {}
+        if backend:
+            abackend = AsyncCacheBackend(backend)
+            db_tickers = [_to_db_ticker(ticker) for ticker in tickers]
+            window = flip_date_format(from_date), flip_date_format(to_date)
+            with metrics.span("cache_read"):
+                if resolution == "daily":
+                    cached, coverage = await asyncio.gather(
+                        abackend.find_many(db_tickers, *window),
+                        abackend.find_coverage(db_tickers),
+                    )
+                else:
+                    # Daily rows are only needed for tickers cached before
+                    # coverage was tracked
+                    coverage = await abackend.find_coverage(db_tickers)
+                    targets = [t for t in db_tickers if t not in coverage]
+                    if targets:
+                        cached = await abackend.find_many(targets, *window)
+
+        results = await _gather_tickers(
+            tickers,
+            lambda ticker: _get_ticker_history(
+                ticker,
+                from_date,
+                to_date,
+                backend,
+                cached.get(_to_db_ticker(ticker)),
+                coverage.get(_to_db_ticker(ticker)),
+            ),
+            max_concurrency,
+        )
+
+        if resolution != "daily":
+            results = await _run(
+                _get_rollups, tickers, results, resolution, from_date, to_date, backend
+            )
+
+    return _assemble_history(tickers, results)
+
+
+async def aget_recent_yield(
+    country_name: str,
+    field: str = "Close",
+    n_rows: int = 22,
+    backend: Optional[CacheBackend] = LOCAL_CACHE_BACKEND,
+    max_concurrency: Optional[int] = None,
+    lock: bool = True,
+) -> Optional[pd.DataFrame]:
+    """Async `data_handlers.get_recent_yield`
+
+    ...
+
+    Parameters
+    ----------
+    country_name : str
+    field : str
+        target field in OHLC, one of {Close, Open, High Low}
+    n_rows : int
+        # of rows to be returned
+    backend : CacheBackend, optional
+        cache backend, e.g. `dbm.Manager` (skipped if `None`)
+    max_concurrency : int, optional
+        tickers fetched at once, defaults to `settings.MAX_FETCH_WORKERS`
+    lock : bool
+        whether to hold `locks.country_lock` while loading (if `backend` is set)
+    """
+    tickers = await asearch_country(country_name)
+    if not tickers:
+        return
+
+    async with _alock_country(country_name, bool(backend and lock)):
+        tails = coverage = {}
+        if backend:
+            db_tickers = [_to_db_ticker(ticker) for ticker in tickers]
+            with metrics.span("cache_read"):
+                tails, coverage = await AsyncCacheBackend(backend).find_tail(
+                    db_tickers, n_rows
+                )
+
+        results = await _gather_tickers(
+            tickers,
+            lambda ticker: _get_ticker_tail(
+                ticker,
+                n_rows,
+                backend,
+                tails.get(_to_db_ticker(ticker)),
+                coverage.get(_to_db_ticker(ticker)),
+            ),
+            max_concurrency,
+        )
+
+    return _assemble_recent(tickers, results, field, n_rows)
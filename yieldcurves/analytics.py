@@ -0,0 +1,276 @@
+"""
+yieldcurves.analytics
+~~~~~~~~~~~~~~~~~~~~~
+
+Cross-country curve analytics, e.g. `python -m yieldcurves analytics`: slopes
+(e.g. 2s10s), butterflies (e.g. 2s5s10s) and spreads against a benchmark country
+(e.g. each country's 10Y vs the US 10Y), all in basis points, along with their
+rolling z-scores and percentiles.
+
+Tenors are matched across countries by their # of months (see `utils.get_tickvals`),
+so that e.g. 12M and 1Y bonds are treated as the same tenor. Every metric is
+computed for all countries at once, with (metric, country, stat) columns, e.g.
+(2s10s, brazil, zscore).
+
+Results are cached per benchmark and window under `settings.ANALYTICS_CACHE_DIR`,
+so that only dates appended since the last update are computed (see
+`get_analytics`).
+"""
+
+import logging
+import os
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from . import settings
+from .backends import CacheBackend
+from .data_handlers import LOCAL_CACHE_BACKEND, get_ohlc_yield_panel
+from .utils import get_tickvals, sort_by_term
+
+
+__all__ = (
+    "compute_metrics",
+    "get_analytics",
+    "get_curves",
+    "rolling_stats",
+    "update_analytics",
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+# Globals
+# ----
+# Terms in months, e.g. 2s10s = 10Y - 2Y
+SLOPES: Dict[str, Tuple[int, int]] = {
+    "2s10s": (24, 120),
+    "5s30s": (60, 360),
+}
+# Terms in months (wing, belly, wing), e.g. 2s5s10s = 2 * 5Y - 2Y - 10Y
+BUTTERFLIES: Dict[str, Tuple[int, int, int]] = {
+    "2s5s10s": (24, 60, 120),
+}
+# Terms in months compared against the benchmark country, e.g. 10Y - US 10Y
+SPREADS: Dict[str, int] = {
+    "2y_spread": 24,
+    "10y_spread": 120,
+}
+STATS = ("value", "zscore", "percentile")
+
+
+def get_curves(panel: pd.DataFrame, field: str = "close") -> pd.DataFrame:
+    """Yields of each country by term in months, i.e. (dates x (country, months)),
+    averaging duplicate terms (e.g. 12M, 1Y)
+
+    ...
+
+    Parameters
+    ----------
+    panel : pd.DataFrame
+        (country, tenor, field) columns, see `get_ohlc_yield_panel`
+    field : str
+        one of {open, high, low, close}
+    """
+    data = panel.xs(field, axis=1, level=2)
+
+    columns = []
+    for country in data.columns.unique(level=0):
+        terms = sort_by_term(list(data[country].columns))
+        columns += zip([country] * len(terms), terms, get_tickvals(terms))
+
+    curves = data.loc[:, [(country, term) for country, term, _ in columns]]
+    curves.columns = pd.MultiIndex.from_tuples(
+        [(country, months) for country, _, months in columns],
+        names=["country", "months"],
+    )
+    return curves.groupby(level=[0, 1], axis=1).mean().sort_index()
+
+
+def compute_metrics(
+    curves: pd.DataFrame, benchmark: Optional[str] = None
+) -> pd.DataFrame:
+    """Slopes, butterflies and spreads (see `SLOPES`, `BUTTERFLIES` and `SPREADS`)
+    of all countries in `curves`, in basis points
+
+    Metrics are left out for countries missing any of their terms.
+
+    Parameters
+    ----------
+    curves : pd.DataFrame
+        (dates x (country, months)) yields, see `get_curves`
+    benchmark : str, optional
+        country spreads are computed against, defaults to
+        `settings.ANALYTICS_BENCHMARK`
+    """
+    benchmark = benchmark or settings.ANALYTICS_BENCHMARK
+    terms = curves.columns.unique(level=1)
+
+    def _get(months: int) -> pd.DataFrame:
+        """(dates x country) yields, empty if no country has the term"""
+        if months not in terms:
+            return pd.DataFrame(index=curves.index)
+        return curves.xs(months, axis=1, level=1)
+
+    metrics = {}
+    for name, (short, long) in SLOPES.items():
+        metrics[name] = _get(long) - _get(short)
+    for name, (left, belly, right) in BUTTERFLIES.items():
+        metrics[name] = 2 * _get(belly) - _get(left) - _get(right)
+
+    if benchmark in curves.columns.unique(level=0):
+        for name, months in SPREADS.items():
+            data = _get(months)
+            if benchmark in data.columns:
+                spreads = data.sub(data[benchmark], axis=0)
+                metrics[name] = spreads.drop(columns=benchmark)
+    else:
+        logger.warning(f"No data for benchmark [{benchmark}], skipping spreads")
+
+    metrics = pd.concat(metrics, axis=1, names=["metric", "country"]) * 100
+    return metrics.dropna(axis=1, how="all")
+
+
+def rolling_stats(
+    metrics: pd.DataFrame, window: int, min_periods: Optional[int] = None
+) -> pd.DataFrame:
+    """Rolling z-scores and percentiles (in [0, 1]) of each column of `metrics`
+
+    ...
+
+    Parameters
+    ----------
+    metrics : pd.DataFrame
+        (metric, country) columns, see `compute_metrics`
+    window : int
+        # of dates in each window
+    min_periods : int, optional
+        defaults to half a window
+    """
+    rolling = metrics.rolling(window, min_periods=min_periods or window // 2)
+    zscores = (metrics - rolling.mean()) / rolling.std()
+    stats = pd.concat(
+        {
+            "value": metrics,
+            "zscore": zscores.replace([np.inf, -np.inf], np.nan),
+            "percentile": rolling.rank(pct=True),
+        },
+        axis=1,
+        names=["stat"],
+    )
+    return stats.reorder_levels([1, 2, 0], axis=1).sort_index(axis=1)
+
+
+def get_analytics(
+    curves: pd.DataFrame,
+    benchmark: Optional[str] = None,
+    window: Optional[int] = None,
+    full: bool = False,
+) -> pd.DataFrame:
+    """Metrics and rolling stats of all countries in `curves`, caching results so
+    that only new dates are computed on subsequent calls
+
+    The last cached date is always recomputed, as its data may have been
+    incomplete. Everything is recomputed if `full` is set, `curves` start before
+    the cache or the countries (or terms) changed.
+
+    Parameters
+    ----------
+    curves : pd.DataFrame
+        (dates x (country, months)) yields, see `get_curves`
+    benchmark : str, optional
+        defaults to `settings.ANALYTICS_BENCHMARK`
+    window : int, optional
+        # of dates in rolling windows, defaults to `settings.ANALYTICS_WINDOW`
+    full : bool
+        whether to recompute all dates
+    """
+    benchmark = benchmark or settings.ANALYTICS_BENCHMARK
+    window = window or settings.ANALYTICS_WINDOW
+    name = benchmark.lower().strip().replace(" ", "_")
+    path = os.path.join(settings.ANALYTICS_CACHE_DIR, f"{name}_{window}.csv")
+
+    curves = curves.sort_index()
+    cached = None
+    if not full and os.path.exists(path):
+        cached = pd.read_csv(path, header=[0, 1, 2], index_col=0, parse_dates=True)
+        if cached.empty or curves.index[0] < cached.index[0]:
+            cached = None
+
+    data = curves
+    if cached is not None:
+        # Rolling stats of new dates also need the preceding `window - 1` dates
+        start = curves.index.searchsorted(cached.index[-1])
+        data = curves.iloc[max(start - window + 1, 0) :]
+
+    stats = rolling_stats(compute_metrics(data, benchmark), window)
+    if cached is not None:
+        if stats.columns.equals(cached.columns):
+            stats = stats.loc[cached.index[-1] :]
+            logger.info(f"Updating analytics for {len(stats)} dates")
+            stats = pd.concat([cached.drop(stats.index, errors="ignore"), stats])
+        else:
+            logger.info("Countries or terms changed, recomputing all analytics")
+            stats = rolling_stats(compute_metrics(curves, benchmark), window)
+
+    os.makedirs(settings.ANALYTICS_CACHE_DIR, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    stats.to_csv(tmp_path)
+    os.replace(tmp_path, path)
+
+    return stats
+
+
+def update_analytics(
+    countries: Optional[List[str]] = None,
+    from_date: Optional[str] = None,
+    to_date: Optional[str] = None,
+    benchmark: Optional[str] = None,
+    window: Optional[int] = None,
+    full: bool = False,
+    backend: Optional[CacheBackend] = LOCAL_CACHE_BACKEND,
+) -> Optional[pd.DataFrame]:
+    """Load close yields of `countries` (and the benchmark) and update their
+    analytics, see `get_analytics`
+
+    ...
+
+    Parameters
+    ----------
+    countries : List[str], optional
+        defaults to `settings.REFRESH_COUNTRIES`
+    from_date : str, optional
+        start date in "DD/MM/YYYY" format, defaults to
+        `settings.ANALYTICS_FROM_DATE`
+    to_date : str, optional
+        end date in "DD/MM/YYYY" format, defaults to today (at call time, so
+        long-running refreshers keep extending analytics)
+    benchmark : str, optional
+        defaults to `settings.ANALYTICS_BENCHMARK`
+    window : int, optional
+        defaults to `settings.ANALYTICS_WINDOW`
+    full : bool
+        whether to recompute all dates
+    backend : CacheBackend, optional
+        cache backend, e.g. `dbm.Manager` (skipped if `None`)
+    """
+    benchmark = benchmark or settings.ANALYTICS_BENCHMARK
+    countries = list(countries or settings.REFRESH_COUNTRIES)
+    if benchmark not in countries:
+        countries.append(benchmark)
+
+    panel = get_ohlc_yield_panel(
+        countries,
+        from_date=from_date or settings.ANALYTICS_FROM_DATE,
+        to_date=to_date or datetime.today().strftime(settings.INVESTPY_DATE_FORMAT),
+        fields="close",
+        backend=backend,
+    )
+    if panel is None:
+        logger.error("No data available, analytics not updated.")
+        return
+
+    return get_analytics(get_curves(panel), benchmark, window, full=full)
@@ -43,6 +43,6 @@ def render_dates_selector(container: DeltaGenerator) -> List[str]:
 def render_interpolation_selector(container: DeltaGenerator):
     return container.radio(
         label="Interpolation method",
-        options=["cubic", "quadratic", "linear"],
+        options=["cubic", "quadratic", "linear", "nelson-siegel", "svensson"],
         index=0,
     )
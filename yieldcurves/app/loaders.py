@@ -6,10 +6,12 @@ This module defines data loaders to be used by the app.
 """
 
 from contextlib import suppress
+from datetime import datetime
 
 import pandas as pd
 import streamlit as st
 
+from yieldcurves import metrics, settings
 from yieldcurves.data_handlers import get_ohlc_yield_history
 from yieldcurves.utils import get_terms, sort_by_term
 from . import shared
@@ -19,28 +21,47 @@ __all__ = ("load_active_bonds", "load_country")
 
 
 def load_active_bonds():
-    for term in shared.bonds_tickers:
+    state = shared.get_state()
+    for term in state.bonds_tickers:
         # +++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
         # TODO: unselect vertices when multiple monthly issuances are available
         # +++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
         val = st.sidebar.checkbox(term, value=True)
         if val:
-            shared.bonds_active.add(term)
+            state.bonds_active.add(term)
         else:
             with suppress(KeyError):
-                shared.bonds_active.remove(term)
+                state.bonds_active.remove(term)
 
 
-def load_country(target_country: str):
-    df = get_ohlc_yield_history(target_country)
+@st.cache_resource(
+    ttl=settings.ST_CACHE_TTL,
+    max_entries=settings.ST_CACHE_MAX_ENTRIES,
+    show_spinner=False,
+)
+def _load_close_history(
+    country: str,
+    from_date: str,
+    to_date: str,
+    backend: str,
+) -> pd.DataFrame:
+    """Cached across reruns and sessions, keyed by all arguments (`backend` is
+    only part of the key). The returned frame must be treated as read-only."""
+    df = get_ohlc_yield_history(country, from_date, to_date)
     if df is None:
-        df = pd.DataFrame()
-    else:
-        df = df.xs("close", 1, 1)
-
-    if shared.target_country != target_country:
-        shared.target_country = target_country
-        shared.bonds_df = df
-        shared.bonds_tickers = sort_by_term(list(df))
-        shared.bonds_terms = get_terms(shared.bonds_tickers)
-        shared.bonds_active = set()  # Must reset active state
+        return pd.DataFrame()
+    return df.xs("close", 1, 1)
+
+
+@metrics.timed("load_country")
+def load_country(target_country: str, from_date: str = "01/01/2020"):
+    to_date = datetime.today().strftime(settings.INVESTPY_DATE_FORMAT)
+    df = _load_close_history(target_country, from_date, to_date, settings.CACHE_BACKEND)
+
+    state = shared.get_state()
+    state.bonds_df = df
+    if state.target_country != target_country:
+        state.target_country = target_country
+        state.bonds_tickers = sort_by_term(list(df))
+        state.bonds_terms = get_terms(state.bonds_tickers)
+        state.bonds_active = set()  # Must reset active state
@@ -5,9 +5,12 @@ yieldcurves.app.main
 This module controls the app.
 """
 
+import logging
+
+import pandas as pd
 import streamlit as st
 
-from yieldcurves import settings
+from yieldcurves import metrics, settings
 from . import shared
 from .input_handlers import (
     render_country_selector,
@@ -15,12 +18,47 @@ from .input_handlers import (
     render_interpolation_selector,
 )
 from .loaders import load_active_bonds, load_country
-from .plotting import plot_yield_curve
+
+
+__all__ = ("run",)
+
+
+logger = logging.getLogger(__name__)
+
+
+@st.cache_resource(show_spinner=False)
+def _start_metrics_server():
+    """Started once per process, shared across sessions"""
+    try:
+        return metrics.start_http_server(settings.METRICS_PORT)
+    except OSError as e:
+        logger.error(f"Failed to serve metrics - {e}")
+
+
+def _render_debug_panel(timings: list):
+    """Per-rerun stage timings (see `metrics.collect`)"""
+    df = pd.DataFrame(timings, columns=["stage", "seconds"])
+    df = df.groupby("stage", sort=False)["seconds"].agg(["count", "sum"])
+    with st.sidebar.expander("Debug: stage timings"):
+        st.dataframe(df.rename(columns={"sum": "seconds"}))
 
 
 def run():
+    if not metrics.enabled():
+        _run()
+        return
+
+    _start_metrics_server()
+    with metrics.collect() as timings:
+        _run()
+    if settings.ST_DEBUG_PANEL:
+        _render_debug_panel(timings)
+
+
+def _run():
     # Config
     st.set_page_config(**settings.ST_PAGE_CONFIG)
+    state = shared.get_state()
 
     # Layout (pre-data)
     st.sidebar.header("Settings")
@@ -30,21 +68,23 @@ def run():
     # Setup & load data
     with st.spinner(text="Loading country data..."):
         load_country(target_country)
-        if not shared.bonds_tickers:
+        if not state.bonds_tickers:
             st.error("Invalid country. Please provide a valid country name.")
     st.sidebar.subheader("Active terms")
     load_active_bonds()
-    if shared.bonds_tickers:
-        shared.interpolation_method = render_interpolation_selector(st.sidebar)
+    if state.bonds_tickers:
+        state.interpolation_method = render_interpolation_selector(st.sidebar)
 
         # Layout (post-data)
-        cont0.title(f"Bond yields: *{shared.target_country.title()}*")
+        cont0.title(f"Bond yields: *{state.target_country.title()}*")
         left0, right0 = cont0.columns([0.8, 0.2])
         selected_dates = render_dates_selector(right0)
 
-        # Content
+        # Content (`plotting` pulls in plotly, so only imported once needed)
+        from .plotting import plot_yield_curve
+
         plot_yield_curve(
-            active_bonds=shared.bonds_active,
+            active_bonds=state.bonds_active,
             active_dates=selected_dates,
             container=left0,
         )
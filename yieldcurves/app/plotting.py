@@ -14,8 +14,9 @@ import plotly.graph_objects as go
 import plotly.express as px
 from streamlit.delta_generator import DeltaGenerator
 
-from yieldcurves.utils import get_terms, get_tickvals, interpolate_curve, sort_by_term
-from yieldcurves import settings
+from yieldcurves.fitting import MODELS, evaluate_curves, fit_curves
+from yieldcurves.utils import get_terms, get_tickvals, interpolate_curves, sort_by_term
+from yieldcurves import metrics, settings
 from . import shared
 
 
@@ -29,16 +30,18 @@ logger = logging.getLogger(__name__)
 COLORS = px.colors.qualitative.Plotly
 
 
+@metrics.timed("plot")
 def plot_yield_curve(
     active_bonds: List[str],
     active_dates: List[Union[str, datetime]],
     container: DeltaGenerator,
 ):
+    state = shared.get_state()
     sorted_tickers = sort_by_term(active_bonds)
     terms = get_terms(sorted_tickers)
     tickvals = get_tickvals(terms)
 
-    idx = shared.bonds_df.index
+    idx = state.bonds_df.index
     for i, date in enumerate(active_dates):
         if date not in idx:
             logger.warning(f"{date} not found in index. Stepping to closest date.")
@@ -48,10 +51,20 @@ def plot_yield_curve(
                 new_date = idx[-1].strftime(settings.DATE_FORMAT)
             active_dates[i] = new_date
 
-    data = shared.bonds_df.loc[active_dates, sorted_tickers].T
-    data.index = tickvals
-    data = data.reindex(np.arange(1, tickvals[-1] + 1))  # Reindex to longest mty
-    max_tick = tickvals[-1] + 12 if "y" in shared.bonds_terms[-1] else 1
+    data = state.bonds_df.loc[active_dates, sorted_tickers]
+    data.columns = tickvals
+    max_tick = tickvals[-1] + 12 if "y" in state.bonds_terms[-1] else 1
+    with metrics.span("interpolate"):
+        if state.interpolation_method in MODELS:
+            # Parametric curves extrapolate smoothly up to the edge of the plot
+            grid = np.arange(1, max_tick + 1)
+            params = fit_curves(data, model=state.interpolation_method)
+            curves = evaluate_curves(params, grid)
+        else:
+            grid = np.arange(1, tickvals[-1] + 1)  # Up to longest mty
+            method = state.interpolation_method
+            curves = interpolate_curves(data, method=method, grid=grid)
+    data = data.T.reindex(grid)
 
     fig = go.Figure(
         layout=dict(
@@ -98,16 +111,16 @@ def plot_yield_curve(
         )
 
         # Add interpolated curve
-        curve = interpolate_curve(series, method=shared.interpolation_method)
-        if curve is not None:
-            fig.add_trace(
-                go.Scatter(
-                    x=curve.index,
-                    y=curve.values,
-                    line=dict(width=0.75, color=color),
-                    showlegend=False,
-                )
+        curve = curves.iloc[i]
+        fig.add_trace(
+            go.Scatter(
+                x=curve.index,
+                y=curve.values,
+                line=dict(width=0.75, color=color),
+                showlegend=False,
             )
+        )
 
     container.subheader("Yield curve")
-    container.plotly_chart(fig, use_container_width=True)
+    with metrics.span("plot_render"):
+        container.plotly_chart(fig, use_container_width=True)
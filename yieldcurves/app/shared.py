@@ -2,21 +2,36 @@
 yieldcurves.app.shared
 ~~~~~~~~~~~~~~~~~~~~~~
 
-This module defines variables shared across the app.
+This module defines the state shared across the app, scoped to each user session.
 """
 
-from typing import List, Set
+from typing import Any, Callable, Dict
 
 import pandas as pd
+import streamlit as st
 
 
-target_country: str = ""
+__all__ = ("get_state",)
 
-bonds_df: pd.DataFrame = pd.DataFrame()
-bonds_tickers: List[str] = []
-bonds_terms: List[str] = []
-bonds_active: Set[str] = set()
 
-selected_dates: List[str] = []
+# Globals
+# ----
+# Factories for the default value of each state variable
+DEFAULTS: Dict[str, Callable[[], Any]] = dict(
+    target_country=str,
+    bonds_df=pd.DataFrame,  # Shared across sessions, must be treated as read-only
+    bonds_tickers=list,
+    bonds_terms=list,
+    bonds_active=set,
+    selected_dates=list,
+    interpolation_method=lambda: "cubic",
+)
 
-interpolation_method: str = "cubic"
+
+def get_state():
+    """Returns the state of the current user session, initialized with defaults"""
+    state = st.session_state
+    for key, factory in DEFAULTS.items():
+        if key not in state:
+            state[key] = factory()
+    return state
@@ -0,0 +1,540 @@
+"""
+yieldcurves.backends
+~~~~~~~~~~~~~~~~~~~~
+
+Cache backends to persist/cache requests to investpy. The MongoDB-based
+`dbm.Manager` is one implementation; `ParquetBackend` stores data in local files.
+"""
+
+import glob
+import json
+import logging
+import os
+import tempfile
+import threading
+from functools import partial
+from typing import BinaryIO, Callable, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from . import settings
+from .coverage import add_interval
+from .rollups import RESOLUTIONS, get_window, resample_ohlc, update_rollup
+
+
+__all__ = (
+    "CacheBackend",
+    "LazyCacheBackend",
+    "ParquetBackend",
+    "get_cache_backend",
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+# Globals
+# ----
+pa = pq = None  # `pyarrow`, imported on first use (see `_import_pyarrow`)
+ROLLUPS = tuple(k for k, v in RESOLUTIONS.items() if v)  # Stored resolutions
+_UNSET = object()
+
+
+def _import_pyarrow():
+    global pa, pq
+
+    if pq is None:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+
+class CacheBackend:
+    """Interface for storing OHLC yield data, keyed by DB ticker (e.g. brazil_5y)"""
+
+    def setup(self):
+        """One-time setup of the storage, e.g. creating DB indexes"""
+
+    def find(
+        self,
+        ticker: str,
+        from_date: Optional[str] = None,
+        to_date: Optional[str] = None,
+    ) -> Optional[pd.DataFrame]:
+        """Query a ticker from the cache
+
+        ...
+
+        Parameters
+        ----------
+        ticker : str
+        from_date : str
+            in YYYY-MM-DD format
+        to_date : str
+            in YYYY-MM-DD format
+        """
+        raise NotImplementedError
+
+    def list_tickers(self) -> List[str]:
+        """All tickers in the cache"""
+        raise NotImplementedError
+
+    def find_many(
+        self,
+        tickers: List[str],
+        from_date: Optional[str] = None,
+        to_date: Optional[str] = None,
+    ) -> Dict[str, pd.DataFrame]:
+        """Query multiple tickers from the cache, skipping missing ones
+
+        ...
+
+        Parameters
+        ----------
+        tickers : List[str]
+        from_date : str
+            in YYYY-MM-DD format
+        to_date : str
+            in YYYY-MM-DD format
+        """
+        out = {}
+        for ticker in tickers:
+            df = self.find(ticker, from_date, to_date)
+            if df is not None:
+                out[ticker.lower()] = df
+        return out
+
+    def find_tail(
+        self, tickers: List[str], n_rows: int
+    ) -> Tuple[Dict[str, pd.DataFrame], Dict[str, dict]]:
+        """Query the last `n_rows` of multiple tickers from the cache, along with
+        their coverage records (see `coverage`), skipping missing ones
+
+        ...
+
+        Parameters
+        ----------
+        tickers : List[str]
+        n_rows : int
+        """
+        data = {k: df.tail(n_rows) for k, df in self.find_many(tickers).items()}
+        return data, self.find_coverage(tickers)
+
+    def find_rollups(
+        self,
+        tickers: List[str],
+        resolution: str,
+        from_date: Optional[str] = None,
+        to_date: Optional[str] = None,
+    ) -> Dict[str, pd.DataFrame]:
+        """Query `resolution` rollups (see `rollups`) of multiple tickers, for the
+        periods overlapping the window, skipping missing ones
+
+        Daily data is rolled up on the fly, unless overridden by backends storing
+        rollups.
+
+        Parameters
+        ----------
+        tickers : List[str]
+        resolution : str
+            one of `rollups.RESOLUTIONS`
+        from_date : str
+            in YYYY-MM-DD format
+        to_date : str
+            in YYYY-MM-DD format
+        """
+        data = self.find_many(tickers, *get_window(from_date, to_date, resolution))
+        return {k: resample_ohlc(df, resolution) for k, df in data.items()}
+
+    def write(self, data: pd.DataFrame) -> Dict[str, int]:
+        """Write multiple time series with yield data (as
+        returned from `investpy`) to the cache
+
+        ...
+
+        Parameters
+        ----------
+        data : pd.DataFrame
+            with (ticker, field) MultiIndex columns
+
+        Returns
+        -------
+        Dict[str, int]
+            # of rows written per ticker
+        """
+        raise NotImplementedError
+
+    def find_coverage(self, tickers: List[str]) -> Dict[str, dict]:
+        """Query the coverage records (see `coverage`) of multiple tickers,
+        skipping missing ones"""
+        return {}
+
+    def write_coverage(
+        self, ticker: str, from_date: str, to_date: str, modified: bool = True
+    ):
+        """Mark [`from_date`, `to_date`] as requested for `ticker`, even if no
+        data was found for that range
+
+        ...
+
+        Parameters
+        ----------
+        ticker : str
+        from_date : str
+            in YYYY-MM-DD format
+        to_date : str
+            in YYYY-MM-DD format
+        modified : bool
+            whether any rows of `ticker` were added or changed by the request
+        """
+        ticker = ticker.lower()
+        record = self.find_coverage([ticker]).get(ticker)
+        record = add_interval(
+            record,
+            pd.to_datetime(from_date),
+            pd.to_datetime(to_date),
+            modified=modified,
+        )
+        self._save_coverage(ticker, record)
+
+    def _save_coverage(self, ticker: str, record: dict):
+        """Persist a coverage record (not persisted unless overridden)"""
+
+
+class ParquetBackend(CacheBackend):
+    """Stores each ticker in a local Parquet file, under `root`/country/ticker
+
+    Reads are memory-mapped and filtered on date at the row group level, while
+    writes merge new rows into the existing file and atomically replace it.
+    """
+
+    ROW_GROUP_SIZE = 256  # ~1 year of daily data
+
+    def __init__(self, root: Optional[str] = None):
+        try:
+            _import_pyarrow()
+        except ImportError:
+            raise ImportError("`pyarrow` is required for the parquet backend")
+
+        self.root = root or settings.CACHE_DIR
+        self._lock = threading.Lock()
+
+    def get_path(self, ticker: str, ext: str = "parquet") -> str:
+        """Path of the file holding `ticker`, e.g. brazil_5y -> brazil/brazil_5y"""
+        ticker = ticker.lower().replace(" ", "_")
+        country = ticker.rsplit("_", 1)[0]
+        return os.path.join(self.root, country, f"{ticker}.{ext}")
+
+    def get_rollup_path(self, ticker: str, resolution: str) -> str:
+        """Path of the file holding `ticker`'s rollups, e.g. brazil_5y ->
+        brazil/weekly/brazil_5y"""
+        path = self.get_path(ticker)
+        return os.path.join(os.path.dirname(path), resolution, os.path.basename(path))
+
+    def list_tickers(self) -> List[str]:
+        pattern = os.path.join(glob.escape(self.root), "*", "*.parquet")
+        return sorted(
+            os.path.basename(path)[: -len(".parquet")] for path in glob.glob(pattern)
+        )
+
+    def find(
+        self,
+        ticker: str,
+        from_date: Optional[str] = None,
+        to_date: Optional[str] = None,
+    ) -> Optional[pd.DataFrame]:
+        """Query a ticker from the cache
+
+        ...
+
+        Parameters
+        ----------
+        ticker : str
+        from_date : str
+            in YYYY-MM-DD format
+        to_date : str
+            in YYYY-MM-DD format
+        """
+        return self._read(self.get_path(ticker), from_date, to_date)
+
+    @staticmethod
+    def _read(
+        path: str, from_date: Optional[str] = None, to_date: Optional[str] = None
+    ) -> Optional[pd.DataFrame]:
+        if not os.path.exists(path):
+            return
+
+        filters = []
+        if from_date:
+            filters.append(("dates", ">=", pd.to_datetime(from_date)))
+        if to_date:
+            filters.append(("dates", "<=", pd.to_datetime(to_date)))
+
+        table = pq.read_table(path, filters=filters or None, memory_map=True)
+        return table.to_pandas().set_index("dates")
+
+    def find_rollups(
+        self,
+        tickers: List[str],
+        resolution: str,
+        from_date: Optional[str] = None,
+        to_date: Optional[str] = None,
+    ) -> Dict[str, pd.DataFrame]:
+        """Query `resolution` rollups (see `rollups`) of multiple tickers, for the
+        periods overlapping the window, skipping missing ones
+
+        Tickers written before rollups were stored are rolled up on the fly.
+
+        Parameters
+        ----------
+        tickers : List[str]
+        resolution : str
+            one of `rollups.RESOLUTIONS`
+        from_date : str
+            in YYYY-MM-DD format
+        to_date : str
+            in YYYY-MM-DD format
+        """
+        if resolution not in ROLLUPS:
+            return super().find_rollups(tickers, resolution, from_date, to_date)
+
+        # Rollups are labeled by the last day of their period
+        _, to_date = get_window(from_date, to_date, resolution)
+        out = {}
+        missing = []
+        for ticker in tickers:
+            path = self.get_rollup_path(ticker, resolution)
+            df = self._read(path, from_date, to_date)
+            if df is not None:
+                out[ticker.lower()] = df
+            elif os.path.exists(self.get_path(ticker)):
+                missing.append(ticker)
+
+        if missing:
+            out.update(super().find_rollups(missing, resolution, from_date, to_date))
+        return out
+
+    def find_tail(
+        self, tickers: List[str], n_rows: int
+    ) -> Tuple[Dict[str, pd.DataFrame], Dict[str, dict]]:
+        """Query the last `n_rows` of multiple tickers from the cache, along with
+        their coverage records (see `coverage`), skipping missing ones
+
+        Only the trailing row groups of each file are read.
+
+        Parameters
+        ----------
+        tickers : List[str]
+        n_rows : int
+        """
+        data = {}
+        for ticker in tickers:
+            path = self.get_path(ticker)
+            if not os.path.exists(path):
+                continue
+
+            f = pq.ParquetFile(path, memory_map=True)
+            row_groups = []
+            n_found = 0
+            for i in reversed(range(f.num_row_groups)):
+                row_groups.insert(0, i)
+                n_found += f.metadata.row_group(i).num_rows
+                if n_found >= n_rows:
+                    break
+
+            df = f.read_row_groups(row_groups).to_pandas().set_index("dates")
+            data[ticker.lower()] = df.tail(n_rows)
+
+        return data, self.find_coverage(tickers)
+
+    def write(self, data: pd.DataFrame) -> Dict[str, int]:
+        """Write multiple time series with yield data (as
+        returned from `investpy`) to the cache
+
+        Rows are merged into existing files (new values take precedence), and
+        files left unchanged are not rewritten. Rollups of the periods changed
+        are updated along.
+
+        Parameters
+        ----------
+        data : pd.DataFrame
+            with (ticker, field) MultiIndex columns
+
+        Returns
+        -------
+        Dict[str, int]
+            # of rows written (new or changed) per ticker
+        """
+        assert data.columns.nlevels > 1, "Columns must be MultiIndex"
+
+        data = data.rename(str.lower, axis=1)
+        bonds = data.columns.get_level_values(0)
+
+        counts = {}
+        with self._lock:
+            for ticker, df in data.groupby(bonds, axis=1):
+                df = df[ticker].dropna(how="all")  # Drop level 0 and missing rows
+                ticker = ticker.replace(" ", "_")
+                df.index.name = "dates"
+
+                old = self.find(ticker)
+                if old is None:
+                    old = pd.DataFrame(columns=df.columns)
+                df = df.sort_index().combine_first(old)
+
+                changed = df.index[get_changed_rows(df, old).to_numpy()]
+                counts[ticker] = len(changed)
+                if counts[ticker]:
+                    self._write_table(self.get_path(ticker), df)
+                    for resolution in ROLLUPS:
+                        self._write_rollup(ticker, resolution, df, changed)
+
+        return counts
+
+    def _write_table(self, path: str, df: pd.DataFrame):
+        table = pa.Table.from_pandas(df.reset_index(), preserve_index=False)
+        self._replace(
+            path, partial(pq.write_table, table, row_group_size=self.ROW_GROUP_SIZE)
+        )
+
+    def _write_rollup(
+        self, ticker: str, resolution: str, df: pd.DataFrame, changed: pd.Index
+    ):
+        """Update the rollups of the periods with `changed` dates, from all daily
+        rows `df` (or roll them all up, if not yet stored)"""
+        path = self.get_rollup_path(ticker, resolution)
+        old = self._read(path)
+        if old is None:
+            rollup = resample_ohlc(df, resolution)
+        else:
+            start, end = get_window(changed.min(), changed.max(), resolution)
+            rollup = update_rollup(old, df.loc[start:end], resolution)
+        self._write_table(path, rollup)
+
+    def find_coverage(self, tickers: List[str]) -> Dict[str, dict]:
+        """Query the coverage records (see `coverage`) of multiple tickers,
+        skipping missing ones"""
+        out = {}
+        for ticker in tickers:
+            path = self.get_path(ticker, "coverage.json")
+            if os.path.exists(path):
+                with open(path) as f:
+                    record = json.load(f)
+                out[ticker.lower()] = {
+                    "intervals": [
+                        pd.to_datetime(i).tolist() for i in record["intervals"]
+                    ],
+                    "checked_at": pd.Timestamp(record["checked_at"]),
+                    "updated_at": pd.Timestamp(
+                        record.get("updated_at", record["checked_at"])
+                    ),
+                }
+        return out
+
+    def _save_coverage(self, ticker: str, record: dict):
+        record = {
+            "intervals": [
+                [s.isoformat(), e.isoformat()] for s, e in record["intervals"]
+            ],
+            "checked_at": record["checked_at"].isoformat(),
+            "updated_at": record["updated_at"].isoformat(),
+        }
+        with self._lock:
+            self._replace(
+                self.get_path(ticker, "coverage.json"),
+                lambda f: f.write(json.dumps(record).encode()),
+            )
+
+    @staticmethod
+    def _replace(path: str, dump: Callable[[BinaryIO], None]):
+        """Atomically replace the file at `path` with the output of `dump`"""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                dump(f)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+
+def get_changed_rows(new: pd.DataFrame, old: pd.DataFrame) -> pd.Series:
+    """Mask of rows in `new` that are missing or different in `old`"""
+    old = old.reindex(index=new.index, columns=new.columns)
+    same = (new == old) | (new.isna() & old.isna())
+    return ~same.all(axis=1)
+
+
+def get_cache_backend(name: Optional[str] = None) -> Optional[CacheBackend]:
+    """Build the cache backend `name`, defaulting to `settings.CACHE_BACKEND`
+
+    ...
+
+    Parameters
+    ----------
+    name : str, optional
+        one of {mongo, parquet, none}
+    """
+    name = name or settings.CACHE_BACKEND
+    if name == "none":
+        return
+    elif name == "parquet":
+        return ParquetBackend()
+    elif name == "mongo":
+        try:
+            from .dbm import BucketManager, Manager
+        except ImportError:
+            logger.warning("`pymongo` not installed. Running without cache.")
+            return
+        if settings.DB_SCHEMA == "bucket":
+            return BucketManager()
+        return Manager()
+
+    raise ValueError(f"Unrecognized cache backend [{name}]")
+
+
+class LazyCacheBackend:
+    """Proxy to the cache backend `name`, created on first use (e.g. connecting to
+    MongoDB only when data is first requested) and once per process
+
+    The backend is dropped in forked children (e.g. Streamlit or server workers),
+    which create their own on first use, as `pymongo` clients are not fork-safe.
+    Evaluates to `False` if no backend is available.
+
+    Parameters
+    ----------
+    name : str, optional
+        one of {mongo, parquet, none}, defaults to `settings.CACHE_BACKEND`
+    """
+
+    def __init__(self, name: Optional[str] = None):
+        self.name = name
+        self._reset()
+        if hasattr(os, "register_at_fork"):  # Not available on Windows
+            os.register_at_fork(after_in_child=self._reset)
+
+    def _reset(self):
+        self._backend = _UNSET
+        self._lock = threading.Lock()
+
+    def resolve(self) -> Optional[CacheBackend]:
+        """The underlying backend, created on first call"""
+        if self._backend is _UNSET:
+            with self._lock:
+                if self._backend is _UNSET:
+                    self._backend = get_cache_backend(self.name)
+        return self._backend
+
+    def __bool__(self) -> bool:
+        return self.resolve() is not None
+
+    def __getattr__(self, attr: str):
+        backend = self.resolve()
+        if backend is None:
+            raise AttributeError(f"No cache backend available [{attr}]")
+        return getattr(backend, attr)
+
+    def __repr__(self) -> str:
+        state = "unresolved" if self._backend is _UNSET else repr(self._backend)
+        return f"{self.__class__.__name__}({state})"
@@ -0,0 +1,127 @@
+"""
+yieldcurves.cli
+~~~~~~~~~~~~~~~
+
+Command line entry point, e.g. `python -m yieldcurves refresh brazil japan`,
+`python -m yieldcurves export brazil`, `python -m yieldcurves analytics` or
+`python -m yieldcurves serve --port 8050`.
+"""
+
+import argparse
+import logging
+from typing import List, Optional
+
+from . import settings
+
+
+__all__ = ("main",)
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(prog="python -m yieldcurves")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    refresh = commands.add_parser(
+        "refresh", help="periodically pull the newest data into the cache"
+    )
+    refresh.add_argument(
+        "countries",
+        nargs="*",
+        default=settings.REFRESH_COUNTRIES,
+        help="defaults to `settings.REFRESH_COUNTRIES`",
+    )
+    refresh.add_argument("--interval", type=float, default=settings.REFRESH_INTERVAL)
+    refresh.add_argument("--jitter", type=float, default=settings.REFRESH_JITTER)
+    refresh.add_argument("--workers", type=int, default=settings.REFRESH_WORKERS)
+    refresh.add_argument("--lookback", type=int, default=settings.REFRESH_LOOKBACK_DAYS)
+    refresh.add_argument("--once", action="store_true", help="run a single cycle")
+    refresh.add_argument(
+        "--analytics",
+        action="store_true",
+        help="update analytics after each cycle",
+    )
+
+    commands.add_parser("setup", help="setup the cache backend (run once)")
+
+    export = commands.add_parser(
+        "export", help="export the cache to a Parquet dataset, by country and year"
+    )
+    export.add_argument(
+        "countries", nargs="*", help="defaults to all countries in the cache"
+    )
+    export.add_argument("--root", default=settings.EXPORT_DIR)
+    export.add_argument("--from", dest="from_date", help="in YYYY-MM-DD format")
+    export.add_argument("--to", dest="to_date", help="in YYYY-MM-DD format")
+    export.add_argument(
+        "--full",
+        action="store_true",
+        help="also export bonds unchanged since the last export",
+    )
+    export.add_argument("--batch-size", type=int, default=settings.EXPORT_BATCH_SIZE)
+
+    analytics = commands.add_parser(
+        "analytics", help="update cross-country slopes, butterflies and spreads"
+    )
+    analytics.add_argument(
+        "countries",
+        nargs="*",
+        default=settings.REFRESH_COUNTRIES,
+        help="defaults to `settings.REFRESH_COUNTRIES`",
+    )
+    analytics.add_argument("--from", dest="from_date", help="in DD/MM/YYYY format")
+    analytics.add_argument("--benchmark", default=settings.ANALYTICS_BENCHMARK)
+    analytics.add_argument("--window", type=int, default=settings.ANALYTICS_WINDOW)
+    analytics.add_argument("--full", action="store_true", help="recompute all dates")
+
+    serve = commands.add_parser("serve", help="serve cached curves over HTTP")
+    serve.add_argument("--host", default=settings.SERVER_HOST)
+    serve.add_argument("--port", type=int, default=settings.SERVER_PORT)
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(
+        level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s"
+    )
+
+    if args.command == "refresh":
+        from .refresh import run_refresher
+
+        run_refresher(
+            args.countries,
+            interval=args.interval,
+            jitter=args.jitter,
+            workers=args.workers,
+            lookback_days=args.lookback,
+            once=args.once,
+            analytics=args.analytics,
+        )
+    elif args.command == "setup":
+        from .backends import get_cache_backend
+
+        backend = get_cache_backend()
+        if backend is not None:
+            backend.setup()
+    elif args.command == "export":
+        from .export import export_cache
+
+        export_cache(
+            args.root,
+            countries=args.countries or None,
+            from_date=args.from_date,
+            to_date=args.to_date,
+            full=args.full,
+            batch_size=args.batch_size,
+        )
+    elif args.command == "analytics":
+        from .analytics import update_analytics
+
+        update_analytics(
+            args.countries,
+            from_date=args.from_date,
+            benchmark=args.benchmark,
+            window=args.window,
+            full=args.full,
+        )
+    elif args.command == "serve":
+        from .server import make_server
+
+        make_server(args.host, args.port).serve_forever()
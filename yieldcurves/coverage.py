@@ -0,0 +1,144 @@
+"""
+yieldcurves.coverage
+~~~~~~~~~~~~~~~~~~~~
+
+Helpers to keep track of the date ranges already requested for each ticker,
+including ranges known to be empty, so only truly missing data is fetched.
+
+Coverage records are plain dicts, persisted by the cache backends:
+
+    {"intervals": [[start, end], ...], "checked_at": datetime, "updated_at": datetime}
+
+where intervals are inclusive, sorted and non-overlapping, `checked_at` is the
+last time the most recent covered date was requested, and `updated_at` the last
+time cached data was added or changed (re-checks finding nothing new leave it
+untouched).
+"""
+
+from datetime import datetime
+from typing import Iterable, List, Optional, Tuple
+
+import pandas as pd
+
+from . import settings
+
+
+__all__ = (
+    "add_interval",
+    "get_covered_intervals",
+    "get_last_modified",
+    "merge_intervals",
+    "subtract_intervals",
+)
+
+
+Interval = Tuple[pd.Timestamp, pd.Timestamp]
+ONE_DAY = pd.Timedelta("1D")
+
+
+def merge_intervals(intervals: Iterable[Interval]) -> List[Interval]:
+    """Sort and merge overlapping (or adjacent) inclusive date intervals"""
+    merged = []
+    for start, end in sorted((pd.Timestamp(s), pd.Timestamp(e)) for s, e in intervals):
+        if merged and start <= merged[-1][1] + ONE_DAY:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def subtract_intervals(
+    start: pd.Timestamp,
+    end: pd.Timestamp,
+    intervals: Iterable[Interval],
+) -> List[Interval]:
+    """Return the parts of [`start`, `end`] not covered by `intervals`"""
+    gaps = []
+    for s, e in merge_intervals(intervals):
+        if e < start:
+            continue
+        if s > end:
+            break
+        if s > start:
+            gaps.append((start, s - ONE_DAY))
+        start = e + ONE_DAY
+        if start > end:
+            return gaps
+
+    gaps.append((start, end))
+    return gaps
+
+
+def add_interval(
+    record: Optional[dict],
+    start: pd.Timestamp,
+    end: pd.Timestamp,
+    now: Optional[datetime] = None,
+    modified: bool = True,
+) -> dict:
+    """Add [`start`, `end`] to a coverage `record`, ignoring future dates, and
+    bump `updated_at` if cached data was `modified`"""
+    now = pd.Timestamp(now or datetime.now())
+    record = record or {"intervals": [], "checked_at": None}
+
+    end = min(pd.Timestamp(end), now.normalize())
+    if pd.Timestamp(start) > end:
+        return record
+
+    intervals = merge_intervals([*record["intervals"], (start, end)])
+    checked_at = record["checked_at"]
+    if checked_at is None or end >= intervals[-1][1]:
+        checked_at = now
+    updated_at = record.get("updated_at")
+    if modified or updated_at is None:
+        updated_at = now
+
+    return {
+        "intervals": [[s.to_pydatetime(), e.to_pydatetime()] for s, e in intervals],
+        "checked_at": pd.Timestamp(checked_at).to_pydatetime(),
+        "updated_at": pd.Timestamp(updated_at).to_pydatetime(),
+    }
+
+
+def get_covered_intervals(
+    record: Optional[dict],
+    now: Optional[datetime] = None,
+    ttl: Optional[int] = None,
+) -> List[Interval]:
+    """Intervals in a coverage `record` that can be trusted as of `now`
+
+    ...
+
+    Parameters
+    ----------
+    record : dict, optional
+    now : datetime, optional
+    ttl : int, optional
+        # of seconds after which dates on or after the last check are
+        considered stale (defaults to `settings.RECENT_DATA_TTL`)
+    """
+    if not record or not record["intervals"]:
+        return []
+
+    now = pd.Timestamp(now or datetime.now())
+    ttl = settings.RECENT_DATA_TTL if ttl is None else ttl
+    intervals = merge_intervals(record["intervals"])
+
+    # Data for the last checked date may have been incomplete at the time
+    checked_at = pd.Timestamp(record["checked_at"])
+    if now - checked_at > pd.Timedelta(seconds=ttl):
+        last_valid = checked_at.normalize() - ONE_DAY
+        intervals = [(s, min(e, last_valid)) for s, e in intervals if s <= last_valid]
+
+    return intervals
+
+
+def get_last_modified(records: Iterable[dict]) -> Optional[datetime]:
+    """Last time cached data of any of the coverage `records` changed, falling
+    back to `checked_at` for records predating `updated_at`"""
+    stamps = [
+        pd.Timestamp(record.get("updated_at") or record["checked_at"])
+        for record in records
+        if record
+    ]
+    return max(stamps).to_pydatetime() if stamps else None
@@ -0,0 +1,197 @@
+"""
+yieldcurves.cube
+~~~~~~~~~~~~~~~~
+
+Compact, array-backed container for a country's curve history, as an alternative
+to the (ticker, field) MultiIndex frames returned by `get_ohlc_yield_history`.
+"""
+
+from typing import Iterable, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+from .universe import get_bond_info, get_term_months
+from .utils import sort_by_term
+
+
+__all__ = ("YieldCube",)
+
+
+# Globals
+# ----
+FIELDS = ("open", "high", "low", "close")
+
+DateLike = Union[str, np.datetime64, pd.Timestamp]
+
+
+class YieldCube:
+    """(date x tenor x field) array of yields, sorted by date and tenor
+
+    Dates are stored as int64 nanoseconds and tenors as # of months, so lookups
+    are binary searches (dates) or dict hits (tenors, fields). Slicing by a
+    single date, tenor or field, or by a range of dates, returns views over the
+    same buffer rather than copies.
+
+    Parameters
+    ----------
+    values : np.ndarray
+        of shape (# dates, # tenors, # fields)
+    dates : Sequence
+        sorted dates, as anything `pd.DatetimeIndex` accepts
+    tickers : Sequence[str]
+        sorted by term, e.g. ["brazil_1y", "brazil_5y"]
+    fields : Sequence[str]
+    """
+
+    def __init__(
+        self,
+        values: np.ndarray,
+        dates: Sequence,
+        tickers: Sequence[str],
+        fields: Sequence[str] = FIELDS,
+    ):
+        self.values = values
+        self.dates = pd.DatetimeIndex(dates).asi8
+        self.tickers = list(tickers)
+        self.tenors = np.array(
+            [get_bond_info(ticker)["months"] for ticker in self.tickers],
+            dtype=np.int64,
+        )
+        self.fields = list(fields)
+
+        expected = (len(self.dates), len(self.tickers), len(self.fields))
+        if values.shape != expected:
+            raise ValueError(f"Expected shape {expected}, got {values.shape}")
+        if np.any(np.diff(self.dates) <= 0):
+            raise ValueError("Dates must be sorted and unique")
+
+        self._tenor_pos = {}
+        for i, months in enumerate(self.tenors):
+            self._tenor_pos.setdefault(months, i)  # Months before years, as sorted
+        self._field_pos = {field: i for i, field in enumerate(self.fields)}
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+    def __repr__(self) -> str:
+        n_dates, n_tenors, n_fields = self.values.shape
+        return (
+            f"YieldCube({n_dates} dates x {n_tenors} tenors x {n_fields} fields, "
+            f"{self.values.dtype})"
+        )
+
+    @property
+    def index(self) -> pd.DatetimeIndex:
+        return pd.DatetimeIndex(self.dates)
+
+    @property
+    def nbytes(self) -> int:
+        """Memory footprint of the underlying arrays"""
+        return self.values.nbytes + self.dates.nbytes + self.tenors.nbytes
+
+    @classmethod
+    def from_frame(
+        cls,
+        df: pd.DataFrame,
+        fields: Optional[Iterable[str]] = None,
+        dtype: np.dtype = np.float64,
+    ) -> "YieldCube":
+        """Build a cube from a frame with (ticker, field) MultiIndex columns, as
+        returned by `get_ohlc_yield_history` (tickers without a term are dropped)
+
+        ...
+
+        Parameters
+        ----------
+        df : pd.DataFrame
+        fields : Iterable[str], optional
+            defaults to all fields present in `df`
+        dtype : np.dtype
+            e.g. `np.float32` to halve the footprint
+        """
+        tickers = sort_by_term(list(df.columns.unique(0)))
+        if fields is None:
+            fields = [field for field in FIELDS if field in df.columns.unique(1)]
+        fields = list(fields)
+
+        df = df.sort_index()
+        columns = pd.MultiIndex.from_product((tickers, fields))
+        values = df.reindex(columns=columns).to_numpy(dtype=dtype)
+        values = values.reshape(len(df), len(tickers), len(fields))
+
+        return cls(np.ascontiguousarray(values), df.index, tickers, fields)
+
+    def to_frame(self) -> pd.DataFrame:
+        """Convert back to a frame with (ticker, field) MultiIndex columns"""
+        n_dates = len(self.dates)
+        return pd.DataFrame(
+            self.values.reshape(n_dates, -1),
+            index=self.index,
+            columns=pd.MultiIndex.from_product((self.tickers, self.fields)),
+        )
+
+    def date_pos(self, date: DateLike) -> int:
+        """Position of `date` in the date axis (O(log n))"""
+        value = _to_ns(date)
+        i = np.searchsorted(self.dates, value)
+        if i == len(self.dates) or self.dates[i] != value:
+            raise KeyError(date)
+        return int(i)
+
+    def tenor_pos(self, tenor: Union[int, str]) -> int:
+        """Position of `tenor` (in months, or a term e.g. 5Y) in the tenor axis"""
+        months = tenor
+        if isinstance(tenor, str):
+            months = get_term_months(tenor)
+        try:
+            return self._tenor_pos[months]
+        except KeyError:
+            raise KeyError(tenor) from None
+
+    def field_pos(self, field: str) -> int:
+        """Position of `field` in the field axis"""
+        return self._field_pos[field.lower()]
+
+    def between(
+        self,
+        start: Optional[DateLike] = None,
+        end: Optional[DateLike] = None,
+    ) -> "YieldCube":
+        """Dates within [`start`, `end`], as a view over the same buffer"""
+        i = 0 if start is None else np.searchsorted(self.dates, _to_ns(start))
+        j = (
+            len(self.dates)
+            if end is None
+            else np.searchsorted(self.dates, _to_ns(end), side="right")
+        )
+        return self._view(slice(i, j))
+
+    def at(self, date: DateLike) -> np.ndarray:
+        """(tenor x field) view of a single date"""
+        return self.values[self.date_pos(date)]
+
+    def tenor(self, tenor: Union[int, str]) -> np.ndarray:
+        """(date x field) view of a single tenor"""
+        return self.values[:, self.tenor_pos(tenor)]
+
+    def field(self, field: str) -> np.ndarray:
+        """(date x tenor) view of a single field, e.g. close"""
+        return self.values[:, :, self.field_pos(field)]
+
+    def curves(self, dates: Iterable[DateLike], field: str = "close") -> np.ndarray:
+        """(date x tenor) curves of `field` at `dates` (a copy, as dates are
+        arbitrary)"""
+        rows = [self.date_pos(date) for date in dates]
+        return self.values[rows, :, self.field_pos(field)]
+
+    def _view(self, dates: slice) -> "YieldCube":
+        cube = object.__new__(YieldCube)
+        cube.__dict__.update(self.__dict__)
+        cube.values = self.values[dates]
+        cube.dates = self.dates[dates]
+        return cube
+
+
+def _to_ns(date: DateLike) -> int:
+    return pd.Timestamp(date).value
@@ -6,27 +6,27 @@ This module defines functions to get yield data.
 """
 
 import logging
-from datetime import datetime
-from time import sleep
-from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from datetime import datetime, timedelta
+from typing import Iterable, List, Optional, Union
 
 import pandas as pd
-import investpy
-
-from . import settings
-
-try:
-    import pymongo
-except ImportError:
-    Manager = None
-else:
-    from .dbm import Manager
-from .utils import flip_date_format, search_country
 
+from . import metrics, settings
+from .backends import CacheBackend, LazyCacheBackend
+from .coverage import get_covered_intervals, subtract_intervals
+from .gateway import Gateway
+from .locks import country_lock
+from .providers import get_provider
+from .rollups import pick_resolution, resample_ohlc
+from .universe import get_bond_info
+from .utils import flip_date_format
 
 __all__ = (
     "get_recent_yield",
     "get_ohlc_yield_history",
+    "get_ohlc_yield_panel",
 )
 
 
@@ -37,17 +37,24 @@ logger = logging.getLogger(__name__)
 # ----
 TODAY = datetime.today().date()
 TODAY_STR = TODAY.strftime("%d/%m/%Y")
-LOCAL_DB_MANAGER = Manager() if Manager else None
+LOCAL_CACHE_BACKEND = LazyCacheBackend()  # Created on first use
+DATA_PROVIDER = get_provider()
+UPSTREAM_GATEWAY = Gateway()
 
 
 def get_recent_yield(
     country_name: str,
     field: str = "Close",
     n_rows: int = 22,
+    backend: Optional[CacheBackend] = LOCAL_CACHE_BACKEND,
+    max_workers: Optional[int] = None,
+    lock: bool = True,
 ) -> Optional[pd.DataFrame]:
     """Returns the most recent yield data for `country_name`
 
-    ...
+    Only the last `n_rows` of each bond are read from the cache (in a single
+    query), and only dates newer than the cached tail are requested from
+    `investpy`, for all bonds concurrently.
 
     Parameters
     ----------
@@ -56,77 +63,221 @@ def get_recent_yield(
         target field in OHLC, one of {Close, Open, High Low}
     n_rows : int
         # of rows to be returned
+    backend : CacheBackend, optional
+        cache backend, e.g. `dbm.Manager` (skipped if `None`)
+    max_workers : int, optional
+        defaults to `settings.MAX_FETCH_WORKERS`
+    lock : bool
+        whether to hold `locks.country_lock` while loading (if `backend` is set)
     """
-    tickers = search_country(country_name)
-
-    data = {}
-    for ticker in tickers:
-        df = _safely_get_ohlc_hist(ticker)
-        tries = 0
-        while tries < settings.MAX_RETRIES_ON_CONNECTION_ERROR:
-            try:
-                df = investpy.get_bond_recent_data(ticker)
-                break
-            except ConnectionError as e:
-                logger.error(e)
-                sleep(10)
-            tries += 1
-        data[ticker] = df[field].rename(ticker)
+    with metrics.span("search"):
+        tickers = DATA_PROVIDER.search_country(country_name)
+    if not tickers:
+        return
+
+    with country_lock(country_name) if backend and lock else nullcontext():
+        tails = coverage = {}
+        if backend:
+            db_tickers = [_to_db_ticker(ticker) for ticker in tickers]
+            with metrics.span("cache_read"):
+                tails, coverage = backend.find_tail(db_tickers, n_rows)
+
+        max_workers = min(max_workers or settings.MAX_FETCH_WORKERS, len(tickers))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = executor.map(
+                metrics.propagate(
+                    lambda ticker: _get_ticker_tail(
+                        ticker,
+                        n_rows,
+                        backend,
+                        tails.get(_to_db_ticker(ticker)),
+                        coverage.get(_to_db_ticker(ticker)),
+                    )
+                ),
+                tickers,
+            )
+            results = list(results)
+
+    return _assemble_recent(tickers, results, field, n_rows)
+
 
+def _assemble_recent(
+    tickers: List[str],
+    results: Iterable[Optional[pd.DataFrame]],
+    field: str,
+    n_rows: int,
+) -> Optional[pd.DataFrame]:
+    """Join `field` from each ticker's tail into a single frame"""
+    data = {
+        ticker: df[field.lower()].rename(ticker)
+        for ticker, df in zip(tickers, results)
+        if df is not None
+    }
     if data:
         df = pd.DataFrame(data)
         return df.tail(n_rows).dropna(thresh=settings.MIN_VALID_CURVE_THRESHOLD)
 
 
+def _get_ticker_tail(
+    ticker: str,
+    n_rows: int,
+    backend: Optional[CacheBackend],
+    cached: Optional[pd.DataFrame] = None,
+    coverage: Optional[dict] = None,
+) -> Optional[pd.DataFrame]:
+    """Returns the last `n_rows` of OHLC data for a single `ticker`, only
+    requesting dates after the `cached` tail from `investpy`"""
+    today = datetime.today()
+    if cached is not None and len(cached) >= n_rows:
+        from_date = cached.index[0]
+    else:
+        # Roughly twice as many calendar days as rows, to account for holidays
+        from_date = today - timedelta(days=2 * n_rows)
+
+    df = _get_ticker_history(
+        ticker,
+        from_date.strftime(settings.INVESTPY_DATE_FORMAT),
+        today.strftime(settings.INVESTPY_DATE_FORMAT),
+        backend,
+        cached,
+        coverage,
+    )
+    if df is not None:
+        return df.tail(n_rows)
+
+
 def _safely_get_ohlc_hist(
     ticker: str,
     from_date: str,
     to_date: str,
-    manager: Manager,
+    backend: Optional[CacheBackend],
 ) -> Optional[pd.DataFrame]:
-    """Wrapper around `get_bond_historical_data` to handle connection errors"""
+    """Wrapper around `DATA_PROVIDER.get_bond_historical_data`, going through
+    `UPSTREAM_GATEWAY` (rate limits, retries and coalescing of identical calls)"""
     if from_date == to_date:
         return
 
     df = None
-    tries = 0
-    while tries < settings.MAX_RETRIES_ON_CONNECTION_ERROR:
-        try:
-            df = investpy.get_bond_historical_data(
+    found = False  # Whether `investpy` answered, even if with no data
+    try:
+        with metrics.span("upstream"):
+            df = UPSTREAM_GATEWAY.call(
+                (ticker, from_date, to_date),
+                DATA_PROVIDER.get_bond_historical_data,
                 ticker,
-                from_date=from_date,
-                to_date=to_date,
+                from_date,
+                to_date,
             )
-            break
-        except IndexError as e:
-            # No bond information found for the target period at `investpy`
-            logger.error(e)
-            break
-        except ConnectionError as e:
-            logger.error(e)
-            sleep(10)
-        tries += 1
-
+        metrics.inc("upstream_requests", result="ok")
+        found = True
+    except IndexError as e:
+        # No bond information found for the target period at `investpy`
+        logger.error(e)
+        metrics.inc("upstream_requests", result="empty")
+        found = True
+    except ConnectionError as e:
+        # Retries exhausted or circuit open (see `gateway`)
+        logger.error(e)
+        metrics.inc("upstream_requests", result="connection_error")
+
+    counts = {}
     if df is not None:
-        df.rename(str.lower, axis=1, inplace=True)
-        if manager is not None:
-            cols = df.columns
-            df.columns = pd.MultiIndex.from_product(((ticker,), cols))
-            manager.write(df)
-            df.columns = cols
+        # Results may be shared with concurrent callers, so never modify in place
+        df = df.rename(str.lower, axis=1)
+        if backend is not None:
+            with metrics.span("cache_write"):
+                counts = backend.write(pd.concat({ticker: df}, axis=1))
+
+    # Remember the requested range, so it is not requested again
+    if found and backend is not None:
+        with metrics.span("cache_write"):
+            backend.write_coverage(
+                _to_db_ticker(ticker),
+                flip_date_format(from_date),
+                flip_date_format(to_date),
+                modified=bool(counts.get(_to_db_ticker(ticker))),
+            )
 
     return df
 
 
+def _get_ticker_history(
+    ticker: str,
+    from_date: str,
+    to_date: str,
+    backend: Optional[CacheBackend],
+    cached: Optional[pd.DataFrame] = None,
+    coverage: Optional[dict] = None,
+) -> Optional[pd.DataFrame]:
+    """Returns OHLC data for a single `ticker`, starting from the `cached` rows
+    read from the cache and only requesting date ranges not yet in `coverage`
+    from `investpy`"""
+    if not backend:
+        return _safely_get_ohlc_hist(ticker, from_date, to_date, backend)
+
+    df = cached if cached is not None else pd.DataFrame()
+    intervals = get_covered_intervals(coverage)
+    if not intervals and not df.empty:
+        # Cached before coverage was tracked, assume stored range is complete
+        intervals = [(df.index[0], df.index[-1])]
+
+    gaps = subtract_intervals(
+        pd.to_datetime(flip_date_format(from_date)),
+        pd.to_datetime(flip_date_format(to_date)),
+        intervals,
+    )
+    if not gaps:
+        metrics.inc("cache_requests", result="hit")
+    else:
+        metrics.inc("cache_requests", result="miss" if df.empty else "partial")
+
+    # Fill missing data only
+    dfs = [df]
+    for gap_start, gap_end in gaps:
+        if gap_start == gap_end:
+            # `investpy` requires a non-empty range
+            gap_start -= pd.Timedelta("1D")
+        df_gap = _safely_get_ohlc_hist(
+            ticker,
+            gap_start.strftime(settings.INVESTPY_DATE_FORMAT),
+            gap_end.strftime(settings.INVESTPY_DATE_FORMAT),
+            backend,
+        )
+        if df_gap is not None:
+            dfs.append(df_gap.loc[gap_start:gap_end])
+
+    df = pd.concat(dfs, axis=0).sort_index()
+    df = df[~df.index.duplicated(keep="last")]
+    if not df.empty:
+        return df
+
+
+def _to_db_ticker(ticker: str) -> str:
+    """Map `investpy` tickers to DB naming, e.g. Brazil 5Y -> brazil_5y"""
+    # ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+    # WARNING: ticker naming convention in DB is different than `investpy`'s
+    # ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+    return ticker.lower().replace(" ", "_")
+
+
 def get_ohlc_yield_history(
     country_name: str,
     from_date: str = "01/01/2020",
     to_date: str = TODAY_STR,
-    manager: Optional[Manager] = LOCAL_DB_MANAGER,
+    backend: Optional[CacheBackend] = LOCAL_CACHE_BACKEND,
+    max_workers: Optional[int] = None,
+    lock: bool = True,
+    max_points: Optional[int] = None,
 ) -> Optional[pd.DataFrame]:
     """Returns historical OHLC yield data for all bonds issued by `country_name`
 
-    ...
+    Tickers are fetched concurrently, with at most `max_workers` requests in
+    flight, but the resulting columns always follow `search_country`'s order.
+    When caching, loaders of the same country in other processes (e.g. the
+    refresher) are waited for, so missing data is only fetched once.
+
+    With `max_points`, long windows are returned as weekly or monthly bars (see
+    `rollups.pick_resolution`), read from the rollups kept by the cache.
 
     Parameters
     ----------
@@ -135,52 +286,175 @@ def get_ohlc_yield_history(
         start date in "DD/MM/YYYY" format
     to_date : str
         end date in "DD/MM/YYYY" format
+    backend : CacheBackend, optional
+        cache backend, e.g. `dbm.Manager` (skipped if `None`)
+    max_workers : int, optional
+        defaults to `settings.MAX_FETCH_WORKERS`
+    lock : bool
+        whether to hold `locks.country_lock` while loading (if `backend` is set)
+    max_points : int, optional
+        maximum # of rows returned, defaults to daily bars
     """
     logging.info(f"Getting yield data for [{country_name}]")
 
-    tickers = search_country(country_name)
+    resolution = "daily"
+    if max_points:
+        resolution = pick_resolution(
+            flip_date_format(from_date), flip_date_format(to_date), max_points
+        )
+
+    with metrics.span("search"):
+        tickers = DATA_PROVIDER.search_country(country_name)
     if not tickers:
         return
 
-    curve = {}
-    for ticker in tickers:
-        # ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
-        # WARNING: ticker naming convention in DB is different than `investpy`'s
-        # ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
-        db_ticker = ticker.lower().replace(" ", "_")
-
-        # Try hitting local DB first (preliminary)
-        if manager:
-            from_date_ = flip_date_format(from_date)  # DB format
-            to_date_ = flip_date_format(to_date)  # DB format
-
-            df = manager.find(db_ticker, from_date_, to_date_)
-            if df is None:
-                df = pd.DataFrame()
-
-            df = df.loc[from_date_:to_date_]
-            if df.size > 1:
-                # Fill missing data only
-                if df.index[0] > pd.to_datetime(from_date_):
-                    to_date2 = df.index[0] - pd.Timedelta("1D")
-                    to_date2 = to_date2.strftime(settings.INVESTPY_DATE_FORMAT)
-                    df_pre = _safely_get_ohlc_hist(ticker, from_date, to_date2, manager)
-                    if df_pre is not None:
-                        df = pd.concat([df_pre, df], axis=0).sort_index()
-                if df.index[-1] < pd.to_datetime(to_date_):
-                    from_date2 = df.index[-1] + pd.Timedelta("1D")
-                    from_date2 = from_date2.strftime(settings.INVESTPY_DATE_FORMAT)
-                    df_post = _safely_get_ohlc_hist(ticker, from_date2, to_date, manager)
-                    if df_post is not None:
-                        df = pd.concat([df_post, df], axis=0).sort_index()
-
-                curve[db_ticker] = df
-                continue
-
-        # Query `investpy` instead
-        df = _safely_get_ohlc_hist(ticker, from_date, to_date, manager)
-        if df is not None:
-            curve[db_ticker] = df
+    with country_lock(country_name) if backend and lock else nullcontext():
+        # Read the requested window (and what is known about it) for all tickers
+        # at once from the cache
+        cached = coverage = {}
+        if backend:
+            db_tickers = [_to_db_ticker(ticker) for ticker in tickers]
+            with metrics.span("cache_read"):
+                coverage = backend.find_coverage(db_tickers)
+                # Daily rows are only needed for tickers read at full resolution
+                # (or cached before coverage was tracked)
+                targets = db_tickers
+                if resolution != "daily":
+                    targets = [t for t in db_tickers if t not in coverage]
+                if targets:
+                    cached = backend.find_many(
+                        targets,
+                        flip_date_format(from_date),
+                        flip_date_format(to_date),
+                    )
+
+        max_workers = min(max_workers or settings.MAX_FETCH_WORKERS, len(tickers))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = executor.map(
+                metrics.propagate(
+                    lambda ticker: _get_ticker_history(
+                        ticker,
+                        from_date,
+                        to_date,
+                        backend,
+                        cached.get(_to_db_ticker(ticker)),
+                        coverage.get(_to_db_ticker(ticker)),
+                    )
+                ),
+                tickers,
+            )
+            results = list(results)
+
+            if resolution != "daily":
+                results = _get_rollups(
+                    tickers, results, resolution, from_date, to_date, backend
+                )
+
+    return _assemble_history(tickers, results)
 
+
+def _get_rollups(
+    tickers: List[str],
+    results: List[Optional[pd.DataFrame]],
+    resolution: str,
+    from_date: str,
+    to_date: str,
+    backend: Optional[CacheBackend],
+) -> List[Optional[pd.DataFrame]]:
+    """`resolution` bars of each ticker, read from the cache's rollups (now that
+    missing dates were written) or rolled up from daily `results`"""
+    if not backend:
+        return [None if df is None else resample_ohlc(df, resolution) for df in results]
+
+    db_tickers = [_to_db_ticker(ticker) for ticker in tickers]
+    with metrics.span("cache_read"):
+        rollups = backend.find_rollups(
+            db_tickers,
+            resolution,
+            flip_date_format(from_date),
+            flip_date_format(to_date),
+        )
+    return [rollups.get(ticker) for ticker in db_tickers]
+
+
+def _assemble_history(
+    tickers: List[str],
+    results: Iterable[Optional[pd.DataFrame]],
+) -> Optional[pd.DataFrame]:
+    """Join each ticker's history into a single frame, in `tickers`' order"""
+    curve = {
+        _to_db_ticker(ticker): df
+        for ticker, df in zip(tickers, results)
+        if df is not None
+    }
     if curve:
-        return pd.concat(curve, axis=1)
+        with metrics.span("assemble"):
+            return pd.concat(curve, axis=1)
+
+
+def get_ohlc_yield_panel(
+    countries: List[str],
+    from_date: str = "01/01/2020",
+    to_date: str = TODAY_STR,
+    fields: Optional[Union[str, Iterable[str]]] = None,
+    backend: Optional[CacheBackend] = LOCAL_CACHE_BACKEND,
+    max_workers: Optional[int] = None,
+) -> Optional[pd.DataFrame]:
+    """Returns historical OHLC yield data for multiple countries, aligned on a
+    shared date index with (country, tenor, field) columns, e.g. (brazil, 10Y,
+    close)
+
+    Countries are loaded concurrently, with at most `max_workers` in flight.
+    Failures are logged and the country is left out of the panel.
+
+    Parameters
+    ----------
+    countries : List[str]
+    from_date : str
+        start date in "DD/MM/YYYY" format
+    to_date : str
+        end date in "DD/MM/YYYY" format
+    fields : str | Iterable[str], optional
+        subset of {open, high, low, close} (defaults to all)
+    backend : CacheBackend, optional
+        cache backend, e.g. `dbm.Manager` (skipped if `None`)
+    max_workers : int, optional
+        defaults to `settings.MAX_COUNTRY_WORKERS`
+    """
+    if isinstance(fields, str):
+        fields = [fields]
+    if fields is not None:
+        fields = [field.lower() for field in fields]
+
+    def _load(country_name: str) -> Optional[pd.DataFrame]:
+        try:
+            df = get_ohlc_yield_history(country_name, from_date, to_date, backend)
+        except Exception as e:
+            logger.exception(f"Failed to load [{country_name}] - {e}")
+            return
+
+        if df is not None:
+            if fields is not None:
+                df = df.loc[:, df.columns.get_level_values(1).isin(fields)]
+            df.columns = pd.MultiIndex.from_tuples(
+                (get_bond_info(ticker)["term"].upper(), field)
+                for ticker, field in df.columns
+            )
+        return df
+
+    if not countries:
+        return
+
+    max_workers = min(max_workers or settings.MAX_COUNTRY_WORKERS, len(countries))
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        frames = {
+            country_name: df
+            for country_name, df in zip(
+                countries, executor.map(metrics.propagate(_load), countries)
+            )
+            if df is not None
+        }
+
+    if frames:
+        # Single outer join on the union of all dates
+        return pd.concat(frames, axis=1, names=["country", "tenor", "field"])
@@ -7,13 +7,17 @@ Database manager to persist/cache requests to investpy
 
 import logging
 import re
-from typing import Optional, Union
+from typing import Dict, Iterable, List, Optional, Tuple, Union
 
+import bson
 import pandas as pd
 import pymongo
 
+from . import metrics
+from .backends import ROLLUPS, CacheBackend, get_changed_rows
+from .rollups import get_window, resample_ohlc, update_rollup
 
-__all__ = ("Manager",)
+__all__ = ("BucketManager", "Manager", "migrate_to_buckets")
 
 
 logger = logging.getLogger(__name__)
@@ -25,10 +29,13 @@ DEFAULT_CLIENT_SETTINGS = {
     "connectTimeoutMS": 2500,
     "serverSelectionTimeoutMS": 2500,
     "retryWrites": True,
+    "connect": False,  # Connect on first operation
 }
+FIELDS = ("dates", "open", "high", "low", "close")
+ROLLUP_BUCKET_FREQ = "Y"  # Rollups are stored in yearly buckets, by period end
 
 
-class Manager:
+class Manager(CacheBackend):
     def __init__(
         self,
         host: str = "localhost",
@@ -56,7 +63,7 @@ class Manager:
             **client_settings,
         }
 
-        self.setup()
+        self.connect()
 
     @staticmethod
     def parse_host(host: str) -> str:
@@ -71,16 +78,19 @@ class Manager:
             # Single host
             return f"mongodb://{host}"
 
+    def connect(self):
+        """Create the client and collection handles, deferring connection to the
+        first operation (so that managers can be created before forking)"""
+        self.client = pymongo.MongoClient(**self.client_settings)
+        self.db = self.client[self.db]
+        self.collection = self.db[self.collection]
+        self.coverage = self.db[f"{self.collection.name}_coverage"]
+        self.rollups = self.db[f"{self.collection.name}_rollups"]
+
     def setup(self):
-        """Connect to the server and setup collection indexes"""
+        """Setup collection indexes, once per database (e.g. with `python -m
+        yieldcurves setup`)"""
         try:
-            self.client = pymongo.MongoClient(**self.client_settings)
-        except pymongo.errors.ServerSelectionTimeoutError as e:
-            logger.error(f"Failed to setup to database - {e}")
-        else:
-            self.db = self.client[self.db]
-            self.collection = self.db[self.collection]
-
             # Required to speed up query
             self.collection.create_index("country")
             self.collection.create_index("bond")
@@ -95,7 +105,55 @@ class Manager:
                 ],
                 unique=True,
             )
+            self.coverage.create_index("bond", unique=True)
+            self.rollups.create_index(
+                [
+                    ("bond", pymongo.ASCENDING),
+                    ("resolution", pymongo.ASCENDING),
+                    ("start", pymongo.ASCENDING),
+                ],
+                unique=True,
+            )
+
+            # Required by `find_tail`, which slices arrays server-side
+            self.sort_arrays()
+        except pymongo.errors.ServerSelectionTimeoutError as e:
+            logger.error(f"Failed to setup to database - {e}")
+
+    def sort_arrays(self) -> int:
+        """Rewrite documents whose arrays are out of date order or hold duplicate
+        dates, e.g. written by the original `write` (which pushed older rows at the
+        end of the arrays, and could append the last date twice)
 
+        Returns the # of documents rewritten.
+        """
+        requests = []
+        out = {"_id": 0, "bond": 1, **{field: 1 for field in FIELDS}}
+        for obj in _track_reads(self.collection.find({}, out)):
+            bond = obj.pop("bond")
+            df = pd.DataFrame(obj).set_index("dates")
+            if df.index.is_monotonic_increasing and df.index.is_unique:
+                continue
+
+            df = df[~df.index.duplicated(keep="last")].sort_index()
+            new_obj = {
+                "dates": df.index.tolist(),
+                **dict(zip(df.columns, df.T.values.tolist())),
+            }
+            _track_write(new_obj)
+            requests.append(pymongo.UpdateOne({"bond": bond}, {"$set": new_obj}))
+
+        if requests:
+            logger.info(f"Sorting the arrays of {len(requests)} bonds in DB")
+            self.collection.bulk_write(requests, ordered=False)
+
+        return len(requests)
+
+    @metrics.timed("db_read")
+    def list_tickers(self) -> List[str]:
+        return sorted(self.collection.distinct("bond"))
+
+    @metrics.timed("db_read")
     def find(
         self,
         ticker: str,
@@ -123,53 +181,675 @@ class Manager:
                 query["dates"]["$lte"] = pd.to_datetime(to_date)
 
         out = dict(_id=0, dates=1, close=1, open=1, high=1, low=1)
-        obj = list(self.collection.find(query, out))
+        obj = list(_track_reads(self.collection.find(query, out)))
         if obj:
             assert len(obj) == 1
             return pd.DataFrame(obj[0]).set_index("dates")
 
-    def write(self, data: pd.DataFrame):
+    @metrics.timed("db_read")
+    def find_many(
+        self,
+        tickers: List[str],
+        from_date: Optional[str] = None,
+        to_date: Optional[str] = None,
+    ) -> Dict[str, pd.DataFrame]:
+        """Query multiple tickers from the database in a single round trip
+
+        Arrays are filtered server-side, so only rows within the requested
+        window are sent over the wire.
+
+        Parameters
+        ----------
+        tickers : List[str]
+        from_date : str
+            in YYYY-MM-DD format
+        to_date : str
+            in YYYY-MM-DD format
+        """
+        query = {"bond": {"$in": [ticker.lower() for ticker in tickers]}}
+        return self._find_arrays(self.collection, query, from_date, to_date)
+
+    @staticmethod
+    def _find_arrays(
+        collection: pymongo.collection.Collection,
+        query: dict,
+        from_date: Optional[str] = None,
+        to_date: Optional[str] = None,
+    ) -> Dict[str, pd.DataFrame]:
+        """Query documents holding `dates`/OHLC arrays, keyed by bond (joining
+        multiple documents per bond), filtering arrays to the window server-side
+
+        Missing or shorter OHLC arrays are padded with NaN, and rows without a
+        date are dropped (rather than dropping the whole document).
+        """
+        window = {}
+        if from_date:
+            window["$gte"] = pd.to_datetime(from_date)
+        if to_date:
+            window["$lte"] = pd.to_datetime(to_date)
+        if window:
+            query = {**query, "dates": {"$elemMatch": window}}
+
+        date = {"$arrayElemAt": ["$$row", 0]}
+        rows = {
+            "$filter": {
+                "input": {
+                    "$zip": {
+                        "inputs": [{"$ifNull": [f"${f}", []]} for f in FIELDS],
+                        "useLongestLength": True,
+                    }
+                },
+                "as": "row",
+                "cond": {
+                    "$and": [
+                        {"$ne": [date, None]},
+                        *({op: [date, val]} for op, val in window.items()),
+                    ]
+                },
+            }
+        }
+
+        pipeline = [
+            {"$match": query},
+            {"$project": {"_id": 0, "bond": 1, "rows": rows}},
+        ]
+        out = {}
+        for obj in _track_reads(collection.aggregate(pipeline)):
+            df = pd.DataFrame(obj["rows"], columns=FIELDS).set_index("dates")
+            missing = df.columns[df.isna().all()].tolist()
+            if len(df) and missing:
+                logger.warning(f"Missing {missing} arrays for [{obj['bond']}]")
+            out.setdefault(obj["bond"], []).append(df.astype(float))
+
+        return {bond: pd.concat(dfs).sort_index() for bond, dfs in out.items()}
+
+    @metrics.timed("db_read")
+    def find_rollups(
+        self,
+        tickers: List[str],
+        resolution: str,
+        from_date: Optional[str] = None,
+        to_date: Optional[str] = None,
+    ) -> Dict[str, pd.DataFrame]:
+        """Query `resolution` rollups (see `rollups`) of multiple tickers from the
+        database in a single round trip, for the periods overlapping the window
+
+        Tickers written before rollups were stored are rolled up on the fly.
+
+        Parameters
+        ----------
+        tickers : List[str]
+        resolution : str
+            one of `rollups.RESOLUTIONS`
+        from_date : str
+            in YYYY-MM-DD format
+        to_date : str
+            in YYYY-MM-DD format
+        """
+        if resolution not in ROLLUPS:
+            return super().find_rollups(tickers, resolution, from_date, to_date)
+
+        # Rollups are labeled by the last day of their period
+        _, to_date = get_window(from_date, to_date, resolution)
+        tickers = [ticker.lower() for ticker in tickers]
+        query = {"bond": {"$in": tickers}, "resolution": resolution}
+        if from_date or to_date:
+            query["start"] = {}
+            if from_date:
+                start = pd.Timestamp(from_date).to_period(ROLLUP_BUCKET_FREQ)
+                query["start"]["$gte"] = start.start_time
+            if to_date:
+                query["start"]["$lte"] = to_date
+        out = self._find_arrays(self.rollups, query, from_date, to_date)
+
+        missing = [ticker for ticker in tickers if ticker not in out]
+        if missing:
+            out.update(super().find_rollups(missing, resolution, from_date, to_date))
+        return out
+
+    def _update_rollups(self, changed: Dict[str, pd.DatetimeIndex]):
+        """Update the rollup buckets holding the periods with `changed` dates (per
+        bond), from the daily rows written (or roll them all up, if not yet stored)
+
+        Only buckets whose rollups changed are read and rewritten."""
+        if not changed:
+            return
+
+        # Bonds without any rollups yet are rolled up in full
+        query = {"bond": {"$in": list(changed)}}
+        stored = set(self.rollups.distinct("bond", query))
+        full = [ticker for ticker in changed if ticker not in stored]
+        full = self.find_many(full) if full else {}
+
+        # Daily rows of the periods being updated, and their buckets
+        windows = {}
+        for ticker, dates in changed.items():
+            if ticker in stored:
+                for resolution in ROLLUPS:
+                    start, end = get_window(dates.min(), dates.max(), resolution)
+                    windows[ticker, resolution] = start, end
+        daily = {}
+        buckets = {}
+        if windows:
+            start = min(start for start, _ in windows.values())
+            end = max(end for _, end in windows.values())
+            daily = self.find_many(list({ticker for ticker, _ in windows}), start, end)
+            for key, window in windows.items():
+                years = pd.period_range(*window, freq=ROLLUP_BUCKET_FREQ)
+                buckets[key] = years.start_time
+
+            query = {
+                "bond": {"$in": list(daily)},
+                "start": {"$in": list({s for v in buckets.values() for s in v})},
+            }
+            existing = {}
+            for obj in _track_reads(self.rollups.find(query, {"_id": 0})):
+                key = (obj.pop("bond"), obj.pop("resolution"), obj.pop("start"))
+                existing[key] = pd.DataFrame(obj).set_index("dates")
+
+        updated = {}
+        for ticker, df in full.items():
+            for resolution in ROLLUPS:
+                rollup = resample_ohlc(df, resolution)
+                starts = rollup.index.to_period(ROLLUP_BUCKET_FREQ).start_time
+                for start, bucket in rollup.groupby(starts):
+                    updated[ticker, resolution, start] = bucket
+
+        for (ticker, resolution), (start, end) in windows.items():
+            df = daily[ticker].loc[start:end]
+            for bucket in buckets[ticker, resolution]:
+                old = existing.get((ticker, resolution, bucket))
+                rollup = update_rollup(old, df, resolution)
+                starts = rollup.index.to_period(ROLLUP_BUCKET_FREQ).start_time
+                rollup = rollup.loc[starts == bucket]
+                if not rollup.empty and (old is None or not rollup.equals(old)):
+                    updated[ticker, resolution, bucket] = rollup
+
+        requests = []
+        for (ticker, resolution, start), rollup in updated.items():
+            new_obj = {
+                "bond": ticker,
+                "resolution": resolution,
+                "start": start,
+                "dates": rollup.index.tolist(),
+                **dict(zip(rollup.columns, rollup.T.values.tolist())),
+            }
+            _track_write(new_obj)
+            requests.append(
+                pymongo.ReplaceOne(
+                    {"bond": ticker, "resolution": resolution, "start": start},
+                    new_obj,
+                    upsert=True,
+                )
+            )
+
+        if requests:
+            logger.info(f"Upserting {len(requests)} rollup buckets to DB")
+            self.rollups.bulk_write(requests, ordered=False)
+
+    @metrics.timed("db_read")
+    def find_tail(
+        self, tickers: List[str], n_rows: int
+    ) -> Tuple[Dict[str, pd.DataFrame], Dict[str, dict]]:
+        """Query the last `n_rows` of multiple tickers from the database, along
+        with their coverage records (see `coverage`), in two round trips
+
+        Coverage is read for all `tickers`, including those without any rows
+        (e.g. empty ranges upstream). Arrays are sliced server-side, so only the
+        requested rows are sent over the wire. This requires arrays sorted by
+        date, as kept by `write` (run `setup` to sort documents written by older
+        releases).
+
+        Parameters
+        ----------
+        tickers : List[str]
+        n_rows : int
+        """
+        query = {"bond": {"$in": [ticker.lower() for ticker in tickers]}}
+        pipeline = [
+            {"$match": query},
+            {
+                "$project": {
+                    "_id": 0,
+                    "bond": 1,
+                    **{field: {"$slice": [f"${field}", -n_rows]} for field in FIELDS},
+                }
+            },
+        ]
+        data = {}
+        for obj in _track_reads(self.collection.aggregate(pipeline)):
+            bond = obj.pop("bond")
+            data[bond] = pd.DataFrame(obj, columns=FIELDS).set_index("dates")
+
+        return data, self.find_coverage(tickers)
+
+    @metrics.timed("db_write")
+    def write(self, data: pd.DataFrame) -> Dict[str, int]:
         """Write multiple time series with yield data (as
         returned from `investpy`) to the database
 
-        ...
+        Rows before/after the date range already stored for each bond are pushed
+        to its arrays. Bonds with rows within that range (e.g. filled gaps or
+        revised values) are merged into their stored arrays instead (new values
+        take precedence), which are then rewritten. Either way, writes are
+        idempotent on (bond, date). All tickers are upserted in a single unordered
+        bulk write, followed by their rollups.
 
         Parameters
         ----------
         data : pd.DataFrame
+
+        Returns
+        -------
+        Dict[str, int]
+            # of rows written (new or changed) per ticker
         """
         assert data.index.is_monotonic, "Data must already be sorted"
         assert data.columns.nlevels > 1, "Columns must be MultiIndex"
 
         data.rename(str.lower, axis=1, inplace=True)
         bonds = data.columns.get_level_values(0)
-        country = re.sub(" ", "_", re.findall(r"([a-zA-Z.\s]{2,}) ", bonds[0])[0])
+        country = _get_country(bonds[0])
+
+        # Stored date range for all tickers at once
+        tickers = [bond.replace(" ", "_") for bond in bonds.unique()]
+        pipeline = [
+            {"$match": {"bond": {"$in": tickers}}},
+            {
+                "$project": {
+                    "_id": 0,
+                    "bond": 1,
+                    "first": {"$min": "$dates"},
+                    "last": {"$max": "$dates"},
+                }
+            },
+        ]
+        stored = {
+            obj["bond"]: obj
+            for obj in _track_reads(self.collection.aggregate(pipeline))
+        }
+
+        requests = []
+        counts = {}
+        changed = {}
+        merges = {}
+        for ticker, df in data.groupby(bonds, axis=1):
+            df = df[ticker].dropna(how="all")  # Drop level 0 and missing rows
+            ticker = ticker.replace(" ", "_")
+
+            # Split into deltas to be prepended and appended to the arrays
+            db_obj = stored.get(ticker, {})
+            if db_obj.get("first") is None:
+                deltas = {None: df}
+            elif ((df.index >= db_obj["first"]) & (df.index <= db_obj["last"])).any():
+                merges[ticker] = df
+                continue
+            else:
+                deltas = {
+                    0: df.loc[df.index < db_obj["first"]],
+                    None: df.loc[df.index > db_obj["last"]],
+                }
+
+            counts[ticker] = 0
+            for position, df in deltas.items():
+                if df.empty:
+                    continue
+                new_obj = {"dates": {"$each": df.index.tolist()}}
+                for field, series in df.items():
+                    new_obj[field] = {"$each": series.tolist()}
+                if position is not None:
+                    for value in new_obj.values():
+                        value["$position"] = position
+                _track_write(new_obj)
+                requests.append(
+                    pymongo.UpdateOne(
+                        {"bond": ticker},
+                        {"$setOnInsert": {"country": country}, "$push": new_obj},
+                        upsert=True,
+                    )
+                )
+                counts[ticker] += len(df)
+                changed[ticker] = df.index.append(changed.get(ticker, df.index[:0]))
+
+        if merges:
+            requests += self._merge(merges, counts, changed)
+
+        if requests:
+            logger.info(f"Writing {sum(counts.values())} rows to DB")
+            self.collection.bulk_write(requests, ordered=False)
+            self._update_rollups(changed)
+
+        return counts
+
+    def _merge(
+        self,
+        data: Dict[str, pd.DataFrame],
+        counts: Dict[str, int],
+        changed: Dict[str, pd.DatetimeIndex],
+    ) -> List[pymongo.UpdateOne]:
+        """Requests rewriting the arrays of bonds in `data` merged with new rows,
+        skipping bonds left unchanged (updates `counts` and `changed` in place)"""
+        query = {"bond": {"$in": list(data)}}
+        stored = {}
+        for obj in _track_reads(self.collection.find(query, {"_id": 0, "country": 0})):
+            bond = obj.pop("bond")
+            stored[bond] = pd.DataFrame(obj).set_index("dates").sort_index()
+
+        requests = []
+        for ticker, df in data.items():
+            old = stored[ticker]
+            merged = df.combine_first(old)
+            dates = merged.index[get_changed_rows(merged, old).to_numpy()]
+            counts[ticker] = len(dates)
+            if not len(dates):
+                continue
+
+            new_obj = {
+                "dates": merged.index.tolist(),
+                **dict(zip(merged.columns, merged.T.values.tolist())),
+            }
+            _track_write(new_obj)
+            requests.append(pymongo.UpdateOne({"bond": ticker}, {"$set": new_obj}))
+            changed[ticker] = dates
+
+        return requests
+
+    @metrics.timed("db_read")
+    def find_coverage(self, tickers: List[str]) -> Dict[str, dict]:
+        """Query the coverage records (see `coverage`) of multiple tickers,
+        skipping missing ones"""
+        query = {"bond": {"$in": [ticker.lower() for ticker in tickers]}}
+        return {
+            obj.pop("bond"): obj
+            for obj in _track_reads(self.coverage.find(query, {"_id": 0}))
+        }
+
+    def _save_coverage(self, ticker: str, record: dict):
+        record = {"bond": ticker, **record}
+        _track_write(record)
+        self.coverage.replace_one({"bond": ticker}, record, upsert=True)
+
+
+class BucketManager(Manager):
+    """Alternative storage layout, with one document per (bond, period) bucket
+
+    Each document holds a single period (calendar year by default) of the same
+    `dates`/OHLC arrays used by `Manager`, so appends only rewrite the latest
+    bucket and queries only read the buckets overlapping the target window.
+    """
+
+    def __init__(
+        self,
+        *args,
+        collection: str = "bond_buckets",
+        freq: str = "Y",
+        **kwargs,
+    ):
+        self.freq = freq
+        super().__init__(*args, collection=collection, **kwargs)
+
+    def setup(self):
+        """Setup collection indexes, once per database (e.g. with `python -m
+        yieldcurves setup`)"""
+        try:
+            # Required to speed up query
+            self.collection.create_index("country")
+
+            # Required to ensure uniqueness on (bond, start) pair
+            self.collection.create_index(
+                [("bond", pymongo.ASCENDING), ("start", pymongo.ASCENDING)],
+                unique=True,
+            )
+            self.coverage.create_index("bond", unique=True)
+            self.rollups.create_index(
+                [
+                    ("bond", pymongo.ASCENDING),
+                    ("resolution", pymongo.ASCENDING),
+                    ("start", pymongo.ASCENDING),
+                ],
+                unique=True,
+            )
+        except pymongo.errors.ServerSelectionTimeoutError as e:
+            logger.error(f"Failed to setup to database - {e}")
+
+    def _get_bucket_starts(self, dates: pd.DatetimeIndex) -> pd.DatetimeIndex:
+        """Map each date to the start of the bucket it belongs to"""
+        return dates.to_period(self.freq).start_time
+
+    def _find_buckets(
+        self,
+        tickers: List[str],
+        from_date: Optional[str] = None,
+        to_date: Optional[str] = None,
+    ) -> Dict[str, pd.DataFrame]:
+        query = {"bond": {"$in": [ticker.lower() for ticker in tickers]}}
+        if from_date or to_date:
+            query["start"] = {}
+            if from_date:
+                start = self._get_bucket_starts(pd.DatetimeIndex([from_date]))[0]
+                query["start"]["$gte"] = start
+            if to_date:
+                query["start"]["$lte"] = pd.to_datetime(to_date)
+
+        buckets = {}
+        for obj in _track_reads(
+            self.collection.find(query, {"_id": 0, "country": 0, "start": 0})
+        ):
+            bond = obj.pop("bond")
+            buckets.setdefault(bond, []).append(pd.DataFrame(obj).set_index("dates"))
+
+        return {
+            bond: pd.concat(dfs).sort_index().loc[from_date:to_date]
+            for bond, dfs in buckets.items()
+        }
+
+    @metrics.timed("db_read")
+    def find(
+        self,
+        ticker: str,
+        from_date: Optional[str] = None,
+        to_date: Optional[str] = None,
+    ) -> Optional[pd.DataFrame]:
+        """Query a ticker from the database, reading overlapping buckets only
+
+        ...
+
+        Parameters
+        ----------
+        ticker : str
+        from_date : str
+            in YYYY-MM-DD format
+        to_date : str
+            in YYYY-MM-DD format
+        """
+        return self._find_buckets([ticker], from_date, to_date).get(ticker.lower())
+
+    @metrics.timed("db_read")
+    def find_many(
+        self,
+        tickers: List[str],
+        from_date: Optional[str] = None,
+        to_date: Optional[str] = None,
+    ) -> Dict[str, pd.DataFrame]:
+        """Query multiple tickers from the database in a single round trip,
+        reading overlapping buckets only
+
+        ...
+
+        Parameters
+        ----------
+        tickers : List[str]
+        from_date : str
+            in YYYY-MM-DD format
+        to_date : str
+            in YYYY-MM-DD format
+        """
+        return self._find_buckets(tickers, from_date, to_date)
+
+    @metrics.timed("db_read")
+    def find_tail(
+        self, tickers: List[str], n_rows: int
+    ) -> Tuple[Dict[str, pd.DataFrame], Dict[str, dict]]:
+        """Query the last `n_rows` of multiple tickers from the database, along
+        with their coverage records (see `coverage`)
+
+        Only recent buckets are read, in a single round trip (plus one for
+        coverage). Tickers without enough recent rows (e.g. discontinued bonds)
+        fallback to all buckets.
+
+        Parameters
+        ----------
+        tickers : List[str]
+        n_rows : int
+        """
+        # Roughly twice as many calendar days as rows, to account for holidays
+        since = pd.Timestamp.today().normalize() - pd.Timedelta(days=2 * n_rows)
+        query = {
+            "bond": {"$in": [ticker.lower() for ticker in tickers]},
+            "start": {"$gte": self._get_bucket_starts(pd.DatetimeIndex([since]))[0]},
+        }
+        buckets = {}
+        for obj in _track_reads(
+            self.collection.find(query, {"_id": 0, "country": 0, "start": 0})
+        ):
+            bond = obj.pop("bond")
+            buckets.setdefault(bond, []).append(pd.DataFrame(obj).set_index("dates"))
+
+        data = {bond: pd.concat(dfs).sort_index() for bond, dfs in buckets.items()}
+        for ticker in tickers:
+            ticker = ticker.lower()
+            if len(data.get(ticker, ())) < n_rows:
+                df = self.find(ticker)
+                if df is not None:
+                    data[ticker] = df
+
+        tails = {bond: df.tail(n_rows) for bond, df in data.items()}
+        return tails, self.find_coverage(tickers)
+
+    @metrics.timed("db_write")
+    def write(self, data: pd.DataFrame) -> Dict[str, int]:
+        """Write multiple time series with yield data (as
+        returned from `investpy`) to the database
+
+        Rows are merged into their existing buckets (new values take precedence),
+        and all changed buckets are upserted in a single bulk write, followed by
+        their rollups.
+
+        Parameters
+        ----------
+        data : pd.DataFrame
+
+        Returns
+        -------
+        Dict[str, int]
+            # of rows written (new or changed) per ticker
+        """
+        assert data.index.is_monotonic_increasing, "Data must already be sorted"
+        assert data.columns.nlevels > 1, "Columns must be MultiIndex"
+
+        data = data.rename(str.lower, axis=1)
+        bonds = data.columns.get_level_values(0)
+        country = _get_country(bonds[0])
+        starts = self._get_bucket_starts(data.index)
+
+        # Fetch all buckets being touched at once
+        query = {
+            "bond": {"$in": [bond.replace(" ", "_") for bond in bonds.unique()]},
+            "start": {"$in": starts.unique().tolist()},
+        }
+        existing = {}
+        for obj in _track_reads(self.collection.find(query, {"_id": 0, "country": 0})):
+            key = (obj.pop("bond"), obj.pop("start"))
+            existing[key] = pd.DataFrame(obj).set_index("dates")
+
+        requests = []
+        counts = {}
+        changed = {}
         for ticker, df in data.groupby(bonds, axis=1):
-            df = df[ticker]  # Drop level 0
+            df = df[ticker].dropna(how="all")  # Drop level 0 and missing rows
             ticker = ticker.replace(" ", "_")
-            db_obj = self.collection.find_one({"bond": ticker})
+            counts[ticker] = 0
+            for start, bucket in df.groupby(self._get_bucket_starts(df.index)):
+                old = existing.get((ticker, start), pd.DataFrame(columns=df.columns))
+                bucket = bucket.combine_first(old)
+
+                # Skip buckets left unchanged, making rewrites idempotent
+                dates = bucket.index[get_changed_rows(bucket, old).to_numpy()]
+                n_changed = len(dates)
+                if not n_changed:
+                    continue
+                changed[ticker] = dates.append(changed.get(ticker, dates[:0]))
 
-            # New data
-            if not db_obj:
                 new_obj = {
                     "country": country,
                     "bond": ticker,
-                    "dates": df.index.tolist(),
-                    **dict(zip(df.columns, df.T.values.tolist())),
+                    "start": start,
+                    "dates": bucket.index.tolist(),
+                    **dict(zip(bucket.columns, bucket.T.values.tolist())),
                 }
-                logger.info(f"Inserting new {ticker} to DB")
-                self.collection.insert_one(new_obj)
+                _track_write(new_obj)
+                requests.append(
+                    pymongo.ReplaceOne(
+                        {"bond": ticker, "start": start}, new_obj, upsert=True
+                    )
+                )
+                counts[ticker] += n_changed
 
-            # Existing data, append each field
-            else:
-                try:
-                    last_date = db_obj["dates"][-1]
-                except IndexError:
-                    last_date = None
-
-                df = df.loc[last_date:]
-                new_obj = {"$push": {"dates": {"$each": df.index.tolist()}}}
-                for field, series in df.iteritems():
-                    new_obj["$push"][field] = {"$each": series.tolist()}
-                logger.info(f"Updating existing {ticker} in DB")
-                self.collection.update_one({"bond": ticker}, new_obj)
+        if requests:
+            logger.info(f"Upserting {len(requests)} buckets to DB")
+            self.collection.bulk_write(requests, ordered=False)
+            self._update_rollups(changed)
+
+        return counts
+
+
+def _track_reads(docs: Iterable[dict]) -> Iterable[dict]:
+    """Count the (BSON) size of documents read, if metrics are enabled"""
+    if not metrics.enabled():
+        return docs
+
+    def _count(docs):
+        for doc in docs:
+            metrics.inc("db_bytes", len(bson.encode(doc)), direction="read")
+            yield doc
+
+    return _count(docs)
+
+
+def _track_write(doc: dict):
+    """Count the (BSON) size of a document written, if metrics are enabled"""
+    if metrics.enabled():
+        metrics.inc("db_bytes", len(bson.encode(doc)), direction="write")
+
+
+def _get_country(bond: str) -> str:
+    """Extract DB country name from a bond, e.g. united kingdom 5y -> united_kingdom"""
+    return re.sub(" ", "_", re.findall(r"([a-zA-Z.\s]{2,}) ", bond)[0])
+
+
+def migrate_to_buckets(source: Manager, target: BucketManager) -> int:
+    """Copy every bond stored by `source` into `target`'s bucketed layout
+
+    Coverage records (see `coverage`) are copied too, so that ranges already
+    requested from `investpy` aren't requested again after switching layouts.
+
+    Parameters
+    ----------
+    source : Manager
+    target : BucketManager
+    """
+    n_bonds = 0
+    for obj in source.collection.find({}, {"_id": 0, "country": 0}):
+        bond = obj.pop("bond").replace("_", " ")
+        df = pd.DataFrame(obj).set_index("dates").sort_index()
+        df = df[~df.index.duplicated(keep="last")]
+        df.columns = pd.MultiIndex.from_product(((bond,), df.columns))
+
+        logger.info(f"Migrating {bond} ({len(df)} rows)")
+        target.write(df)
+        n_bonds += 1
+
+    for obj in source.coverage.find({}, {"_id": 0}):
+        target._save_coverage(obj.pop("bond"), obj)
+
+    return n_bonds
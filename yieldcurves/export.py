@@ -0,0 +1,258 @@
+"""
+yieldcurves.export
+~~~~~~~~~~~~~~~~~~
+
+Bulk export of the cache into a Parquet dataset partitioned by country and year,
+e.g. `python -m yieldcurves export`:
+
+    <root>/country=brazil/year=2020/part-0.parquet
+
+with (bond, dates, open, high, low, close) columns, so that years of
+multi-country history load in a single columnar scan (see `load_export`).
+
+Bonds are read `settings.EXPORT_BATCH_SIZE` at a time. After each batch, the last
+write exported for each bond (see `coverage`) is saved to `<root>/_manifest.json`,
+so that later runs, or runs resumed after an interruption, only export the bonds
+written since.
+"""
+
+import json
+import logging
+import operator
+import os
+from functools import partial, reduce
+from itertools import groupby
+from typing import Dict, Iterable, List, Optional
+
+import pandas as pd
+
+from . import settings
+from .backends import CacheBackend, ParquetBackend
+from .data_handlers import LOCAL_CACHE_BACKEND
+
+
+__all__ = (
+    "export_cache",
+    "load_export",
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+# Globals
+# ----
+DTYPES = {
+    "bond": object,
+    "dates": "datetime64[ns]",
+    "open": float,
+    "high": float,
+    "low": float,
+    "close": float,
+}
+MANIFEST = "_manifest.json"  # Skipped by Parquet readers, as it starts with "_"
+FILENAME = "part-0.parquet"
+
+
+def export_cache(
+    root: Optional[str] = None,
+    backend: Optional[CacheBackend] = LOCAL_CACHE_BACKEND,
+    countries: Optional[Iterable[str]] = None,
+    from_date: Optional[str] = None,
+    to_date: Optional[str] = None,
+    full: bool = False,
+    batch_size: Optional[int] = None,
+) -> Dict[str, int]:
+    """Export the cache (or some `countries`) into a partitioned Parquet dataset
+
+    Only bonds written since the last export are exported, unless `full` is set
+    or the date filters changed.
+
+    Parameters
+    ----------
+    root : str, optional
+        defaults to `settings.EXPORT_DIR`
+    backend : CacheBackend, optional
+        cache backend, e.g. `dbm.Manager`
+    countries : Iterable[str], optional
+        e.g. ["brazil", "united states"], defaults to all countries in the cache
+    from_date : str, optional
+        in YYYY-MM-DD format
+    to_date : str, optional
+        in YYYY-MM-DD format
+    full : bool
+        whether to export all bonds, even if unchanged since the last export
+    batch_size : int, optional
+        defaults to `settings.EXPORT_BATCH_SIZE`
+
+    Returns
+    -------
+    Dict[str, int]
+        # of rows exported per bond
+    """
+    if not backend:
+        logger.error("No cache backend available, nothing to export.")
+        return {}
+
+    root = root or settings.EXPORT_DIR
+    batch_size = batch_size or settings.EXPORT_BATCH_SIZE
+    filters = {"from_date": from_date, "to_date": to_date}
+
+    manifest = _load_manifest(root)
+    if full or manifest["filters"] != filters:
+        manifest = {"filters": filters, "bonds": {}}
+
+    tickers = backend.list_tickers()
+    if countries is not None:
+        targets = {_to_partition(country) for country in countries}
+        tickers = [ticker for ticker in tickers if _get_country(ticker) in targets]
+
+    # Bonds written since their last export (or never exported)
+    stamps = {ticker: None for ticker in tickers}
+    for ticker, record in backend.find_coverage(tickers).items():
+        stamp = record.get("updated_at") or record["checked_at"]
+        stamps[ticker] = pd.Timestamp(stamp).isoformat()
+    pending = [
+        ticker
+        for ticker in tickers
+        if ticker not in manifest["bonds"]
+        or manifest["bonds"][ticker] != stamps[ticker]
+    ]
+    logger.info(f"Exporting {len(pending)} of {len(tickers)} bonds to [{root}]")
+
+    counts = {}
+    for country, bonds in groupby(sorted(pending, key=_get_country), _get_country):
+        bonds = list(bonds)
+        for i in range(0, len(bonds), batch_size):
+            batch = bonds[i : i + batch_size]
+            data = backend.find_many(batch, from_date, to_date)
+            _write_partitions(root, country, batch, data)
+
+            for bond in batch:
+                counts[bond] = len(data[bond]) if bond in data else 0
+                manifest["bonds"][bond] = stamps[bond]
+            _save_manifest(root, manifest)
+            logger.info(f"Exported {len(batch)} [{country}] bonds")
+
+    return counts
+
+
+def _write_partitions(
+    root: str, country: str, bonds: List[str], data: Dict[str, pd.DataFrame]
+):
+    """Replace the rows of `bonds` in each of `country`'s year partitions,
+    leaving unchanged partitions untouched"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    frames = [
+        df.rename_axis("dates").reset_index().assign(bond=bond)
+        for bond, df in data.items()
+        if not df.empty
+    ]
+    new = _normalize(pd.concat(frames) if frames else pd.DataFrame(columns=DTYPES))
+
+    country_dir = os.path.join(root, f"country={country}")
+    years = set(new["dates"].dt.year)
+    if os.path.isdir(country_dir):
+        years.update(
+            int(name[len("year=") :])
+            for name in os.listdir(country_dir)
+            if name.startswith("year=")
+        )
+
+    for year in sorted(years):
+        path = os.path.join(country_dir, f"year={year}", FILENAME)
+        rows = new[new["dates"].dt.year == year]
+        if os.path.exists(path):
+            old = _normalize(pq.read_table(path).to_pandas())
+            replaced = old["bond"].isin(bonds)
+            if rows.reset_index(drop=True).equals(old[replaced].reset_index(drop=True)):
+                continue
+            rows = _normalize(pd.concat([old[~replaced], rows]))
+        if rows.empty:
+            if os.path.exists(path):
+                os.remove(path)
+            continue
+
+        table = pa.Table.from_pandas(rows, preserve_index=False)
+        ParquetBackend._replace(path, partial(pq.write_table, table))
+
+
+def _normalize(df: pd.DataFrame) -> pd.DataFrame:
+    """Rows sorted by (bond, dates), with the columns and dtypes in `DTYPES`"""
+    df = df.loc[:, list(DTYPES)].astype(DTYPES)
+    return df.sort_values(["bond", "dates"], ignore_index=True)
+
+
+def load_export(
+    root: Optional[str] = None,
+    countries: Optional[Iterable[str]] = None,
+    from_date: Optional[str] = None,
+    to_date: Optional[str] = None,
+    columns: Optional[List[str]] = None,
+) -> pd.DataFrame:
+    """Load an export in a single columnar scan, reading only the partitions (and
+    `columns`) needed
+
+    Rows are in long format, e.g. pivot close yields with
+    `df.pivot(index="dates", columns="bond", values="close")`.
+
+    Parameters
+    ----------
+    root : str, optional
+        defaults to `settings.EXPORT_DIR`
+    countries : Iterable[str], optional
+        defaults to all exported countries
+    from_date : str, optional
+        in YYYY-MM-DD format
+    to_date : str, optional
+        in YYYY-MM-DD format
+    columns : List[str], optional
+        subset of (country, year, bond, dates, open, high, low, close)
+    """
+    import pyarrow.dataset as ds
+
+    dataset = ds.dataset(
+        root or settings.EXPORT_DIR, format="parquet", partitioning="hive"
+    )
+
+    conditions = []
+    if countries is not None:
+        targets = [_to_partition(country) for country in countries]
+        conditions.append(ds.field("country").isin(targets))
+    if from_date:
+        from_date = pd.Timestamp(from_date)
+        conditions.append(ds.field("year") >= from_date.year)
+        conditions.append(ds.field("dates") >= from_date)
+    if to_date:
+        to_date = pd.Timestamp(to_date)
+        conditions.append(ds.field("year") <= to_date.year)
+        conditions.append(ds.field("dates") <= to_date)
+
+    condition = reduce(operator.and_, conditions) if conditions else None
+    return dataset.to_table(columns=columns, filter=condition).to_pandas()
+
+
+def _get_country(ticker: str) -> str:
+    """Country partition of a DB ticker, e.g. united_kingdom_5y -> united_kingdom"""
+    return ticker.rsplit("_", 1)[0]
+
+
+def _to_partition(country: str) -> str:
+    return country.lower().strip().replace(" ", "_")
+
+
+def _load_manifest(root: str) -> dict:
+    try:
+        with open(os.path.join(root, MANIFEST)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {"filters": None, "bonds": {}}
+
+
+def _save_manifest(root: str, manifest: dict):
+    ParquetBackend._replace(
+        os.path.join(root, MANIFEST),
+        lambda f: f.write(json.dumps(manifest, indent=2).encode()),
+    )
@@ -0,0 +1,273 @@
+"""
+yieldcurves.factors
+~~~~~~~~~~~~~~~~~~~
+
+Principal component (level, slope and curvature) decomposition of daily curve
+changes. Each country's curves are interpolated onto a common grid of terms (see
+`GRID`) and their daily changes (in basis points) decomposed as of each date,
+i.e. without lookahead, over either:
+
+    - "expanding" windows, from the first date, or
+    - "rolling" windows, of the last `window` dates
+
+Running sums of changes (and of their outer products) are persisted along with
+the results under `settings.FACTORS_CACHE_DIR`, so that updates after a refresh
+only process the dates appended since (see `decompose_country`).
+"""
+
+import json
+import logging
+import os
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from . import settings
+from .universe import get_bond_info
+from .utils import interpolate_curves
+
+
+__all__ = (
+    "decompose_country",
+    "get_grid_curves",
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+# Globals
+# ----
+GRID = (3, 6, 12, 24, 36, 60, 84, 120, 240, 360)  # Terms in months
+FACTORS = ("level", "slope", "curvature")
+MODES = ("expanding", "rolling")
+
+
+def get_grid_curves(
+    data: pd.DataFrame, method: str = "cubic", grid: Sequence[int] = GRID
+) -> pd.DataFrame:
+    """Interpolate curves onto `grid`, keeping only terms within the range of
+    `data` and dates with a complete curve
+
+    ...
+
+    Parameters
+    ----------
+    data : pd.DataFrame
+        (dates x tickers) yields, e.g. `get_ohlc_yield_history(...).xs("close", 1, 1)`
+    method : str
+        one of {cubic, quadratic, linear}
+    grid : Sequence[int]
+        target terms in months
+    """
+    months = [get_bond_info(ticker)["months"] for ticker in data.columns]
+    data = data.loc[:, [m is not None for m in months]]
+    data.columns = [m for m in months if m is not None]
+
+    curves = interpolate_curves(data.sort_index(axis=1), method, grid=grid)
+    curves.columns = curves.columns.astype(int)
+    return curves.dropna(axis=1, how="all").dropna().sort_index()
+
+
+def decompose_country(
+    country_name: str,
+    data: pd.DataFrame,
+    mode: str = "expanding",
+    window: Optional[int] = None,
+    method: str = "cubic",
+    full: bool = False,
+) -> Dict[str, pd.DataFrame]:
+    """Decompose `country_name`'s daily curve changes into principal components,
+    persisting results so that only new dates are processed on subsequent calls
+
+    As in `fitting.fit_country`, the last processed date is always processed
+    again, as its data may have been incomplete. Everything is recomputed if
+    `full` is set, the grid of terms changed or `data` no longer includes the last
+    processed date.
+
+    Parameters
+    ----------
+    country_name : str
+    data : pd.DataFrame
+        (dates x tickers) yields, e.g. `get_ohlc_yield_history(...).xs("close", 1, 1)`
+    mode : str
+        one of {expanding, rolling}
+    window : int, optional
+        # of daily changes in rolling windows, defaults to `settings.FACTORS_WINDOW`
+    method : str
+        interpolation method, see `get_grid_curves`
+    full : bool
+        whether to recompute all dates
+
+    Returns
+    -------
+    Dict[str, pd.DataFrame]
+        "scores": (dates x factors) factor scores of each daily change, using the
+        loadings as of that date
+        "loadings": (terms x factors) loadings as of the last date
+        "explained": (dates x factors) share of variance explained by each factor
+    """
+    if mode not in MODES:
+        raise ValueError(f"Unrecognized mode [{mode}]")
+
+    window = window or settings.FACTORS_WINDOW
+    name = country_name.lower().strip().replace(" ", "_")
+    name = f"{name}_{mode}_{window}" if mode == "rolling" else f"{name}_{mode}"
+    path = os.path.join(settings.FACTORS_CACHE_DIR, name)
+
+    state = results = None
+    if not full and os.path.exists(f"{path}.json"):
+        with open(f"{path}.json") as f:
+            state = json.load(f)
+        results = pd.read_csv(f"{path}.csv", index_col=0, parse_dates=True)
+
+    # Only dates since the last processed one are interpolated
+    curves = None
+    if state is not None:
+        curves = get_grid_curves(data.loc[pd.Timestamp(state["date"]) :], method)
+        if (
+            curves.empty
+            or curves.index[0] != pd.Timestamp(state["date"])
+            or curves.columns.tolist() != state["grid"]
+            or state["method"] != method
+        ):
+            logger.info(f"Data of [{country_name}] changed, recomputing factors")
+            state = results = curves = None
+    if curves is None:
+        curves = get_grid_curves(data, method)
+        state = _init_state(curves.columns.tolist(), method)
+        results = pd.DataFrame(columns=_get_columns())
+
+    if len(curves) < 2:
+        return _format(results, state)
+
+    logger.info(f"Decomposing {len(curves) - 1} [{country_name}] curve changes")
+    changes = curves.diff().iloc[1:] * 100  # In basis points
+    new_results, state = _update(state, changes, window if mode == "rolling" else None)
+
+    results = results.loc[results.index < new_results.index[0]]
+    new_results = pd.concat([results, new_results]) if len(results) else new_results
+    # Resume from the second to last date, so that the last one is redone
+    state["date"] = curves.index[-2].isoformat()
+
+    os.makedirs(settings.FACTORS_CACHE_DIR, exist_ok=True)
+    new_results.to_csv(f"{path}.csv.tmp")
+    with open(f"{path}.json.tmp", "w") as f:
+        json.dump(state, f)
+    os.replace(f"{path}.csv.tmp", f"{path}.csv")
+    os.replace(f"{path}.json.tmp", f"{path}.json")
+
+    return _format(new_results, state)
+
+
+def _init_state(grid: list, method: str) -> dict:
+    k = len(grid)
+    return {
+        "grid": grid,
+        "method": method,
+        "date": None,
+        "n": 0,
+        "sum": [0.0] * k,
+        "sum_sq": np.zeros((k, k)).tolist(),
+        "recent": [],  # Rolling windows only
+        "loadings": None,
+    }
+
+
+def _update(state: dict, changes: pd.DataFrame, window: Optional[int]) -> tuple:
+    """Add `changes` to the running sums of `state`, decomposing the covariance as
+    of each date (all at once) and dropping changes older than `window`
+
+    Returns results and the new state, as of the second to last change.
+    """
+    x = changes.to_numpy()
+    m, k = x.shape
+    outer = x[:, :, None] * x[:, None, :]
+
+    # Running sums after each change (and in the window, if rolling)
+    n = state["n"] + np.arange(1, m + 1)
+    s1 = np.asarray(state["sum"]) + np.cumsum(x, axis=0)
+    s2 = np.asarray(state["sum_sq"]) + np.cumsum(outer, axis=0)
+
+    recent = np.asarray(state["recent"]).reshape(-1, k)
+    pool = np.vstack([recent, x])
+    if window is not None:
+        n_dropped = np.maximum(len(recent) + np.arange(1, m + 1) - window, 0)
+        head = pool[: n_dropped[-1]]
+        dropped1 = np.vstack([np.zeros((1, k)), np.cumsum(head, axis=0)])
+        dropped2 = np.concatenate(
+            [np.zeros((1, k, k)), np.cumsum(head[:, :, None] * head[:, None, :], 0)]
+        )
+        n = n - n_dropped
+        s1 = s1 - dropped1[n_dropped]
+        s2 = s2 - dropped2[n_dropped]
+
+    # Covariance and its eigenvectors as of each date, sorted by variance
+    mean = s1 / n[:, None]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cov = (s2 - n[:, None, None] * mean[:, :, None] * mean[:, None, :]) / (
+            n[:, None, None] - 1
+        )
+    valid = n > k
+    cov[~valid] = np.eye(k)
+    eigvals, eigvecs = np.linalg.eigh(cov)
+    eigvals = eigvals[:, ::-1][:, : len(FACTORS)]
+    loadings = eigvecs[:, :, ::-1][:, :, : len(FACTORS)]
+
+    # Consistent signs: level up, slope steepening, curvature humped
+    terms = np.linspace(-1, 1, k)
+    shapes = np.stack([np.ones(k), terms, 1 - 2 * np.abs(terms)], axis=1)
+    signs = np.sign(np.einsum("kf,mkf->mf", shapes, loadings))
+    loadings = loadings * np.where(signs == 0, 1, signs)[:, None, :]
+
+    scores = np.einsum("mk,mkf->mf", x - mean, loadings)
+    explained = eigvals / np.trace(cov, axis1=1, axis2=2)[:, None]
+    scores[~valid] = explained[~valid] = np.nan
+
+    results = pd.concat(
+        {
+            "score": pd.DataFrame(scores, index=changes.index, columns=FACTORS),
+            "explained": pd.DataFrame(explained, index=changes.index, columns=FACTORS),
+        },
+        axis=1,
+    )
+    results.columns = _get_columns()
+
+    # New state, as of the second to last change
+    i = m - 2
+    if i >= 0:
+        state = dict(
+            state,
+            n=int(n[i]),
+            sum=s1[i].tolist(),
+            sum_sq=s2[i].tolist(),
+        )
+        if window is not None:
+            end = len(recent) + i + 1
+            state["recent"] = pool[end - int(n[i]) : end].tolist()
+    if valid[-1]:
+        state["loadings"] = loadings[-1].tolist()
+    return results, state
+
+
+def _get_columns() -> list:
+    return [
+        f"{factor}_{field}" for field in ("score", "explained") for factor in FACTORS
+    ]
+
+
+def _format(results: pd.DataFrame, state: dict) -> Dict[str, pd.DataFrame]:
+    def _get(field: str) -> pd.DataFrame:
+        df = results.loc[:, [f"{factor}_{field}" for factor in FACTORS]].astype(float)
+        df.columns = list(FACTORS)
+        return df
+
+    loadings = state["loadings"]
+    if loadings is not None:
+        loadings = pd.DataFrame(loadings, index=state["grid"], columns=FACTORS)
+    return {
+        "scores": _get("score"),
+        "loadings": loadings,
+        "explained": _get("explained"),
+    }
@@ -0,0 +1,245 @@
+"""
+yieldcurves.fitting
+~~~~~~~~~~~~~~~~~~~
+
+Parametric (Nelson-Siegel and Svensson) yield curve fitting. Unlike the splines
+in `utils.interpolate_curves`, fitted curves are summarized by a few parameters
+per date and extrapolate smoothly beyond the longest term.
+
+Curves are parameterized by decay times `lambda` (in years), i.e.
+
+    y(t) = beta0 + beta1 * f(t / lambda1) + beta2 * g(t / lambda1)
+                 [+ beta3 * g(t / lambda2)]  # Svensson only
+
+    f(x) = (1 - exp(-x)) / x
+    g(x) = f(x) - exp(-x)
+"""
+
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from . import settings
+from .universe import get_bond_info
+
+
+__all__ = (
+    "MODELS",
+    "evaluate_curves",
+    "fit_country",
+    "fit_curves",
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+# Globals
+# ----
+MODELS = {
+    "nelson-siegel": ("beta0", "beta1", "beta2", "lambda1"),
+    "svensson": ("beta0", "beta1", "beta2", "beta3", "lambda1", "lambda2"),
+}
+DEFAULT_LAMBDAS = {"nelson-siegel": (1.5,), "svensson": (1.5, 8.0)}
+LAMBDA_BOUNDS = (0.05, 30.0)  # In years
+
+
+def _loadings(tau: np.ndarray, lambdas: np.ndarray) -> np.ndarray:
+    """Factor loadings of shape (..., # terms, 2 + # lambdas), for terms `tau` (in
+    years) and decay times `lambdas` of shape (..., # lambdas)"""
+    lambdas = np.asarray(lambdas, dtype=float)
+    x = tau[:, None] / lambdas[..., None, :]  # (..., # terms, # lambdas)
+    decay = np.exp(-x)
+    f = -np.expm1(-x) / x
+    g = f - decay
+
+    level = np.ones(x.shape[:-1] + (1,))
+    return np.concatenate([level, f[..., :1], g], axis=-1)
+
+
+def evaluate_curves(params: pd.DataFrame, grid: Sequence[float]) -> pd.DataFrame:
+    """Evaluate fitted curves on a grid of terms, for all dates at once
+
+    ...
+
+    Parameters
+    ----------
+    params : pd.DataFrame
+        (dates x parameters), as returned by `fit_curves`
+    grid : Sequence[float]
+        target terms in months
+    """
+    n_lambdas = params.columns.str.startswith("lambda").sum()
+    values = params.to_numpy(dtype=float)
+    betas, lambdas = values[:, :-n_lambdas], values[:, -n_lambdas:]
+
+    tau = np.asarray(grid, dtype=float) / 12
+    curves = np.einsum("dtk,dk->dt", _loadings(tau, lambdas), betas)
+    return pd.DataFrame(curves, index=params.index, columns=grid)
+
+
+def _fit_curve(
+    tau: np.ndarray, y: np.ndarray, lambdas: np.ndarray
+) -> Optional[np.ndarray]:
+    """Fit a single curve, solving betas by linear least squares for each set of
+    decay times (variable projection). Returns (betas..., lambdas...)"""
+    from scipy.optimize import least_squares  # Slow to import
+
+    def residuals(lambdas: np.ndarray) -> np.ndarray:
+        X = _loadings(tau, lambdas)
+        betas = np.linalg.lstsq(X, y, rcond=None)[0]
+        return X @ betas - y
+
+    result = least_squares(residuals, lambdas, bounds=LAMBDA_BOUNDS)
+    if not result.success:
+        return
+
+    X = _loadings(tau, result.x)
+    return np.concatenate([np.linalg.lstsq(X, y, rcond=None)[0], result.x])
+
+
+def _fit_chunk(
+    values: np.ndarray,
+    tau: np.ndarray,
+    model: str,
+    init: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """Fit consecutive curves, warm-starting each from the previous fit"""
+    n_params = len(MODELS[model])
+    n_lambdas = len(DEFAULT_LAMBDAS[model])
+    lambdas = np.array(DEFAULT_LAMBDAS[model], dtype=float)
+    if init is not None and np.isfinite(init[-n_lambdas:]).all():
+        lambdas = np.array(init[-n_lambdas:], dtype=float)
+
+    out = np.full((len(values), n_params), np.nan)
+    for i, y in enumerate(values):
+        mask = ~np.isnan(y)
+        if mask.sum() < n_params:
+            continue
+
+        params = _fit_curve(tau[mask], y[mask], lambdas)
+        if params is not None:
+            out[i] = params
+            lambdas = params[-n_lambdas:]
+
+    return out
+
+
+def fit_curves(
+    data: pd.DataFrame,
+    model: str = "svensson",
+    init: Optional[Sequence[float]] = None,
+    max_workers: Optional[int] = None,
+    chunk_size: Optional[int] = None,
+) -> pd.DataFrame:
+    """Fit a parametric curve to every date (row) of `data` in a single batch
+
+    Each date is warm-started from the previous date's parameters. Long histories
+    are split into chunks of consecutive dates, fitted in a process pool. Dates
+    with fewer valid points than parameters are left as NaN.
+
+    Parameters
+    ----------
+    data : pd.DataFrame
+        (dates x terms) yields, with columns as term in months (see `get_tickvals`)
+    model : str
+        one of {nelson-siegel, svensson}
+    init : Sequence[float], optional
+        parameters to warm-start the first date from, e.g. the last fitted date
+    max_workers : int, optional
+        defaults to `settings.FIT_MAX_WORKERS`
+    chunk_size : int, optional
+        defaults to `settings.FIT_CHUNK_SIZE`
+    """
+    if model not in MODELS:
+        raise ValueError(f"Unrecognized model [{model}]")
+
+    tau = data.columns.to_numpy(dtype=float) / 12
+    values = data.to_numpy(dtype=float)
+    init = None if init is None else np.asarray(init, dtype=float)
+
+    chunk_size = chunk_size or settings.FIT_CHUNK_SIZE
+    max_workers = max_workers or settings.FIT_MAX_WORKERS
+    chunks = [values[i : i + chunk_size] for i in range(0, len(values), chunk_size)]
+
+    if len(chunks) > 1 and max_workers > 1:
+        # Only the first chunk can be warm-started from `init`
+        inits = [init] + [None] * (len(chunks) - 1)
+        with ProcessPoolExecutor(max_workers=min(max_workers, len(chunks))) as pool:
+            results = list(
+                pool.map(
+                    _fit_chunk,
+                    chunks,
+                    [tau] * len(chunks),
+                    [model] * len(chunks),
+                    inits,
+                )
+            )
+    else:
+        results = [_fit_chunk(values, tau, model, init)]
+
+    params = np.concatenate(results)
+    return pd.DataFrame(params, index=data.index, columns=list(MODELS[model]))
+
+
+def fit_country(
+    country_name: str,
+    data: pd.DataFrame,
+    model: str = "svensson",
+    **kwargs,
+) -> pd.DataFrame:
+    """Fit `country_name`'s curves, caching parameters per date so that only
+    new dates are fitted on subsequent calls
+
+    The last cached date is always refitted, as its data may have been incomplete.
+
+    Parameters
+    ----------
+    country_name : str
+    data : pd.DataFrame
+        (dates x tickers) yields, e.g. `get_ohlc_yield_history(...).xs("close", 1, 1)`
+    model : str
+        one of {nelson-siegel, svensson}
+    kwargs
+        passed to `fit_curves`
+    """
+    name = country_name.lower().strip().replace(" ", "_")
+    path = os.path.join(settings.FIT_CACHE_DIR, f"{name}_{model}.csv")
+
+    cached = None
+    if os.path.exists(path):
+        cached = pd.read_csv(path, index_col=0, parse_dates=True)
+
+    # Columns as terms in months, averaging duplicate terms (e.g. 12M, 1Y)
+    months = [get_bond_info(ticker)["months"] for ticker in data.columns]
+    data = data.loc[:, [m is not None for m in months]]
+    data.columns = [m for m in months if m is not None]
+    data = data.groupby(level=0, axis=1).mean().sort_index()
+
+    init = None
+    if cached is not None and not cached.empty:
+        data = data.loc[~data.index.isin(cached.index[:-1])]
+        # Warm-start from the last successful fit (sparse dates are all NaN)
+        fitted = cached.dropna()
+        if not fitted.empty:
+            init = fitted.iloc[-1].to_numpy()
+
+    if data.empty:
+        return cached
+
+    logger.info(f"Fitting {len(data)} [{country_name}] curves ({model})")
+    params = fit_curves(data, model, init=init, **kwargs)
+    if cached is not None:
+        params = pd.concat([cached.drop(params.index, errors="ignore"), params])
+    params = params.sort_index()
+
+    os.makedirs(settings.FIT_CACHE_DIR, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    params.to_csv(tmp_path)
+    os.replace(tmp_path, path)
+
+    return params
@@ -0,0 +1,197 @@
+"""
+yieldcurves.gateway
+~~~~~~~~~~~~~~~~~~~
+
+Process-wide gateway for upstream calls, combining a token-bucket rate limiter,
+retries with exponential backoff (and jitter), a circuit breaker failing fast
+while upstream is down, and single-flight coalescing of identical calls.
+"""
+
+import logging
+import random
+import threading
+from concurrent.futures import Future
+from time import monotonic, sleep
+from typing import Callable, Dict, Hashable, Optional
+
+from . import metrics, settings
+
+
+__all__ = (
+    "CircuitBreaker",
+    "CircuitOpenError",
+    "Gateway",
+    "TokenBucket",
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitOpenError(ConnectionError):
+    """Raised without calling upstream while the circuit is open"""
+
+
+class TokenBucket:
+    """Allow `rate` calls per second on average, in bursts of up to `burst`"""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated_at = monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Take a token, waiting for one to be available if needed"""
+        while True:
+            with self._lock:
+                now = monotonic()
+                elapsed = now - self._updated_at
+                self._tokens = min(self.burst, self._tokens + elapsed * self.rate)
+                self._updated_at = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            sleep(wait)
+
+
+class CircuitBreaker:
+    """Open after `failure_threshold` consecutive failures, rejecting calls for
+    `reset_timeout` seconds before letting a single trial call through"""
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self) -> bool:
+        return self._opened_at is not None
+
+    def allow(self):
+        """Raise `CircuitOpenError` if calls are currently rejected"""
+        with self._lock:
+            if self._opened_at is None:
+                return
+            if monotonic() - self._opened_at < self.reset_timeout:
+                raise CircuitOpenError("Upstream circuit is open")
+            if self._trial_running:
+                raise CircuitOpenError("Upstream circuit is half-open")
+            self._trial_running = True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial_running = False
+            if self._opened_at is not None or self._failures >= self.failure_threshold:
+                if self._opened_at is None:
+                    logger.error("Upstream circuit opened")
+                self._opened_at = monotonic()
+
+
+class Gateway:
+    """Rate-limited, retried and coalesced upstream calls
+
+    Only `ConnectionError`s are retried (and count as failures for the circuit
+    breaker); other exceptions, e.g. `IndexError` for missing data, are returned
+    to the caller as is. Results of coalesced calls are shared by all callers and
+    must be treated as read-only.
+
+    Parameters
+    ----------
+    rate : float
+        upstream calls per second, on average
+    burst : int
+        maximum # of calls made at once after idling
+    max_retries : int
+        # of attempts per call, at least 1
+    backoff_base : float
+        delay (in seconds) before the first retry, doubling at each retry
+    backoff_max : float
+        maximum delay (in seconds) between retries
+    failure_threshold : int
+        consecutive failures opening the circuit
+    reset_timeout : float
+        seconds before a trial call is let through an open circuit
+    """
+
+    def __init__(
+        self,
+        rate: float = settings.UPSTREAM_RATE,
+        burst: int = settings.UPSTREAM_BURST,
+        max_retries: int = settings.MAX_RETRIES_ON_CONNECTION_ERROR,
+        backoff_base: float = settings.BACKOFF_BASE,
+        backoff_max: float = settings.BACKOFF_MAX,
+        failure_threshold: int = settings.CIRCUIT_FAILURE_THRESHOLD,
+        reset_timeout: float = settings.CIRCUIT_RESET_TIMEOUT,
+    ):
+        if max_retries < 1:
+            raise ValueError(f"Invalid max_retries [{max_retries}], must be >= 1")
+
+        self.bucket = TokenBucket(rate, burst)
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        self._in_flight: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+
+    def get_backoff(self, attempt: int) -> float:
+        """Delay before retry # `attempt` (starting at 0), with full jitter"""
+        return random.uniform(
+            0, min(self.backoff_max, self.backoff_base * 2**attempt)
+        )
+
+    def call(self, key: Hashable, func: Callable, *args, **kwargs):
+        """Call `func`, sharing the result with concurrent calls of the same `key`"""
+        with self._lock:
+            future = self._in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = self._in_flight[key] = Future()
+
+        if not leader:
+            metrics.inc("upstream_coalesced")
+            return future.result()
+
+        try:
+            future.set_result(self._call_with_retries(func, *args, **kwargs))
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+
+        return future.result()
+
+    def _call_with_retries(self, func: Callable, *args, **kwargs):
+        for attempt in range(self.max_retries):
+            self.breaker.allow()
+            self.bucket.acquire()
+            try:
+                result = func(*args, **kwargs)
+            except ConnectionError as e:
+                self.breaker.record_failure()
+                if attempt + 1 == self.max_retries or self.breaker.is_open:
+                    raise
+                logger.warning(f"Retrying upstream call - {e}")
+                with metrics.span("retry_sleep"):
+                    sleep(self.get_backoff(attempt))
+            except Exception:
+                self.breaker.record_success()  # Upstream did answer
+                raise
+            else:
+                self.breaker.record_success()
+                return result
@@ -0,0 +1,58 @@
+"""
+yieldcurves.locks
+~~~~~~~~~~~~~~~~~
+
+Inter-process locks, so that concurrent loaders of the same country (e.g. the
+app and `python -m yieldcurves refresh`) only fetch and write missing data once.
+"""
+
+import logging
+import os
+from contextlib import contextmanager
+from typing import Iterator
+
+from . import settings
+
+try:
+    import fcntl
+except ImportError:  # Not available on Windows
+    fcntl = None
+
+
+__all__ = ("country_lock",)
+
+
+logger = logging.getLogger(__name__)
+
+
+@contextmanager
+def country_lock(country_name: str, blocking: bool = True) -> Iterator[bool]:
+    """Lock `country_name` across processes (and threads), yielding whether the
+    lock was acquired
+
+    ...
+
+    Parameters
+    ----------
+    country_name : str
+    blocking : bool
+        whether to wait for the lock, instead of yielding `False` if it is held
+    """
+    if fcntl is None:
+        yield True
+        return
+
+    os.makedirs(settings.LOCK_DIR, exist_ok=True)
+    name = country_name.lower().strip().replace(" ", "_")
+    with open(os.path.join(settings.LOCK_DIR, f"{name}.lock"), "a") as f:
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+        except BlockingIOError:
+            logger.info(f"[{country_name}] is locked by another loader")
+            yield False
+            return
+
+        try:
+            yield True
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
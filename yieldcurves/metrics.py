@@ -0,0 +1,202 @@
+"""
+yieldcurves.metrics
+~~~~~~~~~~~~~~~~~~~
+
+Lightweight instrumentation of the hot paths: timing spans per stage (e.g.
+upstream requests, DB queries, plotting) and counters (e.g. cache hits), exported
+in Prometheus text format. Disabled by default (see `settings.METRICS_ENABLED`),
+in which case spans and counters are no-ops.
+"""
+
+import contextvars
+import logging
+import threading
+from contextlib import contextmanager, nullcontext
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from time import perf_counter
+from typing import Callable, ContextManager, Dict, Iterator, List, Tuple
+
+from . import settings
+
+
+__all__ = (
+    "collect",
+    "enable",
+    "enabled",
+    "inc",
+    "propagate",
+    "render",
+    "reset",
+    "span",
+    "start_http_server",
+    "timed",
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+# Globals
+# ----
+PREFIX = "yieldcurves"
+NOOP = nullcontext()
+
+Labels = Tuple[Tuple[str, str], ...]
+
+_enabled = settings.METRICS_ENABLED
+_lock = threading.Lock()
+_counters: Dict[Tuple[str, Labels], float] = {}
+_timings: Dict[str, List[float]] = {}  # stage -> [count, sum]
+_buffers: contextvars.ContextVar = contextvars.ContextVar(
+    "buffers", default=()
+)  # Stack of `collect` buffers (see `propagate` for worker threads)
+
+
+def enabled() -> bool:
+    return _enabled
+
+
+def enable(flag: bool = True):
+    global _enabled
+    _enabled = flag
+
+
+def reset():
+    with _lock:
+        _counters.clear()
+        _timings.clear()
+
+
+def inc(name: str, value: float = 1, **labels: str):
+    """Increment counter `name`, e.g. inc("cache_requests", result="hit")"""
+    if not _enabled:
+        return
+
+    key = (name, tuple(sorted(labels.items())))
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def _observe(stage: str, seconds: float):
+    with _lock:
+        timing = _timings.setdefault(stage, [0, 0.0])
+        timing[0] += 1
+        timing[1] += seconds
+
+    for buffer in _buffers.get():
+        buffer.append((stage, seconds))
+
+
+@contextmanager
+def _span(stage: str) -> Iterator[None]:
+    t0 = perf_counter()
+    try:
+        yield
+    finally:
+        _observe(stage, perf_counter() - t0)
+
+
+def span(stage: str) -> ContextManager:
+    """Time the enclosed block as `stage`"""
+    return _span(stage) if _enabled else NOOP
+
+
+def timed(stage: str) -> Callable:
+    """Decorator to time each call as `stage`"""
+
+    def decorator(func: Callable) -> Callable:
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            with _span(stage):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+@contextmanager
+def collect() -> Iterator[List[Tuple[str, float]]]:
+    """Collect the (stage, seconds) of spans ending in the current context, e.g.
+    for per-rerun timings in the app
+
+    Spans in pool workers are only collected if the work was wrapped with
+    `propagate`.
+    """
+    buffer = []
+    token = _buffers.set(_buffers.get() + (buffer,))
+    try:
+        yield buffer
+    finally:
+        _buffers.reset(token)
+
+
+def propagate(func: Callable) -> Callable:
+    """Wrap `func` to run in a copy of the caller's context, e.g. so that spans
+    ending in a pool worker reach the caller's `collect` buffers"""
+    context = contextvars.copy_context()
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        # A context can't be entered by concurrent workers, so copy it per call
+        return context.copy().run(func, *args, **kwargs)
+
+    return wrapper
+
+
+def render() -> str:
+    """All metrics, in Prometheus text format"""
+    with _lock:
+        counters = sorted(_counters.items())
+        timings = sorted(_timings.items())
+
+    lines = []
+    seen = set()
+    for (name, labels), value in counters:
+        metric = f"{PREFIX}_{name}_total"
+        if metric not in seen:
+            lines.append(f"# TYPE {metric} counter")
+            seen.add(metric)
+        label_str = ",".join(f'{k}="{v}"' for k, v in labels)
+        lines.append(f"{metric}{{{label_str}}} {value:g}")
+
+    if timings:
+        metric = f"{PREFIX}_stage_seconds"
+        lines.append(f"# TYPE {metric} summary")
+        for stage, (count, total) in timings:
+            lines.append(f'{metric}_count{{stage="{stage}"}} {count}')
+            lines.append(f'{metric}_sum{{stage="{stage}"}} {total:.6f}')
+
+    return "\n".join(lines) + "\n"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+
+        body = render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+
+
+def start_http_server(
+    port: int = settings.METRICS_PORT, addr: str = "127.0.0.1"
+) -> ThreadingHTTPServer:
+    """Serve metrics at http://`addr`:`port`/metrics from a daemon thread"""
+    server = ThreadingHTTPServer((addr, port), _MetricsHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    logger.info(f"Serving metrics at http://{addr}:{server.server_port}/metrics")
+    return server
@@ -0,0 +1,248 @@
+"""
+yieldcurves.providers
+~~~~~~~~~~~~~~~~~~~~~
+
+Upstream data providers. `InvestpyProvider` serves live data, while
+`RecordingProvider` saves the responses of another provider to disk so that
+`ReplayProvider` can serve them offline, e.g. for benchmarks and CI, optionally
+injecting latency and errors.
+"""
+
+import json
+import logging
+import os
+import random
+import threading
+from time import sleep
+from typing import List, Optional
+
+import pandas as pd
+
+from . import settings
+from .utils import search_country
+
+
+__all__ = (
+    "DataProvider",
+    "InvestpyProvider",
+    "RecordingProvider",
+    "ReplayProvider",
+    "get_provider",
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+class DataProvider:
+    """Interface to the upstream source of bond data"""
+
+    def search_country(self, query: str) -> List[str]:
+        """Search available bonds for a given country
+
+        ...
+
+        Parameters
+        ----------
+        query : str
+            full name of target country (e.g. "united kingdom", *NOT* "uk")
+        """
+        raise NotImplementedError
+
+    def get_bond_historical_data(
+        self, ticker: str, from_date: str, to_date: str
+    ) -> pd.DataFrame:
+        """OHLC data of `ticker`, with the same semantics as in `investpy`, i.e.
+        raising `IndexError` if no data is found and `ConnectionError` on
+        network failures
+
+        ...
+
+        Parameters
+        ----------
+        ticker : str
+            e.g. Brazil 5Y
+        from_date : str
+            in DD/MM/YYYY format
+        to_date : str
+            in DD/MM/YYYY format
+        """
+        raise NotImplementedError
+
+
+class InvestpyProvider(DataProvider):
+    """Live data from `investpy`, with bonds searched in the local `universe`"""
+
+    def search_country(self, query: str) -> List[str]:
+        return search_country(query)
+
+    def get_bond_historical_data(
+        self, ticker: str, from_date: str, to_date: str
+    ) -> pd.DataFrame:
+        import investpy  # Slow to import, only required for live data
+
+        return investpy.get_bond_historical_data(
+            ticker, from_date=from_date, to_date=to_date
+        )
+
+
+class RecordingProvider(DataProvider):
+    """Forwards calls to `provider`, saving responses under `root`
+
+    Histories are merged into a single file per ticker, so replays can serve any
+    date range within the recorded ones.
+    """
+
+    def __init__(
+        self, provider: Optional[DataProvider] = None, root: Optional[str] = None
+    ):
+        self.provider = provider or InvestpyProvider()
+        self.root = root or settings.RECORDINGS_DIR
+        self._lock = threading.Lock()
+
+    def search_country(self, query: str) -> List[str]:
+        tickers = self.provider.search_country(query)
+        path = _get_search_path(self.root, query)
+        with self._lock:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w") as f:
+                json.dump(tickers, f)
+        return tickers
+
+    def get_bond_historical_data(
+        self, ticker: str, from_date: str, to_date: str
+    ) -> pd.DataFrame:
+        df = self.provider.get_bond_historical_data(ticker, from_date, to_date)
+        path = _get_history_path(self.root, ticker)
+        with self._lock:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            if os.path.exists(path):
+                old = pd.read_pickle(path)
+                new = df.combine_first(old)
+            else:
+                new = df
+            new.sort_index().to_pickle(path)
+        return df
+
+
+class ReplayProvider(DataProvider):
+    """Serves responses saved by `RecordingProvider` from `root`
+
+    Each history call sleeps for `latency` +/- `jitter` seconds, and fails with
+    `ConnectionError` or `IndexError` at the given rates. Ranges outside the
+    recorded data raise `IndexError`, as in `investpy`. Searches are served
+    as is, as live ones are local too (see `universe`).
+
+    Parameters
+    ----------
+    root : str, optional
+        defaults to `settings.RECORDINGS_DIR`
+    latency : float
+        mean per-call latency, in seconds
+    jitter : float
+        maximum deviation from `latency`, in seconds
+    connection_error_rate : float
+        share of history calls raising `ConnectionError`
+    index_error_rate : float
+        share of history calls raising `IndexError`
+    seed : int, optional
+        for repeatable latencies and errors
+    """
+
+    def __init__(
+        self,
+        root: Optional[str] = None,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        connection_error_rate: float = 0.0,
+        index_error_rate: float = 0.0,
+        seed: Optional[int] = None,
+    ):
+        self.root = root or settings.RECORDINGS_DIR
+        self.latency = latency
+        self.jitter = jitter
+        self.connection_error_rate = connection_error_rate
+        self.index_error_rate = index_error_rate
+
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._histories = {}
+
+    def _simulate_call(self):
+        with self._lock:
+            delay = self.latency + self._rng.uniform(-self.jitter, self.jitter)
+            draw = self._rng.random()
+
+        sleep(max(delay, 0))
+        if draw < self.connection_error_rate:
+            raise ConnectionError("Injected connection error")
+        if draw < self.connection_error_rate + self.index_error_rate:
+            raise IndexError("Injected ERR#0069: no data found")
+
+    def search_country(self, query: str) -> List[str]:
+        try:
+            with open(_get_search_path(self.root, query)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            logger.error(f"No recording for query [{query}]")
+            return []
+
+    def get_bond_historical_data(
+        self, ticker: str, from_date: str, to_date: str
+    ) -> pd.DataFrame:
+        self._simulate_call()
+
+        df = self._load_history(ticker)
+        start = pd.to_datetime(from_date, format=settings.INVESTPY_DATE_FORMAT)
+        end = pd.to_datetime(to_date, format=settings.INVESTPY_DATE_FORMAT)
+        if df is not None:
+            df = df.loc[start:end]
+        if df is None or df.empty:
+            raise IndexError("ERR#0069: no data found")
+        return df.copy()
+
+    def _load_history(self, ticker: str) -> Optional[pd.DataFrame]:
+        try:
+            return self._histories[ticker]
+        except KeyError:
+            path = _get_history_path(self.root, ticker)
+            df = pd.read_pickle(path) if os.path.exists(path) else None
+            self._histories[ticker] = df
+            return df
+
+
+def _get_search_path(root: str, query: str) -> str:
+    name = query.lower().strip().replace(" ", "_")
+    return os.path.join(root, "search", f"{name}.json")
+
+
+def _get_history_path(root: str, ticker: str) -> str:
+    name = ticker.lower().replace(" ", "_")
+    return os.path.join(root, "history", f"{name}.pkl")
+
+
+def get_provider(name: Optional[str] = None) -> DataProvider:
+    """Build the data provider `name`, defaulting to `settings.DATA_PROVIDER`
+
+    ...
+
+    Parameters
+    ----------
+    name : str, optional
+        one of {investpy, record, replay}
+    """
+    name = name or settings.DATA_PROVIDER
+    if name == "investpy":
+        return InvestpyProvider()
+    elif name == "record":
+        return RecordingProvider()
+    elif name == "replay":
+        return ReplayProvider(
+            latency=settings.REPLAY_LATENCY,
+            jitter=settings.REPLAY_JITTER,
+            connection_error_rate=settings.REPLAY_CONNECTION_ERROR_RATE,
+            index_error_rate=settings.REPLAY_INDEX_ERROR_RATE,
+            seed=settings.REPLAY_SEED,
+        )
+
+    raise ValueError(f"Unrecognized data provider [{name}]")
@@ -0,0 +1,128 @@
+"""
+yieldcurves.refresh
+~~~~~~~~~~~~~~~~~~~
+
+Background refresher, periodically pulling the newest bars of tracked countries
+into the cache so that interactive requests are always served warm.
+"""
+
+import logging
+import random
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from time import monotonic, sleep
+from typing import List, Optional
+
+from . import settings
+from .backends import CacheBackend
+from .data_handlers import LOCAL_CACHE_BACKEND, get_ohlc_yield_history
+from .locks import country_lock
+
+
+__all__ = ("refresh_country", "run_refresher")
+
+
+logger = logging.getLogger(__name__)
+
+
+def refresh_country(
+    country_name: str,
+    lookback_days: int = settings.REFRESH_LOOKBACK_DAYS,
+    backend: Optional[CacheBackend] = LOCAL_CACHE_BACKEND,
+) -> Optional[bool]:
+    """Pull the last `lookback_days` of data for `country_name` into the cache
+
+    Only dates not yet covered by the cache (see `coverage`) are requested. Returns
+    `None` if the country is already being loaded elsewhere (and skipped).
+    """
+    today = datetime.today()
+    from_date = today - timedelta(days=lookback_days)
+
+    with country_lock(country_name, blocking=False) as acquired:
+        if not acquired:
+            return
+
+        df = get_ohlc_yield_history(
+            country_name,
+            from_date=from_date.strftime(settings.INVESTPY_DATE_FORMAT),
+            to_date=today.strftime(settings.INVESTPY_DATE_FORMAT),
+            backend=backend,
+            lock=False,
+        )
+        return df is not None
+
+
+def _refresh_with_jitter(country_name: str, jitter: float, lookback_days: int):
+    sleep(random.uniform(0, jitter))
+    try:
+        ok = refresh_country(country_name, lookback_days)
+    except Exception as e:
+        logger.exception(f"Failed to refresh [{country_name}] - {e}")
+    else:
+        if ok is not None:
+            logger.info(f"Refreshed [{country_name}] ({'ok' if ok else 'no data'})")
+
+
+def _update_analytics(countries: List[str]):
+    from .analytics import update_analytics
+
+    try:
+        update_analytics(countries)
+    except Exception as e:
+        logger.exception(f"Failed to update analytics - {e}")
+
+
+def run_refresher(
+    countries: List[str],
+    interval: float = settings.REFRESH_INTERVAL,
+    jitter: float = settings.REFRESH_JITTER,
+    workers: int = settings.REFRESH_WORKERS,
+    lookback_days: int = settings.REFRESH_LOOKBACK_DAYS,
+    once: bool = False,
+    analytics: bool = False,
+):
+    """Refresh `countries` every `interval` seconds, spreading requests randomly
+    over the first `jitter` seconds of each cycle
+
+    ...
+
+    Parameters
+    ----------
+    countries : List[str]
+    interval : float
+        # of seconds between the start of each cycle
+    jitter : float
+        maximum random delay (in seconds) before refreshing each country
+    workers : int
+        # of countries refreshed concurrently
+    lookback_days : int
+        # of days requested for each country (already cached dates are skipped)
+    once : bool
+        run a single cycle and return
+    analytics : bool
+        whether to update `countries`' analytics after each cycle (see `analytics`)
+    """
+    if not LOCAL_CACHE_BACKEND:
+        logger.error("No cache backend available, nothing to refresh.")
+        return
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        while True:
+            t0 = monotonic()
+            countries = random.sample(countries, len(countries))
+            list(
+                executor.map(
+                    lambda country: _refresh_with_jitter(
+                        country, jitter, lookback_days
+                    ),
+                    countries,
+                )
+            )
+            if analytics:
+                _update_analytics(countries)
+            if once:
+                return
+
+            elapsed = monotonic() - t0
+            logger.info(f"Refreshed {len(countries)} countries in {elapsed:.1f}s")
+            sleep(max(interval - elapsed, 0))
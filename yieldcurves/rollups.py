@@ -0,0 +1,121 @@
+"""
+yieldcurves.rollups
+~~~~~~~~~~~~~~~~~~~
+
+Weekly and monthly OHLC rollups of daily bars (open-first, high-max, low-min,
+close-last), maintained by cache backends as daily data is written, so that long
+windows can be read at a coarser resolution (see `pick_resolution`).
+
+Each rollup row is labeled by the last day of its period (e.g. Fridays for weekly
+rollups), and periods overlapping the edges of a window are kept whole.
+"""
+
+from typing import Optional, Tuple
+
+import pandas as pd
+
+
+__all__ = (
+    "RESOLUTIONS",
+    "get_window",
+    "pick_resolution",
+    "resample_ohlc",
+    "update_rollup",
+)
+
+
+# Globals
+# ----
+# Finest to coarsest, as pandas offset aliases (with daily bars as stored)
+RESOLUTIONS = {
+    "daily": None,
+    "weekly": "W-FRI",
+    "monthly": "M",
+}
+DAYS_PER_POINT = {
+    "daily": 7 / 5,  # Business days
+    "weekly": 7,
+    "monthly": 365.25 / 12,
+}
+AGGREGATIONS = {"open": "first", "high": "max", "low": "min", "close": "last"}
+
+
+def resample_ohlc(df: pd.DataFrame, resolution: str) -> pd.DataFrame:
+    """Roll daily OHLC bars up to `resolution`, skipping periods without data
+
+    ...
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        (dates x fields) daily bars, with any of {open, high, low, close} columns
+    resolution : str
+        one of `RESOLUTIONS`
+    """
+    if RESOLUTIONS[resolution] is None:
+        return df
+
+    aggregations = {k: v for k, v in AGGREGATIONS.items() if k in df.columns}
+    rollup = df.resample(RESOLUTIONS[resolution]).agg(aggregations)
+    rollup.index.name = df.index.name
+    return rollup.dropna(how="all")
+
+
+def get_window(
+    from_date: Optional[str], to_date: Optional[str], resolution: str
+) -> Tuple[Optional[pd.Timestamp], Optional[pd.Timestamp]]:
+    """First and last day of the `resolution` periods overlapping [`from_date`,
+    `to_date`], i.e. the daily bars needed to roll them up"""
+    freq = RESOLUTIONS[resolution] or "D"
+    if from_date is not None:
+        from_date = pd.Timestamp(from_date).to_period(freq).start_time
+    if to_date is not None:
+        to_date = pd.Timestamp(to_date).to_period(freq).end_time.normalize()
+    return from_date, to_date
+
+
+def update_rollup(
+    old: Optional[pd.DataFrame], daily: pd.DataFrame, resolution: str
+) -> pd.DataFrame:
+    """Replace the periods of `old` covered by `daily` with their new rollups
+
+    `daily` must hold every daily bar of the periods it overlaps (see
+    `get_window`).
+
+    Parameters
+    ----------
+    old : pd.DataFrame, optional
+        current rollups
+    daily : pd.DataFrame
+        (dates x fields) daily bars
+    resolution : str
+        one of `RESOLUTIONS`
+    """
+    new = resample_ohlc(daily.sort_index(), resolution)
+    if old is None or old.empty:
+        return new
+
+    start, end = get_window(daily.index.min(), daily.index.max(), resolution)
+    old = old.loc[(old.index < start) | (old.index > end)]
+    return pd.concat([old, new]).sort_index()
+
+
+def pick_resolution(from_date: str, to_date: str, max_points: int) -> str:
+    """The finest resolution with at most `max_points` in [`from_date`,
+    `to_date`], or the coarsest one if none fits
+
+    ...
+
+    Parameters
+    ----------
+    from_date : str
+        in YYYY-MM-DD format
+    to_date : str
+        in YYYY-MM-DD format
+    max_points : int
+    """
+    n_days = (pd.Timestamp(to_date) - pd.Timestamp(from_date)).days + 1
+    for resolution, days_per_point in DAYS_PER_POINT.items():
+        if n_days / days_per_point <= max_points:
+            return resolution
+    return resolution
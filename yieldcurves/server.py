@@ -0,0 +1,435 @@
+"""
+yieldcurves.server
+~~~~~~~~~~~~~~~~~~
+
+Headless HTTP service exposing cached curves to dashboards and notebooks, e.g.
+`python -m yieldcurves serve`:
+
+    GET /<country>/history?from=DD/MM/YYYY&to=DD/MM/YYYY&field=close&max_points=500
+    GET /<country>/latest?field=close
+    GET /<country>/curve?date=YYYY-MM-DD&method=cubic&field=close
+
+All parameters are optional. With `max_points`, long histories are returned as
+weekly or monthly bars (see `rollups`). Frames are returned as JSON (`orient="split"`,
+gzipped if accepted), or as an Arrow IPC stream for bulk pulls, with `Accept:
+application/vnd.apache.arrow.stream` or `?format=arrow`.
+
+Responses are built once and shared by all clients through an in-process cache.
+They carry ETag/Last-Modified validators derived from the cache's last write (see
+`coverage.get_last_modified`), so repeat polls get a 304 until new data lands.
+"""
+
+import gzip
+import hashlib
+import json
+import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from importlib.util import find_spec
+from time import monotonic
+from typing import Callable, Dict, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+
+import numpy as np
+import pandas as pd
+
+from . import data_handlers, metrics, settings
+from .backends import CacheBackend
+from .coverage import get_last_modified
+from .fitting import MODELS, evaluate_curves, fit_curves
+from .utils import (
+    flip_date_format,
+    get_terms,
+    get_tickvals,
+    interpolate_curves,
+    sort_by_term,
+)
+
+
+__all__ = (
+    "CurveService",
+    "make_server",
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+# Globals
+# ----
+JSON_TYPE = "application/json"
+ARROW_TYPE = "application/vnd.apache.arrow.stream"
+FIELDS = ("open", "high", "low", "close")
+METHODS = ("linear", "quadratic", "cubic", *MODELS)
+CURVE_LOOKBACK_DAYS = 31  # Window searched for the last date on/before `date`
+
+Key = Tuple[str, str, Tuple[Tuple[str, str], ...]]
+
+
+class _Entry:
+    """A built response, encoded lazily per format"""
+
+    def __init__(self, frame: pd.DataFrame, last_modified: datetime):
+        self.frame = frame
+        self.last_modified = last_modified
+        self.built_at = self.validated_at = monotonic()
+        self._bodies: Dict[str, Tuple[bytes, str]] = {}
+
+    def get_body(self, fmt: str) -> Tuple[bytes, str]:
+        """(body, ETag) for `fmt`, one of {json, json+gzip, arrow}"""
+        try:
+            return self._bodies[fmt]
+        except KeyError:
+            pass
+
+        if fmt == "arrow":
+            body = _to_arrow(self.frame)
+        else:
+            body = self.frame.to_json(orient="split", date_format="iso").encode()
+            if fmt == "json+gzip":
+                body = gzip.compress(body, mtime=0)
+
+        etag = f'"{hashlib.sha1(body).hexdigest()[:20]}"'
+        self._bodies[fmt] = body, etag
+        return body, etag
+
+
+def _to_arrow(frame: pd.DataFrame) -> bytes:
+    import pyarrow as pa
+
+    table = pa.Table.from_pandas(frame.rename(columns=str), preserve_index=True)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+class CurveService:
+    """Builds the frames served for each (country, endpoint, params), shared by
+    all clients
+
+    Within `ttl` seconds, cached responses are served without touching the
+    backend. Afterwards, they are revalidated against the last write to the
+    cache, and only rebuilt if it changed (or at least every
+    `settings.RECENT_DATA_TTL` seconds, so recent data gets requested again).
+
+    Parameters
+    ----------
+    backend : CacheBackend, optional
+        cache backend, e.g. `dbm.Manager` (skipped if `None`)
+    ttl : int, optional
+        defaults to `settings.SERVER_CACHE_TTL`
+    max_entries : int, optional
+        defaults to `settings.SERVER_CACHE_MAX_ENTRIES`
+    """
+
+    def __init__(
+        self,
+        backend: Optional[CacheBackend] = data_handlers.LOCAL_CACHE_BACKEND,
+        ttl: Optional[int] = None,
+        max_entries: Optional[int] = None,
+    ):
+        self.backend = backend
+        self.ttl = settings.SERVER_CACHE_TTL if ttl is None else ttl
+        self.max_entries = max_entries or settings.SERVER_CACHE_MAX_ENTRIES
+
+        self._entries: "OrderedDict[Key, _Entry]" = OrderedDict()
+        self._building: Dict[Key, list] = {}  # [lock, # of requests using it]
+        self._lock = threading.Lock()
+        self._endpoints: Dict[str, Callable[[str, dict], Optional[pd.DataFrame]]] = {
+            "history": self.get_history,
+            "latest": self.get_latest,
+            "curve": self.get_curve,
+        }
+
+    def get(self, country: str, endpoint: str, params: Dict[str, str]) -> _Entry:
+        """Cached response for `endpoint`, raising `KeyError` if there is no
+        such endpoint or data, and `ValueError` on invalid `params`"""
+        if endpoint not in self._endpoints:
+            raise KeyError(f"Unrecognized endpoint [{endpoint}]")
+        build = self._endpoints[endpoint]
+        country = country.lower().strip()
+        key = (country, endpoint, tuple(sorted(params.items())))
+
+        with self._lock:
+            entry = self._get_fresh(key)
+            if entry is not None:
+                metrics.inc("server_cache", result="hit")
+                return entry
+            building = self._building.setdefault(key, [threading.Lock(), 0])
+            building[1] += 1
+
+        # Concurrent requests for the same key wait for a single build, sharing
+        # its lock until no request is left waiting on it
+        try:
+            with building[0]:
+                with self._lock:
+                    entry = self._get_fresh(key)
+                    if entry is not None:
+                        metrics.inc("server_cache", result="hit")
+                        return entry
+                    entry = self._entries.get(key)
+
+                last_modified = self.get_last_modified(country)
+                if (
+                    entry is not None
+                    and last_modified == entry.last_modified
+                    and monotonic() - entry.built_at < settings.RECENT_DATA_TTL
+                ):
+                    metrics.inc("server_cache", result="revalidated")
+                    entry.validated_at = monotonic()
+                    return entry
+
+                metrics.inc("server_cache", result="miss")
+                with metrics.span("server_build"):
+                    frame = build(country, dict(params))
+                if frame is None or frame.empty:
+                    raise KeyError(f"No data for [{country}]")
+
+                last_modified = self.get_last_modified(country) or datetime.now()
+                entry = _Entry(frame, last_modified)
+                with self._lock:
+                    self._entries[key] = entry
+                    while len(self._entries) > self.max_entries:
+                        self._entries.popitem(last=False)
+                return entry
+        finally:
+            with self._lock:
+                building[1] -= 1
+                if not building[1]:
+                    self._building.pop(key, None)
+
+    def _get_fresh(self, key: Key) -> Optional[_Entry]:
+        entry = self._entries.get(key)
+        if entry is not None and monotonic() - entry.validated_at < self.ttl:
+            self._entries.move_to_end(key)
+            return entry
+
+    def get_last_modified(self, country: str) -> Optional[datetime]:
+        """Last write to the cache for any of `country`'s bonds"""
+        if not self.backend:
+            return
+
+        tickers = data_handlers.DATA_PROVIDER.search_country(country)
+        db_tickers = [data_handlers._to_db_ticker(ticker) for ticker in tickers]
+        return get_last_modified(self.backend.find_coverage(db_tickers).values())
+
+    def get_history(self, country: str, params: dict) -> Optional[pd.DataFrame]:
+        """(dates x bonds) yields, between `from` and `to` (in DD/MM/YYYY format),
+        with at most `max_points` dates if set"""
+        field = _pop_field(params)
+        from_date = _parse_date(params.pop("from", "01/01/2020"))
+        to_date = _parse_date(params.pop("to", _today()))
+        max_points = params.pop("max_points", None)
+        _check_unused(params)
+        if max_points is not None:
+            max_points = int(max_points)  # Raises `ValueError`
+            if max_points < 1:
+                raise ValueError(f"Invalid max_points [{max_points}]")
+
+        return self._load_history(country, from_date, to_date, field, max_points)
+
+    def get_latest(self, country: str, params: dict) -> Optional[pd.DataFrame]:
+        """Last (date x bonds) yields"""
+        field = _pop_field(params)
+        _check_unused(params)
+
+        df = data_handlers.get_recent_yield(
+            country, field=field, n_rows=1, backend=self.backend
+        )
+        if df is not None:
+            return df.rename_axis("date")
+
+    def get_curve(self, country: str, params: dict) -> Optional[pd.DataFrame]:
+        """(date x terms in months) curve, interpolated as in the app, on the
+        last date on or before `date` (in YYYY-MM-DD format, defaults to today)"""
+        field = _pop_field(params)
+        method = params.pop("method", "cubic")
+        to_date = pd.Timestamp(params.pop("date", None) or datetime.today()).normalize()
+        _check_unused(params)
+        if method not in METHODS:
+            raise ValueError(f"Unrecognized method [{method}]")
+
+        from_date = to_date - timedelta(days=CURVE_LOOKBACK_DAYS)
+        df = self._load_history(
+            country,
+            from_date.strftime(settings.INVESTPY_DATE_FORMAT),
+            to_date.strftime(settings.INVESTPY_DATE_FORMAT),
+            field,
+        )
+        if df is None:
+            return
+
+        tickers = sort_by_term(list(df))
+        data = df[tickers].dropna(thresh=settings.MIN_VALID_CURVE_THRESHOLD).tail(1)
+        if data.empty:
+            return
+
+        data.columns = get_tickvals(get_terms(tickers))
+        grid = np.arange(1, data.columns[-1] + 1)  # Up to longest mty
+        if method in MODELS:
+            curves = evaluate_curves(fit_curves(data, model=method), grid)
+        else:
+            curves = interpolate_curves(data, method=method, grid=grid)
+        curves.columns = grid
+        return curves.rename_axis("date")
+
+    def _load_history(
+        self,
+        country: str,
+        from_date: str,
+        to_date: str,
+        field: str,
+        max_points: Optional[int] = None,
+    ) -> Optional[pd.DataFrame]:
+        df = data_handlers.get_ohlc_yield_history(
+            country, from_date, to_date, backend=self.backend, max_points=max_points
+        )
+        if df is not None:
+            return df.xs(field, 1, 1).rename_axis("date")
+
+
+def _pop_field(params: dict) -> str:
+    field = params.pop("field", "close").lower()
+    if field not in FIELDS:
+        raise ValueError(f"Unrecognized field [{field}]")
+    return field
+
+
+def _check_unused(params: dict):
+    if params:
+        raise ValueError(f"Unrecognized parameters {sorted(params)}")
+
+
+def _today() -> str:
+    return datetime.today().strftime(settings.INVESTPY_DATE_FORMAT)
+
+
+def _parse_date(date: str) -> str:
+    """Validate a DD/MM/YYYY date (also accepting YYYY-MM-DD)"""
+    if date[:4].isdigit():
+        date = flip_date_format(date)
+    datetime.strptime(date, settings.INVESTPY_DATE_FORMAT)  # Raises `ValueError`
+    return date
+
+
+def _to_http_date(dt: datetime) -> str:
+    return format_datetime(dt.astimezone(timezone.utc), usegmt=True)
+
+
+def _is_not_modified(headers, etag: str, last_modified: datetime) -> bool:
+    """Whether the conditional request `headers` match the current validators,
+    with If-None-Match taking precedence over If-Modified-Since"""
+    if_none_match = headers.get("If-None-Match")
+    if if_none_match is not None:
+        tags = [tag.strip() for tag in if_none_match.split(",")]
+        tags = [tag[2:] if tag.startswith("W/") else tag for tag in tags]
+        return "*" in tags or etag in tags
+
+    if_modified_since = headers.get("If-Modified-Since")
+    if if_modified_since:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        modified = last_modified.astimezone(timezone.utc).replace(microsecond=0)
+        return since.tzinfo is not None and modified <= since
+
+    return False
+
+
+class _CurveHandler(BaseHTTPRequestHandler):
+    server_version = "yieldcurves"
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        parts = [unquote(part) for part in url.path.strip("/").split("/")]
+        params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        fmt = params.pop("format", None)
+
+        if len(parts) != 2:
+            return self._send_error(404, "Expected /<country>/<endpoint>")
+        country, endpoint = parts
+
+        if fmt is None:
+            fmt = "arrow" if ARROW_TYPE in self.headers.get("Accept", "") else "json"
+        if fmt not in ("json", "arrow"):
+            return self._send_error(400, f"Unrecognized format [{fmt}]")
+        if fmt == "arrow" and find_spec("pyarrow") is None:
+            return self._send_error(406, "`pyarrow` is required for Arrow responses")
+        if fmt == "json" and "gzip" in self.headers.get("Accept-Encoding", ""):
+            fmt = "json+gzip"
+
+        try:
+            entry = self.server.service.get(country, endpoint, params)
+        except KeyError as e:
+            return self._send_error(404, str(e).strip("'\""))
+        except ValueError as e:
+            return self._send_error(400, str(e))
+        except ConnectionError as e:
+            return self._send_error(503, str(e))
+        except Exception as e:
+            logger.exception(f"Failed to serve [{self.path}] - {e}")
+            return self._send_error(500, "Internal server error")
+
+        body, etag = entry.get_body(fmt)
+        not_modified = _is_not_modified(self.headers, etag, entry.last_modified)
+        status = 304 if not_modified else 200
+        metrics.inc("server_requests", endpoint=endpoint, status=str(status))
+
+        self.send_response(status)
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", _to_http_date(entry.last_modified))
+        self.send_header("Cache-Control", "no-cache")  # Always revalidate
+        self.send_header("Vary", "Accept, Accept-Encoding")
+        if not_modified:
+            self.end_headers()
+            return
+
+        self.send_header("Content-Type", ARROW_TYPE if fmt == "arrow" else JSON_TYPE)
+        if fmt == "json+gzip":
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_error(self, status: int, message: str):
+        metrics.inc("server_requests", endpoint="error", status=str(status))
+        body = json.dumps({"error": message}).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", JSON_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+
+
+def make_server(
+    host: str = settings.SERVER_HOST,
+    port: int = settings.SERVER_PORT,
+    service: Optional[CurveService] = None,
+) -> ThreadingHTTPServer:
+    """Build the curve server (call `serve_forever` to start it)
+
+    ...
+
+    Parameters
+    ----------
+    host : str
+    port : int
+        0 to pick any free port
+    service : CurveService, optional
+        defaults to a `CurveService` over `data_handlers.LOCAL_CACHE_BACKEND`
+    """
+    server = ThreadingHTTPServer((host, port), _CurveHandler)
+    server.daemon_threads = True
+    server.service = service or CurveService()
+
+    logger.info(f"Serving curves at http://{host}:{server.server_port}")
+    return server
@@ -24,6 +24,120 @@ INVESTPY_DATE_FORMAT = "%d/%m/%Y"
 # considered valid, i.e. row is not dropped.
 MIN_VALID_CURVE_THRESHOLD = 2
 MAX_RETRIES_ON_CONNECTION_ERROR = 3
+# Upstream calls (see `gateway`): at most `UPSTREAM_RATE` requests per second on
+# average (in bursts of up to `UPSTREAM_BURST`), retried after exponential
+# backoff. After `CIRCUIT_FAILURE_THRESHOLD` consecutive connection errors, calls
+# fail fast for `CIRCUIT_RESET_TIMEOUT` seconds.
+UPSTREAM_RATE = float(os.environ.get("YIELDCURVES_UPSTREAM_RATE", 2))
+UPSTREAM_BURST = int(os.environ.get("YIELDCURVES_UPSTREAM_BURST", 8))
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 30.0
+CIRCUIT_FAILURE_THRESHOLD = 5
+CIRCUIT_RESET_TIMEOUT = 60.0
+# Maximum number of tickers fetched concurrently (DB lookups, gap fills and
+# `investpy` requests) when loading a country's curve.
+MAX_FETCH_WORKERS = int(os.environ.get("YIELDCURVES_MAX_FETCH_WORKERS", 8))
+# Maximum number of countries loaded concurrently by `get_ohlc_yield_panel`, each
+# using up to `MAX_FETCH_WORKERS` workers.
+MAX_COUNTRY_WORKERS = int(os.environ.get("YIELDCURVES_MAX_COUNTRY_WORKERS", 4))
+# Size of the thread pool running blocking calls (upstream and cache I/O) for the
+# `aio` API, shared by all concurrent requests.
+ASYNC_MAX_WORKERS = int(os.environ.get("YIELDCURVES_ASYNC_MAX_WORKERS", 32))
+# Source of bond data: "investpy" (live), "record" (live, saving responses under
+# `RECORDINGS_DIR`) or "replay" (offline, serving saved responses).
+DATA_PROVIDER = os.environ.get("YIELDCURVES_DATA_PROVIDER", "investpy")
+
+# Curve fitting (see `fitting`): histories longer than `FIT_CHUNK_SIZE` dates are
+# split into chunks, fitted in up to `FIT_MAX_WORKERS` processes.
+FIT_CHUNK_SIZE = 500
+FIT_MAX_WORKERS = int(
+    os.environ.get("YIELDCURVES_FIT_MAX_WORKERS", os.cpu_count() or 1)
+)
+
+
+# Metrics
+# ----
+# Timing spans and counters on hot paths (see `metrics`), served in Prometheus
+# text format at http://localhost:`METRICS_PORT`/metrics by the app if enabled.
+METRICS_ENABLED = os.environ.get("YIELDCURVES_METRICS", "").lower() in ("1", "true")
+METRICS_PORT = int(os.environ.get("YIELDCURVES_METRICS_PORT", 9464))
+
+
+# Cache
+# ----
+# Backend used to cache `investpy` requests: "mongo" (see `dbm`), "parquet"
+# (local files under `CACHE_DIR`, no server required) or "none".
+CACHE_BACKEND = os.environ.get("YIELDCURVES_CACHE_BACKEND", "mongo")
+CACHE_DIR = os.environ.get(
+    "YIELDCURVES_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".yieldcurves")
+)
+# Responses saved by `providers.RecordingProvider`
+RECORDINGS_DIR = os.environ.get(
+    "YIELDCURVES_RECORDINGS_DIR", os.path.join(CACHE_DIR, "recordings")
+)
+# Faults injected by `providers.ReplayProvider`: per-call latency +/- jitter (in
+# seconds), shares of calls failing, and a seed for repeatable runs
+REPLAY_LATENCY = float(os.environ.get("YIELDCURVES_REPLAY_LATENCY", 0))
+REPLAY_JITTER = float(os.environ.get("YIELDCURVES_REPLAY_JITTER", 0))
+REPLAY_CONNECTION_ERROR_RATE = float(
+    os.environ.get("YIELDCURVES_REPLAY_CONNECTION_ERROR_RATE", 0)
+)
+REPLAY_INDEX_ERROR_RATE = float(
+    os.environ.get("YIELDCURVES_REPLAY_INDEX_ERROR_RATE", 0)
+)
+REPLAY_SEED = os.environ.get("YIELDCURVES_REPLAY_SEED")
+REPLAY_SEED = int(REPLAY_SEED) if REPLAY_SEED else None
+# Inter-process locks (see `locks`)
+LOCK_DIR = os.path.join(CACHE_DIR, "locks")
+# Prebuilt index of available bonds (see `universe`)
+UNIVERSE_PATH = os.path.join(CACHE_DIR, "universe.json")
+# Fitted curve parameters, per country and model (see `fitting`)
+FIT_CACHE_DIR = os.path.join(CACHE_DIR, "fits")
+# Seconds after which the most recently requested dates are requested again, as
+# data for the current day may not have been complete at the time.
+RECENT_DATA_TTL = int(os.environ.get("YIELDCURVES_RECENT_DATA_TTL", 60 * 60))
+# Partitioned Parquet exports of the cache (see `export`), read `EXPORT_BATCH_SIZE`
+# bonds at a time.
+EXPORT_DIR = os.environ.get("YIELDCURVES_EXPORT_DIR", os.path.join(CACHE_DIR, "export"))
+EXPORT_BATCH_SIZE = 50
+# Cross-country analytics (see `analytics`): spreads against `ANALYTICS_BENCHMARK`,
+# with z-scores and percentiles over rolling windows of `ANALYTICS_WINDOW` dates.
+ANALYTICS_CACHE_DIR = os.path.join(CACHE_DIR, "analytics")
+ANALYTICS_BENCHMARK = os.environ.get("YIELDCURVES_ANALYTICS_BENCHMARK", "united states")
+ANALYTICS_WINDOW = int(os.environ.get("YIELDCURVES_ANALYTICS_WINDOW", 252))
+ANALYTICS_FROM_DATE = "01/01/2018"
+# Principal components of daily curve changes (see `factors`), per country and
+# mode, over rolling windows of `FACTORS_WINDOW` changes (if not expanding).
+FACTORS_CACHE_DIR = os.path.join(CACHE_DIR, "factors")
+FACTORS_WINDOW = int(os.environ.get("YIELDCURVES_FACTORS_WINDOW", 252))
+# Storage layout used by the local DB: "document" (one document per bond) or
+# "bucket" (one document per bond and year, see `dbm.BucketManager`).
+DB_SCHEMA = os.environ.get("YIELDCURVES_DB_SCHEMA", "document")
+
+
+# Refresher (python -m yieldcurves refresh)
+# ----
+REFRESH_COUNTRIES = os.environ.get(
+    "YIELDCURVES_REFRESH_COUNTRIES",
+    "brazil,united states,united kingdom,germany,japan",
+).split(",")
+REFRESH_INTERVAL = 60 * 60  # seconds between cycles
+REFRESH_JITTER = 5 * 60  # maximum delay (in seconds) before refreshing a country
+REFRESH_WORKERS = 2  # countries refreshed concurrently
+REFRESH_LOOKBACK_DAYS = 7
+
+
+# Curve server (python -m yieldcurves serve)
+# ----
+SERVER_HOST = os.environ.get("YIELDCURVES_SERVER_HOST", "127.0.0.1")
+SERVER_PORT = int(os.environ.get("YIELDCURVES_SERVER_PORT", 8050))
+# Responses are shared by all clients and served without checking the cache for
+# new writes for `SERVER_CACHE_TTL` seconds, keeping at most
+# `SERVER_CACHE_MAX_ENTRIES` (country, endpoint, params) keys.
+SERVER_CACHE_TTL = int(os.environ.get("YIELDCURVES_SERVER_CACHE_TTL", 30))
+SERVER_CACHE_MAX_ENTRIES = int(
+    os.environ.get("YIELDCURVES_SERVER_CACHE_MAX_ENTRIES", 256)
+)
 
 
 # Streamlit app
@@ -32,3 +146,9 @@ ST_PAGE_CONFIG = dict(
     page_title="yieldcurves",
     layout="wide",
 )
+# Loaded country data is shared across reruns and sessions for `ST_CACHE_TTL`
+# seconds, keeping at most `ST_CACHE_MAX_ENTRIES` (country, dates, backend) keys.
+ST_CACHE_TTL = int(os.environ.get("YIELDCURVES_ST_CACHE_TTL", 15 * 60))
+ST_CACHE_MAX_ENTRIES = int(os.environ.get("YIELDCURVES_ST_CACHE_MAX_ENTRIES", 32))
+# Show per-rerun stage timings in the sidebar (requires `METRICS_ENABLED`)
+ST_DEBUG_PANEL = os.environ.get("YIELDCURVES_ST_DEBUG", "").lower() in ("1", "true")
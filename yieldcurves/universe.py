@@ -0,0 +1,222 @@
+"""
+yieldcurves.universe
+~~~~~~~~~~~~~~~~~~~~
+
+Prebuilt index of the bonds available at `investpy`, mapping each country to its
+tickers along with their parsed term, DB ticker and sort rank (by term, shared by
+all countries, see `utils.sort_by_term`). The index is built once, saved to
+`settings.UNIVERSE_PATH` and loaded lazily on first use.
+"""
+
+import json
+import logging
+import os
+import re
+import threading
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+from . import settings
+
+try:
+    from importlib.metadata import version
+except ImportError:  # python < 3.8
+    from importlib_metadata import version
+
+
+__all__ = (
+    "build_universe",
+    "get_bond_info",
+    "get_term_key",
+    "get_term_months",
+    "load_universe",
+    "refresh_universe",
+    "search_universe",
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+# Globals
+# ----
+TERM_PATTERN = re.compile(r"(\d+)([MYmy])")
+UNIVERSE_FORMAT = 2  # Rebuilt on changes to the saved layout
+
+_universe: Optional[dict] = None
+_bond_info: Dict[str, dict] = {}
+_lock = threading.Lock()
+
+
+def _is_valid_ticker(ticker: str) -> bool:
+    """Helper to drop tickers/terms with unwanted patterns"""
+    restricted = ["Overnight", "W"]
+    for el in restricted:
+        if el in ticker:
+            return False
+    return True
+
+
+@lru_cache(maxsize=None)
+def get_term_months(term: str) -> int:
+    """Map a term to its # of months, e.g. 5Y -> 60"""
+    match = TERM_PATTERN.fullmatch(term)
+    if not match:
+        raise ValueError(f"Unrecognized period [{term}]")
+
+    number, period = match.groups()
+    return int(number) * (12 if period.lower() == "y" else 1)
+
+
+def _parse_bond(ticker: str) -> dict:
+    """Parse term-related info from `ticker`, e.g. Brazil 5Y -> 5Y, 60 months"""
+    match = TERM_PATTERN.search(ticker)
+    term = match.group() if match else None
+    return {
+        "ticker": ticker,
+        "db_ticker": ticker.lower().replace(" ", "_"),
+        "term": term,
+        "months": get_term_months(term) if term else None,
+    }
+
+
+def get_term_key(info: dict) -> tuple:
+    """Sort key of a bond's term, by # of months with months before years (e.g.
+    12M, 1Y)"""
+    return info["months"], info["term"][-1].lower() == "y"
+
+
+def _get_investpy_version() -> str:
+    """Installed `investpy` release, without importing it (slow)"""
+    return version("investpy")
+
+
+def build_universe() -> dict:
+    """Build the bond universe from `investpy`'s bundled bonds table"""
+    import investpy
+
+    bonds = investpy.get_bonds()
+    bonds = bonds[bonds.name.map(_is_valid_ticker)]
+
+    countries = {}
+    for country, df in bonds.groupby("country", sort=False):
+        countries[country] = [
+            {**_parse_bond(ticker), "full_name": full_name}
+            for ticker, full_name in zip(df.name, df.full_name)
+        ]
+
+    # Ranks are comparable across countries
+    entries = [e for entries in countries.values() for e in entries if e["term"]]
+    ranks = {key: i for i, key in enumerate(sorted(set(map(get_term_key, entries))))}
+    for entry in entries:
+        entry["rank"] = ranks[get_term_key(entry)]
+
+    return {
+        "format": UNIVERSE_FORMAT,
+        "version": _get_investpy_version(),
+        "countries": countries,
+    }
+
+
+def refresh_universe(path: Optional[str] = None) -> dict:
+    """Rebuild the bond universe and save it to `path`"""
+    path = path or settings.UNIVERSE_PATH
+    universe = build_universe()
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(universe, f)
+    os.replace(tmp_path, path)
+
+    logger.info(f"Saved bond universe to [{path}]")
+    _set_universe(universe)
+    return universe
+
+
+def load_universe() -> dict:
+    """Returns the bond universe, loading (or building) it on first call"""
+    global _universe
+
+    if _universe is not None:
+        return _universe
+
+    with _lock:
+        if _universe is None:
+            universe = None
+            try:
+                with open(settings.UNIVERSE_PATH) as f:
+                    universe = json.load(f)
+            except (OSError, ValueError):
+                pass
+
+            # Rebuild if missing, outdated or built from a different `investpy`
+            # release
+            if (
+                not universe
+                or universe.get("format") != UNIVERSE_FORMAT
+                or universe.get("version") != _get_investpy_version()
+            ):
+                try:
+                    universe = refresh_universe()
+                except OSError as e:
+                    logger.error(f"Failed to save bond universe - {e}")
+                    universe = build_universe()
+            _set_universe(universe)
+
+    return _universe
+
+
+def _set_universe(universe: dict):
+    global _universe
+
+    for entries in universe["countries"].values():
+        for entry in entries:
+            _bond_info[entry["ticker"]] = entry
+    _universe = universe
+
+
+def get_bond_info(ticker: str) -> dict:
+    """Returns term, months and DB ticker for `ticker`, e.g. Brazil 5Y
+
+    Tickers missing from the universe are parsed (and memoized) on the fly.
+    """
+    try:
+        return _bond_info[ticker]
+    except KeyError:
+        info = _bond_info[ticker] = _parse_bond(ticker)
+        return info
+
+
+def search_universe(query: str) -> List[str]:
+    """Search available bonds for a given country
+
+    ...
+
+    Parameters
+    ----------
+    query : str
+        full name of target country (e.g. "united kingdom", *NOT* "uk")
+    """
+    countries = load_universe()["countries"]
+
+    # Exact country match
+    entries = countries.get(query.lower().strip())
+    if entries is not None:
+        return [entry["ticker"] for entry in entries]
+
+    # Fallback to searching bonds' full names, as in `investpy.search_bonds`
+    matches = {}
+    for country, entries in countries.items():
+        for entry in entries:
+            if query.lower() in entry["full_name"].lower():
+                matches.setdefault(country, []).append(entry["ticker"])
+
+    if not matches:
+        logger.error("No countries found.")
+    elif len(matches) != 1:
+        logger.error(f"Ambiguous query [{query}].")
+    else:
+        return next(iter(matches.values()))
+
+    return []
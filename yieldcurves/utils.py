@@ -1,18 +1,19 @@
 import logging
-import re
-from functools import lru_cache
-from typing import List
+from operator import itemgetter
+from typing import List, Optional, Sequence
 
-import investpy
 import numpy as np
 import pandas as pd
 
+from .universe import get_bond_info, get_term_key, get_term_months, search_universe
+
 
 __all__ = (
     "flip_date_format",
     "get_terms",
     "get_tickvals",
     "interpolate_curve",
+    "interpolate_curves",
     "search_country",
     "sort_by_term",
 )
@@ -29,7 +30,8 @@ def flip_date_format(date: str) -> str:
 
 def get_terms(tickers: List[str]) -> List[str]:
     """Map tickers to bond terms, e.g. Brazil 5Y -> 5Y"""
-    return re.findall(r"\d+[MYmy]", "|".join(tickers))
+    terms = (get_bond_info(ticker)["term"] for ticker in tickers)
+    return [term for term in terms if term]
 
 
 def get_tickvals(terms: List[str]) -> List[int]:
@@ -44,15 +46,7 @@ def get_tickvals(terms: List[str]) -> List[int]:
     if len(set(terms)) != len(terms):
         raise ValueError("Bond terms must be unique")
 
-    vals = [None] * len(terms)
-    for i, term in enumerate(terms):
-        if "m" in term:
-            val = int(term[:-1])
-        elif "y" in term:
-            val = int(term[:-1]) * 12
-        else:
-            raise ValueError(f"Unrecognized period [{term}]")
-        vals[i] = val
+    vals = [get_term_months(term) for term in terms]
 
     # If resulting tickvals are not monotonic, input was likely not sorted
     if not pd.Series(vals).is_monotonic:
@@ -61,33 +55,67 @@ def get_tickvals(terms: List[str]) -> List[int]:
 
 
 def interpolate_curve(data: pd.Series, method: str) -> pd.Series:
-    """Wrapper to interpolate a curve by gradually stepping "down" in method"""
-    curve = None
-    try:
-        curve = data.interpolate(method=method)
-    except ValueError:
-        logger.error(f"Not enough data for method `{method}`. Using `quadratic`.")
-        try:
-            curve = data.interpolate(method="quadratic")
-        except ValueError:
-            logger.error(f"Not enough data for method `quadratic`. Using `linear`.")
-            curve = data.interpolate(method="linear")
-
-    return curve
-
-
-def _is_valid_ticker(ticker: str) -> bool:
-    """Helper to drop tickers/terms with unwanted patterns"""
-    restricted = ["Overnight", "W"]
-    for el in restricted:
-        if el in ticker:
-            return False
-    return True
-
-
-@lru_cache(maxsize=32)
+    """Interpolate a single curve, indexed by term in months (see
+    `interpolate_curves`)"""
+    curves = interpolate_curves(data.to_frame().T, method, grid=data.index)
+    return curves.iloc[0].rename(data.name)
+
+
+def interpolate_curves(
+    data: pd.DataFrame,
+    method: str,
+    grid: Optional[Sequence[int]] = None,
+) -> pd.DataFrame:
+    """Interpolate many curves at once onto a common grid of terms
+
+    Rows sharing the same missing terms are fitted in a single vectorized pass.
+    Rows with too few valid points for `method` gradually step "down" in method
+    (cubic -> quadratic -> linear). Points outside each row's range of valid
+    terms are left as NaN.
+
+    Parameters
+    ----------
+    data : pd.DataFrame
+        (dates x terms) yields, with columns as term in months (see `get_tickvals`)
+    method : str
+        one of {cubic, quadratic, linear}
+    grid : Sequence[int], optional
+        target terms in months, defaults to every month up to the longest term
+    """
+    from scipy.interpolate import make_interp_spline  # Slow to import
+
+    degrees = {"linear": 1, "quadratic": 2, "cubic": 3}
+    if method not in degrees:
+        raise ValueError(f"Unrecognized method [{method}]")
+
+    data = data.groupby(level=0, axis=1).mean()  # Ensure terms are unique
+    x = data.columns.to_numpy(dtype=float)
+    values = data.to_numpy(dtype=float)
+    if grid is None:
+        grid = np.arange(1, x[-1] + 1)
+    grid = np.asarray(grid, dtype=float)
+
+    out = np.full((len(values), len(grid)), np.nan)
+    valid = ~np.isnan(values)
+    patterns, inverse = np.unique(valid, axis=0, return_inverse=True)
+    for i, mask in enumerate(patterns):
+        n_points = mask.sum()
+        if n_points < 2:
+            continue
+
+        rows = np.flatnonzero(inverse.ravel() == i)
+        xs = x[mask]
+        k = min(degrees[method], n_points - 1)
+        spline = make_interp_spline(xs, values[np.ix_(rows, mask)], k=k, axis=1)
+
+        inside = (grid >= xs[0]) & (grid <= xs[-1])
+        out[np.ix_(rows, inside)] = spline(grid[inside])
+
+    return pd.DataFrame(out, index=data.index, columns=grid)
+
+
 def search_country(query: str) -> List[str]:
-    """Search available bonds for a given country
+    """Search available bonds for a given country (see `universe`)
 
     ...
 
@@ -96,18 +124,7 @@ def search_country(query: str) -> List[str]:
     query : str
         full name of target country (e.g. "united kingdom", *NOT* "uk")
     """
-    tickers = []
-    try:
-        res = investpy.search_bonds("full_name", query)
-    except RuntimeError:
-        logger.error("No countries found.")
-    else:
-        if res.country.unique().size != 1:
-            logger.error(f"Ambiguous query [{query}].")
-        else:
-            tickers = res.name.tolist()
-
-    return list(filter(_is_valid_ticker, tickers))
+    return search_universe(query)
 
 
 def sort_by_term(tickers: List[str]) -> List[str]:
@@ -120,16 +137,13 @@ def sort_by_term(tickers: List[str]) -> List[str]:
     tickers : List[str]
         list of tickers containg a valid term, e.g. ["foo 1y", "foo 20y"]
     """
+    infos = [get_bond_info(ticker) for ticker in tickers]
+    infos = [info for info in infos if info["term"]]
 
-    def _custom_sorter(key: str) -> str:
-        """Add higher prefix to years and sort as number (not alphabetically)"""
-        number, period = key[:-1], key[-1]
-        suffix = {"y": 10000, "m": 100, "w": 1}[period]
-
-        return int(f"{suffix}{number}")
-
-    terms = get_terms(tickers)
-    sorted_terms = sorted(terms, key=_custom_sorter)
-    idx = [terms.index(i) for i in sorted_terms]
+    # Ranks are precomputed for tickers in the universe, others are parsed
+    if all("rank" in info for info in infos):
+        infos.sort(key=itemgetter("rank"))
+    else:
+        infos.sort(key=get_term_key)
 
-    return np.array(list(tickers))[idx].tolist()
+    return [info["ticker"] for info in infos]